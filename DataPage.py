@@ -96,7 +96,6 @@ class DataPage(wx.Panel):
             Dnodetree.AddRoot(_("Nodes (%d)") % p['nNodes'])
 
         for i in range(nPeriods):
-            d = DynamicResults[i]
             t = Dnodetree.AppendItem(Dnodetree.RootItem,_('Timestep %d') % i)
             # set data to say branch has not been expanded and tell tree it has children
             Dnodetree.SetPyData(t,('timestep',i,False))
@@ -167,7 +166,6 @@ class DataPage(wx.Panel):
 
 
         for i in range(nPeriods):
-            d = DynamicResults[i]
             t = Dlinktree.AppendItem(Dlinktree.RootItem,_('Timestep %d') % i)
             Dlinktree.SetPyData(t,('timestep',i,False))
             Dlinktree.SetItemHasChildren(t)
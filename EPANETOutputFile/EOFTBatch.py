@@ -0,0 +1,236 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool batch reading of many output files
+#
+# With --batch, every output file named on the command line (or matched by
+# a glob such as results/*.hyd, expanded here so it also works on Windows)
+# is read with the same options, in a pool of --batch_jobs worker
+# processes.  Each worker sets up the library and loads the plugins once
+# and then reads file after file, so a batch does not pay for starting
+# Python for every file.
+#
+# The names of the files written (the CSVs, --npy_dir, --sqlite, --output
+# and --profile_json) are templates: {name} is replaced by the name of the
+# output file without its directory and extension and {dir} by its
+# directory (eg. -N {dir}/{name}_dnode.csv).  Each file must write its own
+# files.  What is displayed for each file is kept until it has been read
+# and then displayed in the order the files were named.
+#
+# In a pool, each file is read by one process (--jobs and --export_jobs
+# are 1), as the workers can not start processes of their own.
+#
+# When they have all been read, a summary of the counts, epilog warnings
+# and time taken for each file is displayed and, with --batch_summary,
+# written to a CSV.
+#
+
+import copy
+import glob
+import os
+import sys
+import time
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import EOFTCsv
+import EOFTDecoder
+import EPANETOutputFile
+
+if EOFTDecoder._hasMultiprocessing:
+    import multiprocessing
+
+# the options naming files written for each output file, which are templates
+OUTPUT_OPTIONS = ['prolog_node_csv', 'prolog_link_csv', 'energy_use_csv',
+        'dynamic_node_csv', 'dynamic_link_csv', 'wide_csv', 'npy_dir',
+        'sqlite', 'output', 'profile_json']
+
+SUMMARY_COLUMNS = ['File', 'Nodes', 'Links', 'Periods', 'Warnings',
+        'Seconds', 'Error']
+
+
+def Files(args):
+    ''' The output files named by args (file names or globs), in order
+        without repeats.
+    '''
+    files = []
+    for arg in args:
+        matches = sorted(glob.glob(arg))
+        if len(matches) == 0:
+            # left for reading it to report
+            matches = [arg]
+        for fname in matches:
+            if fname not in files:
+                files.append(fname)
+    return files
+
+
+def FileOptions(options, fname):
+    ''' Copy of options for reading output file fname: the names of the
+        files written (OUTPUT_OPTIONS) are filled in (see Template).
+    '''
+    fileoptions = copy.copy(options)
+    for name in OUTPUT_OPTIONS:
+        value = getattr(options, name, None)
+        if isinstance(value, list):
+            setattr(fileoptions, name, [Template(v, fname) for v in value])
+        elif value is not None:
+            setattr(fileoptions, name, Template(value, fname))
+    return fileoptions
+
+
+def Template(template, fname):
+    ''' template with {name} and {dir} replaced for output file fname '''
+    name = os.path.splitext(os.path.basename(fname))[0]
+    return template.format(name = name, dir = os.path.dirname(fname) or '.')
+
+
+def OutputNames(options):
+    # the names of the files written with options (see OUTPUT_OPTIONS)
+    names = []
+    for name in OUTPUT_OPTIONS:
+        value = getattr(options, name, None)
+        if isinstance(value, list):
+            names.extend([v.partition('=')[2] for v in value])
+        elif value is not None:
+            names.append(value)
+    return names
+
+
+def ReadFile(task):
+    '''Task: read one output file of the batch.
+
+    Args:
+        task (tuple):   (name of the output file, its options (see
+                        FileOptions), True to load the user plugins, True
+                        to keep what is displayed instead of displaying it)
+
+    Returns:
+        (row, text): the file's summary (a dictionary with SUMMARY_COLUMNS)
+        and what was displayed for it if it was kept, else None
+    '''
+    fname, options, plugins, keep = task
+    if plugins:
+        # only the first file in each process loads them
+        EPANETOutputFile.LoadPlugins()
+    row = dict([(column, None) for column in SUMMARY_COLUMNS])
+    row['File'] = fname
+    stdout = sys.stdout
+    if keep:
+        sys.stdout = StringIO()
+    start = time.time()
+    try:
+        try:
+            eof = EPANETOutputFile.EPANETOutputFile([fname], None, options)
+            eof.Close()
+            row['Nodes'] = eof.Prolog['nNodes']
+            row['Links'] = eof.Prolog['nLinks']
+            row['Periods'] = eof.Epilog['nPeriods']
+            row['Warnings'] = eof.Epilog['WarningFlag']
+        except Exception as e:
+            row['Error'] = '%s' % (e,)
+            print(_('ERROR reading %(file)s: %(error)s')
+                    % {'file': fname, 'error': row['Error']})
+    finally:
+        row['Seconds'] = time.time() - start
+        text = None
+        if keep:
+            text = sys.stdout.getvalue()
+            sys.stdout = stdout
+    return (row, text)
+
+
+def Run(options, args):
+    '''Read each of the output files named by args (see Files) with options.
+
+    Args:
+        options (optparse.Values):  the command line options
+        args (list):                output file names or globs
+
+    Returns:
+        (list) the summary of each file (see ReadFile)
+    '''
+    parser = EPANETOutputFile.EOFTparser
+    files = Files(args)
+    if len(files) == 0:
+        parser.error(_('No EPANET output file specified.'))
+    if options.batch_jobs < 0:
+        parser.error(_('--batch_jobs must be 0 or more'))
+    jobs = min(EOFTDecoder.Jobs(options.batch_jobs), len(files))
+
+    tasks = []
+    written = {}
+    for fname in files:
+        fileoptions = FileOptions(options, fname)
+        if jobs > 1:
+            fileoptions.jobs = 1
+            fileoptions.export_jobs = 1
+            fileoptions.progress = False
+        for name in OutputNames(fileoptions):
+            if name in written:
+                parser.error(_('%(file1)s and %(file2)s would both write %(name)s: use {name} in the names of the files written with --batch')
+                        % {'file1': written[name], 'file2': fname,
+                            'name': name})
+            written[name] = fname
+        tasks.append((fname, fileoptions, EPANETOutputFile.EOFTPluginsLoaded,
+                jobs > 1))
+
+    rows = []
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            # the results come back in order as soon as they are ready
+            for row, text in pool.imap(ReadFile, tasks):
+                if text:
+                    sys.stdout.write(text)
+                rows.append(row)
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for task in tasks:
+            rows.append(ReadFile(task)[0])
+
+    if not options.silent:
+        PrintSummary(rows)
+    if options.batch_summary is not None:
+        WriteSummary(options.batch_summary, rows, options.compress_level)
+    return rows
+
+
+def PrintSummary(rows):
+    ''' Display the totals of the summaries rows.  No return value. '''
+    failed = len([row for row in rows if row['Error'] is not None])
+    warnings = len([row for row in rows if row['Warnings']])
+    print("")
+    headingtext = _("Batch summary")
+    print(headingtext)
+    print('='*len(headingtext))
+    print(_('Files read: %d') % (len(rows) - failed))
+    print(_('Files with warnings: %d') % warnings)
+    print(_('Files which could not be read: %d') % failed)
+    print(_('Time reading files: %.3f s') %
+            sum([row['Seconds'] for row in rows]))
+
+
+def WriteSummary(csvname, rows, level = None):
+    ''' Write the summaries rows to CSV csvname.  No return value. '''
+    csvf = EOFTCsv.Open(csvname, level)
+    try:
+        csvf.write(', '.join(['"%s"' % column for column in SUMMARY_COLUMNS])
+                + '\n')
+        for row in rows:
+            values = ['"%s"' % row['File']]
+            for column in SUMMARY_COLUMNS[1:5]:
+                if row[column] is None:
+                    values.append('')
+                else:
+                    values.append('%d' % row[column])
+            values.append('%.3f' % row['Seconds'])
+            values.append('"%s"' % (row['Error'] or '').replace('"', '""'))
+            csvf.write(', '.join(values) + '\n')
+    finally:
+        csvf.close()
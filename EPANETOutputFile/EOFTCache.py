@@ -0,0 +1,337 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool cache of decoded output files
+#
+# Reopening an unchanged output file can skip decoding it by loading the
+# results saved in a cache file the last time it was read in full.  The
+# cache file is either kept next to the output file (FILENAME.eoftc) or in
+# a cache directory, where it is named from a hash of the output file's
+# absolute path.
+#
+# A cache file starts with CACHE_HEADER (the magic string and the size of
+# the header which follows it).  The header is JSON rather than a pickle,
+# so loading a cache file from a shared cache directory can not run code;
+# byte strings are stored as Latin-1 text, which gives back the same bytes.
+# It holds:
+#   Key         (size, mtime, hash) of the output file it was made from (see
+#               FileKey); the cache is only used if this still matches
+#   Prolog      the prolog dictionary (without the translated option texts)
+#   EnergyUse   the energy use dictionary
+#   Epilog      the epilog dictionary
+#   nPeriods, nNodes, nLinks
+#   Columns     for each dynamic results variable, the (offset, width) of
+#               its values from the start of the columns
+# The columns start at the first multiple of ALIGN after the header and
+# each holds the nPeriods x width little-endian 4-byte floats of one
+# variable in period order, so a whole variable can be used straight from
+# the memory-mapped cache file (with NumPy, without copying it).
+#
+# In a cache directory, using a cache file updates its modification time,
+# so when the files take more than the size allowed the least recently
+# used ones are removed (see Evict).
+#
+# A CacheEntry holds the cache file open, memory-mapped, until it is closed
+# (see CacheEntry.Close, which is called once the output file has been
+# read).  Any NumPy columns used straight from the map keep it open until
+# they are no longer used.
+#
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import EOFTDecoder
+
+
+CACHE_MAGIC = b'EOFTC002'
+CACHE_EXT = '.eoftc'
+CACHE_HEADER = struct.Struct('<8sQ')
+
+# bytes read from each end of the output file for its content hash
+HASH_BYTES = 64*1024
+
+# alignment of the columns in a cache file
+ALIGN = 64
+
+# prolog arrays of numbers (arrays rather than lists with --compact)
+PROLOG_INT_ARRAYS = ['NodeTankResIndex', 'LinkStart', 'LinkEnd', 'LinkType',
+        'TankResIndex']
+PROLOG_FLOAT_ARRAYS = ['TankResXSectArea', 'NodeElev', 'LinkLength',
+        'LinkDiam']
+
+# prolog entries which are translated, so not cached
+PROLOG_TEXTS = ['WaterQualityOption', 'FlowUnitsOption',
+        'PressureUnitsOption', 'TimeStatsOption']
+
+
+def CachePath(fname, cachedir = None):
+    ''' Name of the cache file for output file fname: next to it, or in
+        cachedir if that is not None.
+    '''
+    if cachedir is None:
+        return fname + CACHE_EXT
+    path = os.path.abspath(fname)
+    if not isinstance(path, bytes):
+        path = path.encode('utf-8')
+    return os.path.join(cachedir, hashlib.sha1(path).hexdigest() + CACHE_EXT)
+
+
+def FileKey(fname):
+    ''' (size, mtime, hash) identifying the contents of output file fname.
+
+        Only the first and last HASH_BYTES of the file are hashed, which
+        covers the prolog and epilog and is quick for any size of file.
+    '''
+    st = os.stat(fname)
+    h = hashlib.sha1()
+    f = open(fname, 'rb')
+    try:
+        h.update(f.read(HASH_BYTES))
+        if st.st_size > HASH_BYTES:
+            f.seek(max(HASH_BYTES, st.st_size - HASH_BYTES))
+            h.update(f.read(HASH_BYTES))
+    finally:
+        f.close()
+    return (st.st_size, st.st_mtime, h.hexdigest())
+
+
+def _Aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _ToJSON(value):
+    # value with its byte strings as Latin-1 text, for json.dumps
+    if isinstance(value, bytes):
+        return value.decode('latin-1')
+    if isinstance(value, dict):
+        return dict([(_ToJSON(k), _ToJSON(v)) for k, v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return [_ToJSON(v) for v in value]
+    return value
+
+
+def _FromJSON(value):
+    # value from json.loads with its text as byte strings again (where
+    # strings are bytes, as in Python 2)
+    if str is bytes and isinstance(value, type(u'')):
+        return value.encode('latin-1')
+    if isinstance(value, dict):
+        return dict([(_FromJSON(k), _FromJSON(v)) for k, v in value.items()])
+    if isinstance(value, list):
+        return [_FromJSON(v) for v in value]
+    return value
+
+
+class CacheEntry(object):
+    ''' Memory-mapped cache file which matches its output file '''
+
+    def __init__(self, path, header, datastart, map):
+        self.path = path
+        self.nPeriods = header['nPeriods']
+        self.nNodes = header['nNodes']
+        self.nLinks = header['nLinks']
+        self.EnergyUse = header['EnergyUse']
+        self.Epilog = header['Epilog']
+        self.columns = header['Columns']
+        self._prolog = header['Prolog']
+        self.datastart = datastart
+        # the map stays open as long as any NumPy column uses it
+        self.map = map
+        self.views = 0
+
+    def Close(self):
+        ''' Release the memory-mapped cache file.  If NumPy columns were
+            taken straight from it, it is closed when they are no longer
+            used instead of now.
+        '''
+        map = self.map
+        self.map = None
+        if map is not None and self.views == 0:
+            map.close()
+
+    def Prolog(self, compact = False):
+        ''' A copy of the cached prolog dictionary (see EOFTDecoder.ReadInts
+            for compact).
+        '''
+        d = dict(self._prolog)
+        for key in PROLOG_INT_ARRAYS:
+            d[key] = EOFTDecoder.Ints(d[key], compact)
+        for key in PROLOG_FLOAT_ARRAYS:
+            if compact:
+                d[key] = array('f', d[key])
+            else:
+                d[key] = list(d[key])
+        return d
+
+    def Column(self, name, engine, periods = None, entities = None):
+        '''Values of variable name as stored by a ResultCube.
+
+        Args:
+            name (string):      name of the variable
+            engine (string):    DECODER_NUMPY or DECODER_ARRAY (see EOFTDecoder.GetDecoder)
+            periods (list):     indexes of the periods wanted or None for all
+            entities (list):    indexes of the nodes or links wanted or None for all
+
+        Returns:
+            with NumPy, a (periods, entities) float32 array, which is a
+            read-only view of the cache file if all are wanted; otherwise a
+            flat array('f') in period order
+        '''
+        offset, width = self.columns[name]
+        start = self.datastart + offset
+        count = self.nPeriods*width
+        if engine == EOFTDecoder.DECODER_NUMPY:
+            values = EOFTDecoder.numpy.frombuffer(self.map, dtype='<f4',
+                    count=count, offset=start).reshape(self.nPeriods, width)
+            if periods is not None:
+                values = values[periods]
+            if entities is not None:
+                values = values[:, entities]
+            if periods is None and entities is None:
+                # not a copy
+                self.views += 1
+            return values
+        values = EOFTDecoder.DecodeFloats(self.map[start:start+4*count],
+                EOFTDecoder.DECODER_ARRAY)
+        if periods is None and entities is None:
+            return values
+        if periods is None:
+            periods = range(0, self.nPeriods)
+        selected = array('f')
+        for i in periods:
+            row = values[i*width:(i+1)*width]
+            if entities is None:
+                selected.extend(row)
+            else:
+                selected.extend(array('f', [row[j] for j in entities]))
+        return selected
+
+
+def Load(fname, path):
+    ''' Return a CacheEntry for output file fname from cache file path, or
+        None if there is no cache file or it does not match fname.
+    '''
+    if not os.path.isfile(path):
+        return None
+    try:
+        f = open(path, 'rb')
+        try:
+            magic, size = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if magic != CACHE_MAGIC:
+                return None
+            header = _FromJSON(json.loads(f.read(size).decode('utf-8')))
+            if tuple(header['Key']) != FileKey(fname):
+                return None
+            map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            # the map does not need the file to stay open
+            f.close()
+    except Exception:
+        # a damaged or unreadable cache is the same as no cache
+        return None
+    try:
+        # most recently used (see Evict)
+        os.utime(path, None)
+    except OSError:
+        pass
+    return CacheEntry(path, header, _Aligned(CACHE_HEADER.size + size), map)
+
+
+def Write(fname, path, Prolog, EnergyUse, Epilog, cube, cachesize = None):
+    '''Write the cache file for output file fname.  No return value.
+
+    Args:
+        fname (string):         name of EPANET output file
+        path (string):          name of cache file (see CachePath)
+        Prolog (dictionary):    prolog read from fname
+        EnergyUse (dictionary): energy use read from fname
+        Epilog (dictionary):    epilog read from fname
+        cube (ResultCube):      all the dynamic results read from fname
+        cachesize (int):        total bytes allowed for the cache files in
+                                the directory of path, or None for no limit
+
+    Raises:
+        EnvironmentError if the cache file could not be written
+    '''
+    header = {
+        'Key': FileKey(fname),
+        'Prolog': {},
+        'EnergyUse': EnergyUse,
+        'Epilog': Epilog,
+        'nPeriods': cube.nPeriods,
+        'nNodes': cube.nNodes,
+        'nLinks': cube.nLinks,
+        'Columns': {}
+    }
+    for key, value in Prolog.items():
+        if key in PROLOG_TEXTS:
+            continue
+        if key in PROLOG_INT_ARRAYS or key in PROLOG_FLOAT_ARRAYS:
+            value = list(value)
+        header['Prolog'][key] = value
+    offset = 0
+    for name, width in cube.layout:
+        header['Columns'][name] = (offset, width)
+        offset = _Aligned(offset + 4*cube.nPeriods*width)
+    encoded = json.dumps(_ToJSON(header)).encode('utf-8')
+    datastart = _Aligned(CACHE_HEADER.size + len(encoded))
+
+    # write to a temporary file and rename it, so a cache file is always
+    # complete
+    tmppath = '%s.%d.tmp' % (path, os.getpid())
+    f = open(tmppath, 'wb')
+    try:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, width in cube.layout:
+            f.write(b'\0' * (datastart + header['Columns'][name][0] - f.tell()))
+            values = cube.Variables[name]
+            if cube.engine == EOFTDecoder.DECODER_NUMPY:
+                if values.dtype != EOFTDecoder.numpy.dtype('<f4'):
+                    values = values.astype('<f4')
+            elif sys.byteorder != 'little':
+                values = array('f', values)
+                values.byteswap()
+            values.tofile(f)
+    except:
+        f.close()
+        os.remove(tmppath)
+        raise
+    f.close()
+    if os.path.exists(path):
+        # rename will not replace a file on Windows
+        os.remove(path)
+    os.rename(tmppath, path)
+    if cachesize is not None:
+        Evict(os.path.dirname(path), cachesize, path)
+
+
+def Evict(cachedir, cachesize, keep = None):
+    ''' Remove the least recently used cache files in cachedir until they
+        take at most cachesize bytes in total.  The cache file keep (if
+        any) is never removed.
+    '''
+    files = []
+    total = 0
+    for name in os.listdir(cachedir):
+        if not name.endswith(CACHE_EXT):
+            continue
+        path = os.path.join(cachedir, name)
+        st = os.stat(path)
+        files.append((st.st_mtime, path, st.st_size))
+        total += st.st_size
+    files.sort()
+    for mtime, path, size in files:
+        if total <= cachesize:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
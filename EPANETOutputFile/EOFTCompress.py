@@ -0,0 +1,169 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool compressed output files
+#
+# The CSVs and the displayed sections (with --output) are written straight
+# to a compressed file when its name ends in one of COMPRESSIONS' suffixes,
+# instead of writing the much larger text and compressing it afterwards:
+#   .gz     gzip (zlib)
+#   .bz2    bzip2
+#   .xz     xz (needs the lzma module, or backports.lzma with Python 2)
+#
+# Small writes are collected into batches of OUTPUT_BATCH bytes before
+# they are compressed.  With threaded=True, the batches are compressed and
+# written by a background thread, which overlaps with formatting the text
+# as the compressors release the GIL while they work.
+#
+
+import bz2
+import gzip
+import sys
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+_hasLzma = True
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        _hasLzma = False
+
+
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_BZ2 = 'bz2'
+COMPRESSION_XZ = 'xz'
+
+# file name suffix of each compression
+COMPRESSIONS = [
+    ('.gz', COMPRESSION_GZIP),
+    ('.bz2', COMPRESSION_BZ2),
+    ('.xz', COMPRESSION_XZ)
+]
+
+# bytes of text collected before they are compressed
+OUTPUT_BATCH = 256*1024
+
+# batches waiting for the background thread before writes wait for it
+OUTPUT_QUEUE = 8
+
+
+def Compression(fname):
+    ''' Compression used for output file fname (see COMPRESSIONS) or None
+        if it is written as it is.
+    '''
+    lower = fname.lower()
+    for suffix, compression in COMPRESSIONS:
+        if lower.endswith(suffix):
+            return compression
+    return None
+
+
+def Open(fname, level = None, threaded = False, buffering = -1):
+    '''Open output file fname for writing text, compressed if its name ends
+    in one of COMPRESSIONS' suffixes.
+
+    Args:
+        fname (string):     name of the file
+        level (int):        compression level (1-9 for gzip and bzip2, 0-9
+                            for xz) or None for the default of each
+        threaded (bool):    compress in a background thread
+        buffering (int):    buffer size for an uncompressed file (see open)
+
+    Returns:
+        file-like object with write, writelines and close
+
+    Raises:
+        Exception if the file needs lzma and that is not available
+    '''
+    compression = Compression(fname)
+    if compression is None:
+        return open(fname, 'w', buffering)
+    if compression == COMPRESSION_GZIP:
+        if level is None:
+            level = 9
+        f = gzip.GzipFile(fname, 'wb', level)
+    elif compression == COMPRESSION_BZ2:
+        if level is None:
+            level = 9
+        f = bz2.BZ2File(fname, 'w', compresslevel=level)
+    else:
+        if not _hasLzma:
+            raise Exception(_('ERROR: writing %s needs the lzma module (backports.lzma with Python 2)') % fname)
+        if level is None:
+            level = 6
+        f = lzma.LZMAFile(fname, 'wb', preset=level)
+    return CompressedOutput(f, threaded)
+
+
+class CompressedOutput(object):
+    ''' Text output to a compressed file f, in batches of OUTPUT_BATCH bytes
+        compressed by the caller or, if threaded, by a background thread.
+    '''
+
+    def __init__(self, f, threaded = False):
+        self.f = f
+        self.batch = []
+        self.size = 0
+        self.thread = None
+        self.error = None
+        if threaded:
+            self.queue = queue.Queue(OUTPUT_QUEUE)
+            self.thread = threading.Thread(target=self._Compress)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def _Compress(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            if self.error is None:
+                try:
+                    self.f.write(data)
+                except Exception as e:
+                    # raised again by the next write or close
+                    self.error = e
+
+    def write(self, text):
+        if isinstance(text, type(u'')):
+            text = text.encode('utf-8')
+        self.batch.append(text)
+        self.size += len(text)
+        if self.size >= OUTPUT_BATCH:
+            self.flush()
+
+    def writelines(self, lines):
+        for text in lines:
+            self.write(text)
+
+    def flush(self):
+        ''' Pass the text collected so far to the compressor '''
+        if self.error is not None:
+            raise self.error
+        if len(self.batch) == 0:
+            return
+        data = b''.join(self.batch)
+        self.batch = []
+        self.size = 0
+        if self.thread is None:
+            self.f.write(data)
+        else:
+            self.queue.put(data)
+
+    def close(self):
+        ''' Compress the rest of the text and close the file '''
+        try:
+            self.flush()
+        finally:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+            self.f.close()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,256 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool batched CSV writing
+#
+# Writing the dynamic results CSVs one row at a time spends most of its time
+# in Python: formatting each row separately, quoting its ID again and making
+# a write() call for it.  Here the rows of each timestep are formatted
+# together with a single % operation from a template built once per file
+# (the IDs already quoted), and the text of several timesteps is written
+# with one writelines() call to a file with a large buffer.
+#
+# The writers are only given the (already translated) text and the values
+# they write, so they can also run in the worker processes of EOFTExport,
+# and TimeStepRowWriter and WideRowWriter take one timestep at a time so a
+# CSV can be written as the dynamic results are read (see --stream).
+#
+
+import itertools
+
+import EOFTCompress
+import EOFTDecoder
+
+
+# buffer size of the CSV files written
+CSV_BUFFER = 1024*1024
+
+# bytes of text collected before they are written
+CSV_BATCH = 4*1024*1024
+
+
+def FloatFormat(precision = None):
+    ''' % format for the numbers in a CSV: '%f' (6 decimal places) if
+        precision is None, otherwise precision decimal places.
+    '''
+    if precision is None:
+        return '%f'
+    return '%%.%df' % precision
+
+
+def Open(csvname, level = None, threaded = False):
+    ''' Open CSV file csvname for writing with a large buffer, compressed if
+        its name ends in .gz, .bz2 or .xz (see EOFTCompress.Open for level
+        and threaded).
+    '''
+    return EOFTCompress.Open(csvname, level, threaded, CSV_BUFFER)
+
+
+def RowValues(d, names):
+    ''' Values of the variables names in the timestep dictionary d, one row
+        (node or link) after the other.
+    '''
+    columns = [d[name] for name in names]
+    if len(columns) == 0:
+        return ()
+    if (EOFTDecoder._hasNumpy
+            and all([hasattr(c, 'dtype') for c in columns])):
+        return tuple(EOFTDecoder.numpy.column_stack(columns).ravel().tolist())
+    return tuple(itertools.chain.from_iterable(zip(*columns)))
+
+
+def TimeSteps(nPeriods, DynamicResults, periods = None):
+    ''' (i, TimeStepD) for each entry in DynamicResults, where i is its
+        timestep in the file (see WriteTimeStepRows).
+    '''
+    for n in range(0, nPeriods):
+        i = n
+        if periods is not None: i = periods[i]
+        yield i, DynamicResults[n]
+
+
+class TimeStepRowWriter(object):
+    ''' Writes the rows of a dynamic results CSV one timestep at a time
+        (see WriteTimeStepRows), so the timesteps can be written as they are
+        read instead of being kept until they have all been read.
+    '''
+
+    def __init__(self, csvf, ids, names, StartTime, ReportTimeStep,
+            precision = None):
+        self.csvf = csvf
+        self.names = names
+        self.StartTime = StartTime
+        self.ReportTimeStep = ReportTimeStep
+        valueformat = (', ' + FloatFormat(precision))*len(names)
+        # '"ID", VALUE...' of each row with the IDs already quoted; a
+        # timestep's template joins them with its 'TIMESTEP, TIME, ' row start
+        self.rows = ['"' + ID.replace('%', '%%') + '"' + valueformat
+                for ID in ids]
+        self.batch = []
+        self.size = 0
+
+    def Write(self, i, d):
+        ''' Write the rows of timestep i (in the file) with its dictionary
+            of results d, which is not used once this returns.
+        '''
+        if len(self.rows) == 0:
+            return
+        start = '%d, %d, ' % (i, self.StartTime + i*self.ReportTimeStep)
+        template = start + ('\n' + start).join(self.rows) + '\n'
+        text = template % RowValues(d, self.names)
+        self.batch.append(text)
+        self.size += len(text)
+        if self.size >= CSV_BATCH:
+            self.Flush()
+
+    def Flush(self):
+        ''' Write the text collected so far to the file '''
+        self.csvf.writelines(self.batch)
+        self.batch = []
+        self.size = 0
+
+
+def WriteTimeStepRows(csvf, heading, ids, names, timesteps, StartTime,
+        ReportTimeStep, precision = None):
+    '''Write a dynamic results CSV, with a row for each ID in each timestep.
+    No return value.
+
+    Each row is 'TIMESTEP, TIME, "ID"' followed by ', VALUE' for each of
+    names.
+
+    Args:
+        csvf (file):            file to write to (see Open)
+        heading (string):       first line of the CSV, including its newline,
+                                or None to leave it out
+        ids (list):             ID of the node or link in each row
+        names (list):           names of the variables in the columns
+        timesteps (iterable):   (i, TimeStepD) for each timestep to write,
+                                where i is its timestep in the file and
+                                TimeStepD its dictionary of results (see
+                                TimeSteps)
+        StartTime (int):        time (seconds) of timestep 0
+        ReportTimeStep (int):   seconds between timesteps
+        precision (int):        decimal places of the values (see FloatFormat)
+    '''
+    if heading is not None:
+        csvf.write(heading)
+    if len(ids) == 0:
+        return
+    writer = TimeStepRowWriter(csvf, ids, names, StartTime, ReportTimeStep,
+            precision)
+    for i, d in timesteps:
+        writer.Write(i, d)
+    writer.Flush()
+
+
+def WritePrologNodeRows(csvf, heading, Prolog, precision = None):
+    ''' Write the prolog node CSV (see InternalPlugin.WritePrologNodeCSV)
+        with its heading line to csvf.  No return value.
+    '''
+    f = FloatFormat(precision)
+    csvf.write(heading)
+    d = Prolog
+    for i in range (0, d['nNodes']):
+        if d['NodeTankResIndex'][i] == -1:
+            csvf.write(('"%s", "Junction", ' + f + ', 0.0\n')
+                    % (d['NodeID'][i], d['NodeElev'][i]))
+        elif d['TankResXSectArea'][d['NodeTankResIndex'][i]] == 0.0:
+            csvf.write(('"%s", "Reservoir", ' + f + ', 0.0\n')
+                    % (d['NodeID'][i], d['NodeElev'][i]))
+        else:
+            csvf.write(('"%s", "Tank", ' + f + ', ' + f + '\n')
+                    % (d['NodeID'][i], d['NodeElev'][i],
+                    d['TankResXSectArea'][d['NodeTankResIndex'][i]]))
+
+
+def WritePrologLinkRows(csvf, heading, Prolog, linktypes, precision = None):
+    ''' Write the prolog link CSV (see InternalPlugin.WritePrologLinkCSV)
+        with its heading line to csvf, where linktypes has the text of each
+        link's type.  No return value.
+    '''
+    f = FloatFormat(precision)
+    csvf.write(heading)
+    d = Prolog
+    for i in range (0, d['nLinks']):
+        # NB: the LinkStart and LinkEnd values are indexes which are
+        # zero based, whereas the data file stores them 1-based.
+        csvf.write(('"%s", "%s", "%s", "%s", ' + f + ', ' + f + '\n')
+                % (d['LinkID'][i], d['NodeID'][d['LinkStart'][i]],
+                    d['NodeID'][d['LinkEnd'][i]],
+                    linktypes[i], d['LinkLength'][i], d['LinkDiam'][i]))
+
+
+def WriteEnergyUseRows(csvf, heading, Prolog, EnergyUse, precision = None):
+    ''' Write the energy use CSV (see InternalPlugin.WriteEnergyUseCSV)
+        with its heading line to csvf.  No return value.
+    '''
+    rowformat = '"%s"' + (', ' + FloatFormat(precision))*6 + '\n'
+    csvf.write(heading)
+    d = EnergyUse
+    for i in range(0, Prolog['nPumps']):
+        ind = d['PumpIndex'][i]
+        csvf.write(rowformat % (Prolog['LinkID'][ind],
+            d['PumpUtilization'][i], d['PumpAveEfficiency'][i],
+            d['PumpAvekWPerVol'][i], d['PumpAvekW'][i], d['PumpPeakkW'][i],
+            d['PumpAveCostPerDay'][i]))
+
+
+class WideRowWriter(object):
+    ''' Writes the rows of a wide dynamic results CSV one timestep at a
+        time (see WriteWideRows).
+    '''
+
+    def __init__(self, csvf, width, StartTime, ReportTimeStep,
+            precision = None):
+        self.csvf = csvf
+        self.StartTime = StartTime
+        self.ReportTimeStep = ReportTimeStep
+        self.rowformat = ('%d, %d' + (', ' + FloatFormat(precision))*width
+                + '\n')
+        self.batch = []
+        self.size = 0
+
+    def Write(self, i, values):
+        ''' Write the row of timestep i (in the file) with the values of
+            its columns, which are not used once this returns.
+        '''
+        if hasattr(values, 'tolist'):
+            # NumPy or array('f') values as Python floats
+            values = values.tolist()
+        text = self.rowformat % ((i, self.StartTime + i*self.ReportTimeStep)
+                + tuple(values))
+        self.batch.append(text)
+        self.size += len(text)
+        if self.size >= CSV_BATCH:
+            self.Flush()
+
+    def Flush(self):
+        ''' Write the text collected so far to the file '''
+        self.csvf.writelines(self.batch)
+        self.batch = []
+        self.size = 0
+
+
+def WriteWideRows(csvf, heading, width, rows, StartTime, ReportTimeStep,
+        precision = None):
+    '''Write a wide dynamic results CSV, with a row for each timestep and a
+    column for each node or link.  No return value.
+
+    Each row is 'TIMESTEP, TIME' followed by ', VALUE' for each column.
+
+    Args:
+        csvf (file):            file to write to (see Open)
+        heading (string):       first line of the CSV, including its newline
+        width (int):            number of columns of values
+        rows (iterable):        (i, values) for each timestep to write, where
+                                i is its timestep in the file and values the
+                                row of the variable for that timestep (eg.
+                                from ResultCube.Row)
+        StartTime (int):        time (seconds) of timestep 0
+        ReportTimeStep (int):   seconds between timesteps
+        precision (int):        decimal places of the values (see FloatFormat)
+    '''
+    csvf.write(heading)
+    writer = WideRowWriter(csvf, width, StartTime, ReportTimeStep, precision)
+    for i, values in rows:
+        writer.Write(i, values)
+    writer.Flush()
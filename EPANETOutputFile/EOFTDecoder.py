@@ -0,0 +1,781 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool decoding support for EPANET 2.00.12 Output Files
+#
+# The dynamic results section of the output file is a sequence of fixed-size
+# records, one for each reporting period.  Each record holds 4 blocks of
+# Nnodes 4-byte floats (one block per node variable) followed by 8 blocks
+# of Nlinks 4-byte floats (one block per link variable), so a period (or a
+# run of periods) can be read with a single read() and decoded in one call
+# instead of one read() and one struct.unpack() for every float.
+#
+# Two decoding engines are available:
+#   numpy   uses numpy.frombuffer() and keeps the values as float32 arrays
+#           (only available if NumPy can be imported)
+#   array   uses the standard library array module and keeps the values
+#           as array('f') buffers of 4-byte floats (not the lists of Python
+#           floats of the original reader: values stored in them are rounded
+#           to 4 bytes, see EOFTResults.ResultCube)
+# The 'auto' setting uses NumPy if it is available, otherwise array.
+#
+# A subset of the variables can be selected (see SelectVariables), in which
+# case only their blocks are kept from each period and large unwanted blocks
+# are seeked over instead of read.  Likewise a subset of the reporting
+# periods can be selected (see SelectPeriods): the offset of each period is
+# fixed, so the reader seeks straight to the start of each run of
+# consecutive selected periods.  Finally, only the values of some nodes and
+# links can be kept (see SelectIDs) by reading just the runs of consecutive
+# selected nodes or links from each variable block.
+#
+# Periods can also be streamed one at a time into a reused buffer (see
+# ReadPeriodInto and EOFTResults.PeriodStream) so that memory use does not
+# depend on the number of periods.
+#
+# The arrays in the prolog and energy use sections (IDs, link start/end
+# nodes, elevations, lengths etc.) are also each read with a single read()
+# and decoded with one precompiled struct.Struct unpack.
+#
+# With compact set, the prolog arrays of numbers are kept as array('i') and
+# array('f') buffers and the array engine keeps array('f') slices instead of
+# lists, so each value takes 4 bytes rather than a Python int or float.
+#
+# Each chunk of periods is at a fixed offset, so the chunks can also be
+# read by a pool of processes (see ReadChunks), each with its own file
+# object, and handed back in order to be decoded.
+#
+# The fixed-size start of the prolog and the epilog give all the counts
+# needed to work out the offset and size of every section (see FileLayout),
+# so ReadHeader() can summarise and check a file with two small reads.
+#
+
+import collections
+import os
+import struct
+import sys
+from array import array
+
+_hasNumpy = True
+try:
+    import numpy
+except ImportError:
+    _hasNumpy = False
+
+_hasMultiprocessing = True
+try:
+    import multiprocessing
+except ImportError:
+    _hasMultiprocessing = False
+
+
+# names of the variables stored in each period in the order they are
+# written to the file
+NODE_VARIABLES = [
+        'NodeDemand',
+        'NodeHead',
+        'NodePressure',
+        'NodeWaterQuality'
+    ]
+
+LINK_VARIABLES = [
+        'LinkFlow',
+        'LinkVelocity',
+        'LinkHeadloss',
+        'LinkAveWaterQuality',
+        'LinkStatus',
+        'LinkSetting',
+        'LinkReactionRate',
+        'LinkFrictionFactor'
+    ]
+
+DECODER_AUTO = 'auto'
+DECODER_NUMPY = 'numpy'
+DECODER_ARRAY = 'array'
+DECODERS = [DECODER_AUTO, DECODER_NUMPY, DECODER_ARRAY]
+
+# target number of bytes to read from the dynamic results section at once
+CHUNK_BYTES = 4*1024*1024
+
+# blocks of unwanted variables smaller than this are read and discarded
+# rather than seeked over, since a seek costs more than reading a little
+SEEK_BYTES = 64*1024
+
+# size in bytes of the IDs written to the prolog (EPANET 2.00.12 and later)
+ID_SIZE = 32
+
+# array typecode for 4-byte integers
+_INT_CODE = 'i'
+if array('i').itemsize != 4:
+    _INT_CODE = 'l'
+
+# fixed-size start of the prolog: magic, version, 13 more integers
+# (counts, options and times), 3 title lines, input and report file names
+# and the chemical name and units
+PROLOG_HEADER = struct.Struct('<15i80s80s80s260s260s32s32s')
+PROLOG_HEADER_SIZE = PROLOG_HEADER.size
+
+# the epilog: 4 average reaction/inflow rates, number of periods, warning
+# flag and the magic number again
+EPILOG = struct.Struct('<4f3i')
+EPILOG_SIZE = EPILOG.size
+
+# precompiled struct layouts for arrays, keyed by format string: only the
+# STRUCTS_MAX most recently used are kept, as their sizes depend on the
+# counts in each file read (see _Struct)
+STRUCTS_MAX = 32
+_structs = collections.OrderedDict()
+
+
+def GetDecoder(name = DECODER_AUTO):
+    ''' Resolve a decoder name to the engine which will be used.
+
+        Args:
+            name (string):  one of DECODERS
+
+        Returns:
+            (string) DECODER_NUMPY or DECODER_ARRAY
+
+        Raises:
+            Exception if NumPy was requested but can't be imported
+    '''
+    if name is None or name == DECODER_AUTO:
+        if _hasNumpy:
+            return DECODER_NUMPY
+        return DECODER_ARRAY
+    if name == DECODER_NUMPY:
+        if not _hasNumpy:
+            raise Exception(_('ERROR: NumPy decoder requested, but NumPy could not be imported'))
+        return DECODER_NUMPY
+    if name == DECODER_ARRAY:
+        return DECODER_ARRAY
+    raise Exception(_('ERROR: unknown dynamic results decoder: %s') % name)
+
+
+def PeriodSize(nNodes, nLinks):
+    ''' Size in bytes of one reporting period in the dynamic results section '''
+    return 4*(len(NODE_VARIABLES)*nNodes + len(LINK_VARIABLES)*nLinks)
+
+
+def SelectVariables(nodevariables = None, linkvariables = None):
+    ''' Resolve the dynamic results variables to be loaded.
+
+        Args:
+            nodevariables (None, string or list):
+                node variable names as a list or a comma separated string
+                (case is ignored).  None loads all node variables and an
+                empty string or list loads none.
+            linkvariables (None, string or list):
+                link variable names, as for nodevariables
+
+        Returns:
+            (list) names of the selected variables in file order
+
+        Raises:
+            Exception if a name is not one of NODE_VARIABLES or LINK_VARIABLES
+    '''
+    return (_SelectNames(nodevariables, NODE_VARIABLES)
+            + _SelectNames(linkvariables, LINK_VARIABLES))
+
+
+def _SelectNames(names, allowed):
+    if names is None:
+        return list(allowed)
+    if isinstance(names, basestring):
+        names = names.split(',')
+    wanted = []
+    for name in names:
+        name = name.strip()
+        if name == '':
+            continue
+        matches = [a for a in allowed if a.lower() == name.lower()]
+        if len(matches) == 0:
+            raise Exception(_('ERROR: unknown dynamic results variable %(name)s (expected one of %(allowed)s)')
+                    % {'name': name, 'allowed': ', '.join(allowed)})
+        wanted.append(matches[0])
+    return [a for a in allowed if a in wanted]
+
+
+def SelectIDs(ids, allIDs):
+    ''' Resolve node or link IDs to their indexes in the file.
+
+        Args:
+            ids (None, string or list):
+                IDs as a list or a comma separated string.  An item
+                '@FILENAME' names a file listing more IDs (one or more per
+                line, comma separated).  None selects all of them.
+            allIDs (list):  Prolog['NodeID'] or Prolog['LinkID']
+
+        Returns:
+            (list) 0-based indexes of the selected IDs in increasing (file)
+            order, or None if ids is None
+
+        Raises:
+            Exception if an ID is not in allIDs
+    '''
+    if ids is None:
+        return None
+    if isinstance(ids, basestring):
+        ids = ids.split(',')
+    # hash index from ID to position in the file
+    index = dict(zip(allIDs, range(0, len(allIDs))))
+    selected = {}
+    for ID in _ExpandIDs(ids):
+        if ID not in index:
+            raise Exception(_('ERROR: ID %s not found in output file') % ID)
+        selected[index[ID]] = True
+    return sorted(selected.keys())
+
+
+def _ExpandIDs(ids):
+    # strip the IDs, dropping empty ones and replacing @FILENAME items by
+    # the IDs listed in the file
+    expanded = []
+    for ID in ids:
+        ID = ID.strip()
+        if ID.startswith('@'):
+            idfile = open(ID[1:], 'r')
+            for line in idfile:
+                expanded.extend(_ExpandIDs(line.split(',')))
+            idfile.close()
+        elif ID != '':
+            expanded.append(ID)
+    return expanded
+
+
+def Layout(nNodes, nLinks, variables = None, nodes = None, links = None):
+    ''' (name, width) of each selected variable block in a period, in file
+        order.  variables is a list of names (see SelectVariables) or None
+        for all of them and nodes and links are lists of the indexes of the
+        nodes and links selected (see SelectIDs) or None for all of them.
+    '''
+    if nodes is not None:
+        nNodes = len(nodes)
+    if links is not None:
+        nLinks = len(links)
+    return ([(name, nNodes) for name in NODE_VARIABLES
+                if variables is None or name in variables]
+            + [(name, nLinks) for name in LINK_VARIABLES
+                if variables is None or name in variables])
+
+
+def PeriodRuns(nNodes, nLinks, variables = None, nodes = None, links = None):
+    ''' Byte ranges within a period holding the values of the selected
+        nodes and links in the selected variable blocks (see Layout).
+
+        Returns:
+            (list) (offset, size) of each run of adjacent selected values
+    '''
+    runs = []
+    offset = 0
+    for name, width in Layout(nNodes, nLinks):
+        if variables is None or name in variables:
+            if name in NODE_VARIABLES:
+                entities = nodes
+            else:
+                entities = links
+            if entities is None:
+                spans = [(0, width)]
+            else:
+                spans = Consecutive(entities)
+            for first, count in spans:
+                start = offset + 4*first
+                if len(runs) > 0 and runs[-1][0] + runs[-1][1] == start:
+                    runs[-1] = (runs[-1][0], runs[-1][1] + 4*count)
+                else:
+                    runs.append((start, 4*count))
+        offset += 4*width
+    return runs
+
+
+def SelectPeriods(nPeriods, StartTime, ReportTimeStep,
+        timesteps = None, timewindow = None):
+    ''' Resolve the reporting periods to be loaded.
+
+        Args:
+            nPeriods (int):         number of reporting periods in the file
+            StartTime (int):        time of the first reporting period (seconds)
+            ReportTimeStep (int):   time between reporting periods (seconds)
+            timesteps (None, string, slice or int):
+                'START:STOP:STEP' selecting periods as a Python slice
+                (so '-24:' is the last 24 periods) or a single period 'N'
+            timewindow (None, string or tuple):
+                'FROM:TO' or (FROM, TO) selecting the periods reported at
+                times from FROM to TO seconds inclusive (either may be left
+                out or None)
+
+        Returns:
+            (list) the 0-based indexes of the selected periods in increasing
+            order (all of them if both timesteps and timewindow are None)
+
+        Raises:
+            Exception if timesteps or timewindow can't be understood
+    '''
+    periods = range(0, nPeriods)
+    if timesteps is not None:
+        parts = _SplitNumbers(timesteps, 3, _('timesteps'))
+        if len(parts) == 1:
+            if parts[0] is None:
+                parts = [None, None]
+            else:
+                if parts[0] < 0:
+                    parts[0] += nPeriods
+                parts = [parts[0], parts[0] + 1]
+        if len(parts) == 3 and parts[2] is not None and parts[2] <= 0:
+            raise Exception(_('ERROR: timesteps STEP must be greater than 0: %s') % timesteps)
+        periods = periods[slice(*parts)]
+    if timewindow is not None:
+        parts = _SplitNumbers(timewindow, 2, _('time window'))
+        if len(parts) != 2:
+            raise Exception(_('ERROR: time window must be FROM:TO in seconds: %s') % timewindow)
+        tfrom, tto = parts
+        periods = [i for i in periods
+                if (tfrom is None or StartTime + i*ReportTimeStep >= tfrom)
+                and (tto is None or StartTime + i*ReportTimeStep <= tto)]
+    return list(periods)
+
+
+def _SplitNumbers(text, maxparts, what):
+    if isinstance(text, slice):
+        return [text.start, text.stop, text.step]
+    if isinstance(text, int):
+        return [text]
+    if isinstance(text, tuple):
+        text = ':'.join(['' if part is None else str(part) for part in text])
+    parts = text.split(':')
+    if len(parts) > maxparts:
+        raise Exception(_('ERROR: too many parts in %(what)s: %(text)s')
+                % {'what': what, 'text': text})
+    numbers = []
+    for part in parts:
+        part = part.strip()
+        if part == '':
+            numbers.append(None)
+            continue
+        try:
+            numbers.append(int(part))
+        except ValueError:
+            raise Exception(_('ERROR: %(what)s must be whole numbers: %(text)s')
+                    % {'what': what, 'text': text})
+    return numbers
+
+
+def Consecutive(indexes):
+    ''' Group increasing period, node or link indexes into runs of
+        consecutive indexes.
+
+        Returns:
+            (list) (first index, number of indexes) for each run
+    '''
+    groups = []
+    for i in indexes:
+        if len(groups) > 0 and groups[-1][0] + groups[-1][1] == i:
+            groups[-1] = (groups[-1][0], groups[-1][1] + 1)
+        else:
+            groups.append((i, 1))
+    return groups
+
+
+def PeriodsPerChunk(nNodes, nLinks):
+    ''' Number of reporting periods to read at once (always at least 1) '''
+    return max(1, CHUNK_BYTES // max(1, PeriodSize(nNodes, nLinks)))
+
+
+def Chunks(periods, nNodes, nLinks):
+    ''' Divide the selected periods into chunks of consecutive periods to
+        read at once (see PeriodsPerChunk).
+
+        Returns:
+            (list) (first period, number of periods) of each chunk
+    '''
+    chunkperiods = PeriodsPerChunk(nNodes, nLinks)
+    chunks = []
+    for first, count in Consecutive(periods):
+        for i in range(first, first + count, chunkperiods):
+            chunks.append((i, min(chunkperiods, first + count - i)))
+    return chunks
+
+
+def Jobs(jobs):
+    ''' Number of processes to read with for the --jobs option value jobs
+        (0 for one per CPU).  Always 1 if multiprocessing is not available.
+    '''
+    if not _hasMultiprocessing:
+        return 1
+    if jobs == 0:
+        return multiprocessing.cpu_count()
+    return max(1, jobs)
+
+
+def ReadChunks(f, offset, chunks, periodsize, runs, jobs = 1):
+    ''' Read chunks of periods, with a pool of processes if jobs > 1.
+
+        Args:
+            f (file):           EPANET output file; with a pool each process
+                                opens the file again
+            offset (int):       file position of the start of the dynamic results
+            chunks (list):      (first period, number of periods) of each chunk
+                                (see Chunks)
+            periodsize (int):   size in bytes of a period (see PeriodSize)
+            runs (list):        byte ranges to keep from each period (see PeriodRuns)
+            jobs (int):         number of processes to use (see Jobs)
+
+        Returns:
+            generator giving the bytes read for each chunk (see
+            ReadPeriodRuns) in the order of chunks.  Without a pool, f is
+            left positioned at the end of the last chunk.
+    '''
+    if jobs <= 1 or len(chunks) <= 1:
+        for first, n in chunks:
+            f.seek(offset + first*periodsize)
+            yield ReadPeriodRuns(f, n, periodsize, runs)
+        return
+    tasks = [(offset + first*periodsize, n, periodsize, runs)
+            for first, n in chunks]
+    pool = multiprocessing.Pool(min(jobs, len(chunks)), _OpenChunkFile,
+            (f.name,))
+    try:
+        for buf in pool.imap(_ReadChunk, tasks):
+            yield buf
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# the file each ReadChunks worker process reads from
+_chunkfile = None
+
+def _OpenChunkFile(fname):
+    global _chunkfile
+    _chunkfile = open(fname, 'rb')
+
+
+def _ReadChunk(task):
+    offset, nPeriods, periodsize, runs = task
+    _chunkfile.seek(offset)
+    return ReadPeriodRuns(_chunkfile, nPeriods, periodsize, runs)
+
+
+def DecodeFloats(buf, engine):
+    ''' Decode a buffer of little-endian 4-byte floats.
+
+        Args:
+            buf (string):   bytes read from the output file
+            engine (string):DECODER_NUMPY or DECODER_ARRAY (see GetDecoder)
+
+        Returns:
+            numpy float32 array or array('f') of the values in buf
+    '''
+    if engine == DECODER_NUMPY:
+        return numpy.frombuffer(buf, dtype='<f4')
+    return _DecodeArray(buf, 'f')
+
+
+def _DecodeArray(buf, code):
+    values = array(code)
+    if hasattr(values, 'frombytes'):
+        values.frombytes(buf)
+    else:
+        values.fromstring(buf)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def DecodePeriods(buf, nPeriods, layout, engine, compact = False):
+    ''' Decode one or more consecutive dynamic results periods.
+
+        Args:
+            buf (string):   bytes read for nPeriods periods, holding only the
+                            variable blocks in layout (see ReadPeriodRuns)
+            nPeriods (int): number of periods in buf
+            layout (list):  (name, width) of each variable block (see Layout)
+            engine (string):DECODER_NUMPY or DECODER_ARRAY (see GetDecoder)
+            compact (bool): keep array('f') slices rather than lists with
+                            DECODER_ARRAY
+
+        Returns:
+            (list) one dictionary per period keyed by the variable names
+            in layout
+    '''
+    values = DecodeFloats(buf, engine)
+    periods = []
+    pos = 0
+    for i in range(0, nPeriods):
+        TimeStepD = {}
+        for name, width in layout:
+            TimeStepD[name] = _Block(values, pos, width, engine, compact)
+            pos += width
+        periods.append(TimeStepD)
+    return periods
+
+
+def _Block(values, pos, count, engine, compact = False):
+    # NumPy slices are views sharing the chunk buffer, array slices are
+    # converted to lists of floats to match the original reader
+    if engine == DECODER_NUMPY or compact:
+        return values[pos:pos+count]
+    return values[pos:pos+count].tolist()
+
+
+def DecodePrologHeader(buf):
+    ''' Decode the fixed-size start of the prolog (PROLOG_HEADER_SIZE bytes).
+
+        Returns:
+            (dictionary) the prolog values keyed as in EPANETOutputFile.Prolog
+            (source_node_index is made 0-based and the strings have their
+            NUL padding removed)
+    '''
+    d = {}
+    (d['magic'], d['version'], d['nNodes'], d['nResTanks'],
+        d['nLinks'], d['nPumps'], d['nValves'],
+        d['WaterQualityOptNum'], source_node_index,
+        d['FlowUnitsOptNum'], d['PressureUnitsOptNum'],
+        d['TimeStatsOptNum'], d['StartTime'], d['ReportTimeStep'],
+        d['SimulationDuration'], Title1, Title2, Title3, InputFile,
+        ReportFile, ChemicalName, ChemicalConcentrationUnits) = \
+            PROLOG_HEADER.unpack(buf)
+    d['nJunctions'] = d['nNodes'] - d['nResTanks']
+    d['nPipes'] = d['nLinks'] - d['nPumps'] - d['nValves']
+    # make source node index 0-based
+    d['source_node_index'] = source_node_index - 1
+    d['Title1'] = Title1.strip('\0')
+    d['Title2'] = Title2.strip('\0')
+    d['Title3'] = Title3.strip('\0')
+    d['InputFile'] = InputFile.strip('\0')
+    d['ReportFile'] = ReportFile.strip('\0')
+    d['ChemicalName'] = ChemicalName.strip('\0')
+    d['ChemicalConcentrationUnits'] = ChemicalConcentrationUnits.strip('\0')
+    return d
+
+
+def DecodeEpilog(buf):
+    ''' Decode the epilog (EPILOG_SIZE bytes).
+
+        Returns:
+            (dictionary) the epilog values keyed as in EPANETOutputFile.Epilog
+    '''
+    d = {}
+    (d['AveBulkReactionRate'], d['AveWallReactionRate'],
+        d['AveTankReactionRate'], d['AveSourceInflowRate'],
+        d['nPeriods'], d['WarningFlag'], d['magic']) = EPILOG.unpack(buf)
+    return d
+
+
+def FileLayout(nNodes, nLinks, nResTanks, nPumps, nPeriods):
+    ''' Offset and size in bytes of each section of an output file.
+
+        Returns:
+            (dictionary) with PrologOffset, PrologSize, EnergyUseOffset,
+            EnergyUseSize, DynamicResultsOffset, DynamicResultsSize,
+            EpilogOffset, EpilogSize and the total FileSize
+    '''
+    d = {}
+    d['PrologOffset'] = 0
+    d['PrologSize'] = (PROLOG_HEADER_SIZE + (ID_SIZE+4)*nNodes
+            + (ID_SIZE+20)*nLinks + 8*nResTanks)
+    d['EnergyUseOffset'] = d['PrologOffset'] + d['PrologSize']
+    d['EnergyUseSize'] = 28*nPumps + 4
+    d['DynamicResultsOffset'] = d['EnergyUseOffset'] + d['EnergyUseSize']
+    d['DynamicResultsSize'] = PeriodSize(nNodes, nLinks)*nPeriods
+    d['EpilogOffset'] = d['DynamicResultsOffset'] + d['DynamicResultsSize']
+    d['EpilogSize'] = EPILOG_SIZE
+    d['FileSize'] = d['EpilogOffset'] + d['EpilogSize']
+    return d
+
+
+def ReadHeader(f, filesize):
+    ''' Read the fixed prolog values and the epilog of an output file with
+        two reads and check the file layout they describe.
+
+        The arrays in the prolog and the energy use and dynamic results
+        sections are not read.
+
+        Args:
+            f (file):       output file opened for binary reading
+            filesize (int): size of the file in bytes
+
+        Returns:
+            (prolog, epilog, layout) dictionaries from DecodePrologHeader,
+            DecodeEpilog and FileLayout
+
+        Raises:
+            Exception if the magic numbers don't match or the file is not
+            the size the prolog and epilog say it should be
+    '''
+    if filesize < PROLOG_HEADER_SIZE + EPILOG_SIZE:
+        raise Exception(_('ERROR: file is too short to be an EPANET output file'))
+    f.seek(0)
+    prolog = DecodePrologHeader(ReadBytes(f, PROLOG_HEADER_SIZE))
+    f.seek(-EPILOG_SIZE, 2)
+    epilog = DecodeEpilog(ReadBytes(f, EPILOG_SIZE))
+    if prolog['magic'] != epilog['magic']:
+        print(_('ERROR: magic number in prolog (%(prologmagic)d) does not match magic number in epilog (%(epilogmagic)d)') % {'prologmagic': prolog['magic'], 'epilogmagic': epilog['magic']})
+        raise Exception(_('ERROR: magic numbers do not match: probably not an EPANET output file'))
+    layout = FileLayout(prolog['nNodes'], prolog['nLinks'],
+            prolog['nResTanks'], prolog['nPumps'], epilog['nPeriods'])
+    if layout['FileSize'] != filesize:
+        raise Exception(_('ERROR: file size (%(filesize)d) does not match the size calculated from the prolog and epilog (%(layoutsize)d): probably not an EPANET 2.00.12 output file')
+                % {'filesize': filesize, 'layoutsize': layout['FileSize']})
+    return (prolog, epilog, layout)
+
+
+def ReadFileHeader(fname):
+    ''' Summarise an output file without reading its sections: open it,
+        ReadHeader() and close it again.
+
+        Returns:
+            (prolog, epilog, layout) as for ReadHeader
+    '''
+    f = open(fname, 'rb')
+    try:
+        return ReadHeader(f, os.fstat(f.fileno()).st_size)
+    finally:
+        f.close()
+
+
+def ReadPeriodRuns(f, nPeriods, periodsize, runs):
+    ''' Read the selected variable blocks of consecutive periods.
+
+        Args:
+            f (file):           file positioned at the start of a period
+            nPeriods (int):     number of periods to read
+            periodsize (int):   size in bytes of a period (see PeriodSize)
+            runs (list):        byte ranges to keep from each period (see PeriodRuns)
+
+        Returns:
+            (string) the runs from each period, one after another.  The
+            file is left positioned at the end of the last period.
+    '''
+    if runs == [(0, periodsize)]:
+        return ReadBytes(f, nPeriods*periodsize)
+    if len(runs) == 0:
+        f.seek(nPeriods*periodsize, 1)
+        return b''
+    # the largest unwanted gap between runs, including the gap from the
+    # end of one period to the first run of the next
+    gaps = [runs[0][0] + periodsize - (runs[-1][0] + runs[-1][1])]
+    for k in range(1, len(runs)):
+        gaps.append(runs[k][0] - (runs[k-1][0] + runs[k-1][1]))
+    parts = []
+    if max(gaps) < SEEK_BYTES:
+        buf = ReadBytes(f, nPeriods*periodsize)
+        for i in range(0, nPeriods):
+            for offset, size in runs:
+                start = i*periodsize + offset
+                parts.append(buf[start:start+size])
+    else:
+        first = f.tell()
+        for i in range(0, nPeriods):
+            for offset, size in runs:
+                f.seek(first + i*periodsize + offset)
+                parts.append(ReadBytes(f, size))
+        f.seek(first + nPeriods*periodsize)
+    return b''.join(parts)
+
+
+def ReadPeriodInto(f, buf, periodsize, runs):
+    ''' Read the selected variable blocks of one period into buf.
+
+        Unlike ReadPeriodRuns no new string is created, so the same buffer
+        can be reused for every period.
+
+        Args:
+            f (file):           file positioned at the start of a period
+            buf (bytearray):    buffer the size of the runs to read into
+            periodsize (int):   size in bytes of a period (see PeriodSize)
+            runs (list):        byte ranges to keep from the period (see PeriodRuns)
+
+        Raises:
+            Exception if the end of the file is reached first.  Otherwise
+            the file is left positioned at the end of the period.
+    '''
+    view = memoryview(buf)
+    pos = 0
+    at = 0
+    for offset, size in runs:
+        if offset != at:
+            f.seek(offset - at, 1)
+        if f.readinto(view[pos:pos+size]) != size:
+            raise Exception(_('ERROR: unexpected end of file: probably not a complete EPANET output file'))
+        pos += size
+        at = offset + size
+    if at != periodsize:
+        f.seek(periodsize - at, 1)
+
+
+def ReadBytes(f, count):
+    ''' Read exactly count bytes from f.
+
+        Raises:
+            Exception if the end of the file is reached first
+    '''
+    buf = f.read(count)
+    if len(buf) != count:
+        raise Exception(_('ERROR: unexpected end of file: probably not a complete EPANET output file'))
+    return buf
+
+
+def ArrayStruct(code, count):
+    ''' Return a precompiled struct.Struct for count little-endian values
+        of struct type code (eg. 'i' or 'f').
+    '''
+    return _Struct('<%d%s' % (count, code))
+
+
+def EnergyUseStruct(nPumps):
+    ''' Return a precompiled struct.Struct for the energy usage section:
+        for each pump an integer index and 6 floats, then the peak energy
+        usage float.
+    '''
+    return _Struct('<' + 'i6f'*nPumps + 'f')
+
+
+def _Struct(fmt):
+    # precompiled struct.Struct for fmt from the least recently used cache
+    s = _structs.pop(fmt, None)
+    if s is None:
+        s = struct.Struct(fmt)
+        if len(_structs) >= STRUCTS_MAX:
+            try:
+                _structs.popitem(last = False)
+            except KeyError:
+                # emptied by another thread (see EOFTExport)
+                pass
+    _structs[fmt] = s
+    return s
+
+
+def ReadInts(f, count, compact = False):
+    ''' Read count 4-byte integers from f with one read.
+        Returns a list, or an array of 4-byte integers if compact.
+    '''
+    if compact:
+        return _DecodeArray(ReadBytes(f, 4*count), _INT_CODE)
+    return list(ArrayStruct('i', count).unpack(ReadBytes(f, 4*count)))
+
+
+def ReadFloats(f, count, compact = False):
+    ''' Read count 4-byte floats from f with one read.
+        Returns a list, or an array('f') if compact.
+    '''
+    if compact:
+        return _DecodeArray(ReadBytes(f, 4*count), 'f')
+    return list(ArrayStruct('f', count).unpack(ReadBytes(f, 4*count)))
+
+
+def Ints(values, compact = False):
+    ''' Return a list of the integers in values, or an array of 4-byte
+        integers if compact.
+    '''
+    if compact:
+        return array(_INT_CODE, values)
+    return list(values)
+
+
+def ReadIDs(f, count):
+    ''' Read count fixed-size ID strings from f with one read.
+        Returns a list of the IDs with the NUL padding removed.
+    '''
+    buf = ReadBytes(f, ID_SIZE*count)
+    return [buf[k:k+ID_SIZE].strip('\0')
+            for k in range(0, ID_SIZE*count, ID_SIZE)]
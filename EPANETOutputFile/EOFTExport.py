@@ -0,0 +1,187 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool concurrent export of CSVs
+#
+# Each CSV is an independent task (see ExportPool.Submit).  With more than
+# one job (--export_jobs), the tasks run in a pool of worker processes as
+# soon as their section has been read, so the CSVs are written at the same
+# time as each other and as the rest of the file is read.  Closing the file
+# waits for them all (see ExportPool.Wait).
+#
+# With --export_threads the pool is of threads instead of processes, for the
+# GUI, which must not start processes.  The threads share the interpreter,
+# so they mostly overlap writing and compressing the CSVs (and decoding with
+# NumPy) rather than formatting them.
+#
+# The dynamic results CSVs are not passed to the workers: each task reads
+# its timesteps from the output file again (see WriteTimeStepShard).  With
+# --shard_timesteps they are also split into pieces of that many timesteps,
+# each a separate task, which are joined in order into the CSV or, with
+# --shard_files, kept as separate CSVs named by ShardName.  Joined pieces of
+# a compressed CSV are one compressed stream after another, which gzip,
+# bzip2 and xz all read as a single file.
+#
+
+import os
+import shutil
+
+import EOFTCompress
+import EOFTCsv
+import EOFTDecoder
+import EOFTResults
+
+if EOFTDecoder._hasMultiprocessing:
+    import multiprocessing
+    import multiprocessing.pool
+
+
+def ShardName(csvname, label):
+    ''' Name of the piece label of CSV csvname: label is put before its
+        extension and compression suffix (eg. Net3_dnode.0001.csv.gz).
+    '''
+    suffix = ''
+    if EOFTCompress.Compression(csvname) is not None:
+        root, suffix = os.path.splitext(csvname)
+        csvname = root
+    root, ext = os.path.splitext(csvname)
+    return '%s.%s%s%s' % (root, label, ext, suffix)
+
+
+def Shards(periods, size = None):
+    ''' periods split into lists of size periods (the last may be shorter),
+        or all of them in one list if size is None.
+    '''
+    if size is None or len(periods) == 0:
+        return [list(periods)]
+    return [list(periods[k:k+size]) for k in range(0, len(periods), size)]
+
+
+def Concatenate(fname, parts):
+    ''' Join the files parts in order into fname and remove them.  No
+        return value.
+    '''
+    f = open(fname, 'wb')
+    try:
+        for part in parts:
+            partf = open(part, 'rb')
+            try:
+                shutil.copyfileobj(partf, f, EOFTCsv.CSV_BUFFER)
+            finally:
+                partf.close()
+    finally:
+        f.close()
+    for part in parts:
+        os.remove(part)
+
+
+def WriteCSV(csvname, level, threaded, writer, args):
+    '''Task: write a CSV with one of the EOFTCsv writers.  No return value.
+
+    Args:
+        csvname (string):   name of the CSV (see EOFTCsv.Open)
+        level (int):        compression level or None (see EOFTCompress.Open)
+        threaded (bool):    compress in a background thread
+        writer (string):    name of the EOFTCsv function to call as
+                            writer(csvf, *args)
+        args (tuple):       the rest of the writer's arguments
+    '''
+    csvf = EOFTCsv.Open(csvname, level, threaded)
+    try:
+        getattr(EOFTCsv, writer)(csvf, *args)
+    finally:
+        csvf.close()
+
+
+def WriteTimeStepShard(csvname, level, threaded, source, heading, ids,
+        names, periods, nodes, links, StartTime, ReportTimeStep,
+        precision = None):
+    '''Task: write timesteps of a dynamic results CSV, reading them from the
+    output file.  No return value.
+
+    Args:
+        csvname (string):       name of the CSV (see EOFTCsv.Open)
+        level (int):            compression level or None (see EOFTCompress.Open)
+        threaded (bool):        compress in a background thread
+        source (tuple):         (name of the output file, offset of its
+                                dynamic results, nPeriods, nNodes, nLinks,
+                                decoder) (see EOFTResults.PeriodStream)
+        heading (string):       first line of the CSV or None to leave it out
+        ids (list):             ID of the node or link in each row
+        names (list):           names of the variables in the columns
+        periods (list):         timesteps in the file to write
+        nodes (list):           indexes of the nodes in the rows, or []
+        links (list):           indexes of the links in the rows, or []
+        StartTime (int):        time (seconds) of timestep 0
+        ReportTimeStep (int):   seconds between timesteps
+        precision (int):        decimal places (see EOFTCsv.FloatFormat)
+    '''
+    fname, offset, nPeriods, nNodes, nLinks, decoder = source
+    f = open(fname, 'rb')
+    try:
+        stream = EOFTResults.PeriodStream(f, offset, nPeriods, nNodes,
+                nLinks, decoder, names, periods, nodes, links)
+        csvf = EOFTCsv.Open(csvname, level, threaded)
+        try:
+            EOFTCsv.WriteTimeStepRows(csvf, heading, ids, names,
+                    # the stream reuses TimeStepD, so one at a time
+                    ((periods[i], d) for i, d in stream), StartTime,
+                    ReportTimeStep, precision)
+        finally:
+            csvf.close()
+    finally:
+        f.close()
+
+
+class ExportPool(object):
+    ''' Runs export tasks in jobs worker processes (or threads if threads),
+        or at once (in this process) if jobs is 1 or multiprocessing is not
+        available.
+    '''
+
+    def __init__(self, jobs = 1, threads = False):
+        self.jobs = jobs
+        if not EOFTDecoder._hasMultiprocessing:
+            self.jobs = 1
+        self.threads = threads
+        self.pool = None
+        self.pending = []
+        self.joins = []
+
+    def Submit(self, task, *args):
+        ''' Run task(*args) (one of the task functions above) '''
+        if self.jobs == 1:
+            task(*args)
+            return
+        if self.pool is None:
+            if self.threads:
+                self.pool = multiprocessing.pool.ThreadPool(self.jobs)
+            else:
+                self.pool = multiprocessing.Pool(self.jobs)
+        self.pending.append(self.pool.apply_async(task, args))
+
+    def Concatenate(self, fname, parts):
+        ''' Join the files parts into fname once their tasks have finished
+            (see Concatenate).
+        '''
+        self.joins.append((fname, parts))
+
+    def Wait(self):
+        ''' Wait for the tasks submitted to finish and join the files
+            waiting for them.  No return value.
+
+            Raises:
+                the exception of the first task which failed
+        '''
+        try:
+            for result in self.pending:
+                result.get()
+        finally:
+            self.pending = []
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+        joins = self.joins
+        self.joins = []
+        for fname, parts in joins:
+            Concatenate(fname, parts)
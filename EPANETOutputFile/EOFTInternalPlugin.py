@@ -3,6 +3,14 @@
 # EPANET Output File Tool Internal Plugin which reads EPANET 2.00.12 Output File
 #
 import EPANETOutputFilePlugin
+import EOFTCache
+import EOFTCsv
+import EOFTDecoder
+import EOFTExport
+import EOFTNpy
+import EOFTResults
+import EOFTSqlite
+import os
 import struct
 import gettext
 
@@ -13,6 +21,8 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         # since this is an internal plugin, we don't need to do this.
         self.parser = None
         self.options = None
+        # pool writing the CSVs (see ExportPool)
+        self.exports = None
         pass
 
     def Test(self, eof):
@@ -56,9 +66,121 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
             action='store', type='string', dest = 'dynamic_link_csv',
             metavar = 'DYNAMIC_LINK_CSV',
             help=_('write CSV for links from dynamic results to DYNAMIC_LINK_CSV'))
+        parser.add_option('--wide_csv',
+            action='append', type='string', dest = 'wide_csv',
+            metavar = 'VARIABLE=WIDE_CSV',
+            help=_('write CSV WIDE_CSV of dynamic results VARIABLE (eg. NodePressure=pressure.csv) with a row for each timestep and a column for each node or link; can be given more than once'))
+        parser.add_option('--npy_dir',
+            action='store', type='string', dest = 'npy_dir',
+            metavar = 'NPY_DIR',
+            help=_('write each dynamic results variable to NPY_DIR/VARIABLE.npy (4-byte floats, timesteps x nodes or links) with NPY_DIR/manifest.json describing them'))
+        parser.add_option('--sqlite',
+            action='store', type='string', dest = 'sqlite',
+            metavar = 'DB',
+            help=_('write the prolog, energy use, epilog and dynamic results to tables in SQLite database DB (replaced if it exists)'))
+        parser.add_option('--csv_precision',
+            action='store', type='int', dest = 'csv_precision',
+            metavar = 'DIGITS',
+            help=_('write the numbers in CSVs with DIGITS decimal places (default 6)'))
+        parser.add_option('-o','--output',
+            action='store', type='string', dest = 'output',
+            metavar = 'OUTPUT',
+            help=_('write what is displayed to OUTPUT instead of the standard output (compressed if OUTPUT ends in .gz, .bz2 or .xz)'))
+        parser.add_option('--compress_level',
+            action='store', type='int', dest = 'compress_level',
+            metavar = 'LEVEL',
+            help=_('compression LEVEL of the CSVs and OUTPUT written compressed because their names end in .gz, .bz2 or .xz (1-9 for .gz and .bz2, default 9; 0-9 for .xz, default 6)'))
+        parser.add_option('--compress_thread',
+            action='store_true', dest = 'compress_thread', default=False,
+            help=_('compress the CSVs and OUTPUT in a background thread while the text is formatted'))
+        parser.add_option('--export_jobs',
+            action='store', type='int', dest = 'export_jobs', default=1,
+            metavar = 'JOBS',
+            help=_('write the CSVs at the same time with JOBS processes (default 1, 0 for one per CPU)'))
+        parser.add_option('--export_threads',
+            action='store_true', dest = 'export_threads', default=False,
+            help=_('with --export_jobs, write the CSVs with threads instead of processes (as the GUI does, which must not start processes)'))
+        parser.add_option('--shard_timesteps',
+            action='store', type='int', dest = 'shard_timesteps',
+            metavar = 'TIMESTEPS',
+            help=_('write the dynamic results CSVs in pieces of TIMESTEPS timesteps, each by its own process with --export_jobs, which are joined in order'))
+        parser.add_option('--shard_files',
+            action='store_true', dest = 'shard_files', default=False,
+            help=_('keep the pieces of the dynamic results CSVs as separate CSVs, named by adding the piece number before .csv (eg. NODES.0000.csv)'))
         parser.add_option('-c','--coda', '--epilog',
             action='store_true', dest = 'epilog', default=False,
             help=_('display file epilog'))
+        parser.add_option('--decoder',
+            action='store', type='choice', dest = 'decoder',
+            choices = EOFTDecoder.DECODERS, default = EOFTDecoder.DECODER_AUTO,
+            metavar = 'DECODER',
+            help=_('decode dynamic results using DECODER (auto, numpy or array)'))
+        parser.add_option('--mmap',
+            action='store_true', dest = 'mmap', default=False,
+            help=_('memory map dynamic results and only decode timesteps when used'))
+        parser.add_option('--jobs',
+            action='store', type='int', dest = 'jobs', default=1,
+            metavar = 'JOBS',
+            help=_('read the dynamic results with JOBS processes (default 1, 0 for one per CPU)'))
+        parser.add_option('--compact',
+            action='store_true', dest = 'compact', default=False,
+            help=_('keep prolog arrays and dynamic results as arrays of 4-byte values instead of lists of Python numbers to use less memory'))
+        parser.add_option('--cache',
+            action='store_true', dest = 'cache', default=False,
+            help=_('keep the decoded file in a cache file next to it (FILENAME.eoftc) and load it from there when it has not changed'))
+        parser.add_option('--cache_dir',
+            action='store', type='string', dest = 'cache_dir',
+            metavar = 'CACHE_DIR',
+            help=_('like --cache, but keep the cache files in CACHE_DIR'))
+        parser.add_option('--cache_size',
+            action='store', type='int', dest = 'cache_size',
+            metavar = 'CACHE_MB',
+            help=_('limit the cache files in CACHE_DIR to CACHE_MB megabytes in total, removing the least recently used'))
+        parser.add_option('--stream',
+            action='store_true', dest = 'stream', default=False,
+            help=_('pass each dynamic results timestep to the plugins and the dynamic results CSVs as it is read without keeping them, so memory use does not depend on the number of timesteps (dynamic results cannot then be displayed or exported except as CSVs; used from the command line whenever CSVs are the only dynamic results output)'))
+        parser.add_option('--node_variables',
+            action='store', type='string', dest = 'node_variables',
+            metavar = 'NODE_VARIABLES',
+            help=_('only read the comma separated NODE_VARIABLES from the dynamic results (default all of NodeDemand, NodeHead, NodePressure, NodeWaterQuality)'))
+        parser.add_option('--link_variables',
+            action='store', type='string', dest = 'link_variables',
+            metavar = 'LINK_VARIABLES',
+            help=_('only read the comma separated LINK_VARIABLES from the dynamic results (default all of LinkFlow, LinkVelocity, LinkHeadloss, LinkAveWaterQuality, LinkStatus, LinkSetting, LinkReactionRate, LinkFrictionFactor)'))
+        parser.add_option('--timesteps',
+            action='store', type='string', dest = 'timesteps',
+            metavar = 'START:STOP:STEP',
+            help=_('only read dynamic results timesteps START:STOP:STEP (0-based, as a Python slice so -24: is the last 24 timesteps)'))
+        parser.add_option('--time_window',
+            action='store', type='string', dest = 'time_window',
+            metavar = 'FROM:TO',
+            help=_('only read dynamic results reported from FROM to TO seconds inclusive'))
+        parser.add_option('-i','--node_ids',
+            action='store', type='string', dest = 'node_ids',
+            metavar = 'NODE_IDS',
+            help=_('only read dynamic results for the comma separated NODE_IDS (or @FILENAME to read the IDs from a file)'))
+        parser.add_option('-I','--link_ids',
+            action='store', type='string', dest = 'link_ids',
+            metavar = 'LINK_IDS',
+            help=_('only read dynamic results for the comma separated LINK_IDS (or @FILENAME to read the IDs from a file)'))
+        parser.add_option('--header_only',
+            action='store_true', dest = 'header_only', default=False,
+            help=_('only read the prolog counts and epilog, check the file size and display a summary of the file sections'))
+
+    def WideCSVs(self, options):
+        '''The (variable, csvname) of each of the --wide_csv options.
+
+        Raises:
+            Exception if one is not VARIABLE=WIDE_CSV
+        '''
+        wides = []
+        for wide in options.wide_csv or []:
+            name, sep, csvname = wide.partition('=')
+            if (sep == '' or csvname == '' or name not in
+                    EOFTDecoder.NODE_VARIABLES + EOFTDecoder.LINK_VARIABLES):
+                raise Exception(_('ERROR: --wide_csv must be VARIABLE=WIDE_CSV where VARIABLE is a node or link variable: %s') % wide)
+            wides.append((name, csvname))
+        return wides
 
     def FileInit(self, eof, options):
         #print("InternalPlugin:FileInit(%s, %s)" % (eof, options))
@@ -72,7 +194,10 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
                 and options.prolog_link_csv is None
                 and options.energy_use_csv is None
                 and options.dynamic_node_csv is None
-                and options.dynamic_link_csv is None):
+                and options.dynamic_link_csv is None
+                and options.npy_dir is None
+                and options.sqlite is None
+                and options.wide_csv is None):
             if options.silent == False: options.all = True
         # 'silent' wins over all printing except errors....
         if options.silent == True: options.prolog = False
@@ -80,6 +205,22 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         if options.silent == True: options.dynamic_results = False
         if options.silent == True: options.epilog = False
         if options.silent == True: options.verbose = False
+        if options.jobs < 0:
+            raise Exception(_('ERROR: --jobs must be 0 or more'))
+        if options.export_jobs < 0:
+            raise Exception(_('ERROR: --export_jobs must be 0 or more'))
+        if options.shard_timesteps is not None and options.shard_timesteps < 1:
+            raise Exception(_('ERROR: --shard_timesteps must be 1 or more'))
+        self.wide = self.WideCSVs(options)
+        if options.csv_precision is not None and options.csv_precision < 0:
+            raise Exception(_('ERROR: --csv_precision must be 0 or more'))
+        if (options.compress_level is not None
+                and (options.compress_level < 0 or options.compress_level > 9)):
+            raise Exception(_('ERROR: --compress_level must be from 0 to 9'))
+        if options.stream and (options.dynamic_results
+                or options.npy_dir is not None
+                or options.sqlite is not None):
+            raise Exception(_('ERROR: dynamic results are not kept with --stream so cannot be displayed or exported except as CSVs'))
         if options.verbose:
             if options.prolog == True:
                 print(_("User requested display of file prolog section"))
@@ -97,6 +238,13 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
                 print(_("User requested writing of dynamic node info as CSV to: %s") % options.dynamic_node_csv)
             if options.dynamic_link_csv is not None:
                 print(_("User requested writing of dynamic link info as CSV to: %s") % options.dynamic_link_csv)
+            for name, csvname in self.wide:
+                print(_("User requested writing of dynamic %(variable)s as wide CSV to: %(csv)s")
+                        % {'variable': name, 'csv': csvname})
+            if options.npy_dir is not None:
+                print(_("User requested writing of dynamic results as .npy files to: %s") % options.npy_dir)
+            if options.sqlite is not None:
+                print(_("User requested writing of all file sections to SQLite database: %s") % options.sqlite)
             if options.epilog == True:
                 print(_("User requested display of file epilog section"))
             if options.all == True:
@@ -114,22 +262,76 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
 
         '''
         #print("InternalPlugin:FileOpen(%s)" % eof)
-        # read some info from end first to verify file type
         if progupdate is not None: progupdate(5,_('Verifying file type...'))
-        # read some info from end first
-        eof.f.seek(-12,2)
-        eof.Epilog['nPeriods'], = struct.unpack('<i', eof.f.read(4))
-        eof.Epilog['WarningFlag'], = struct.unpack('<i', eof.f.read(4))
-        eof.Epilog['magic'], = magicend, = struct.unpack('<i', eof.f.read(4))
-
-        eof.f.seek(0)
-        eof.Prolog['magic'], = magicstart, = struct.unpack('<i', eof.f.read(4))
-        if magicstart != magicend:
-            print(_('ERROR: magic number in prolog (%(prologmagic)d) does not match magic number in epilog (%(epilogmagic)d)') % {'prologmagic': magicstart, 'epilogmagic': magicend})
-            raise Exception(_('ERROR: magic numbers do not match: probably not an EPANET output file'))
+        # read the fixed prolog values and the epilog, check the magic
+        # numbers match and the file is the size they say it should be
+        prolog, epilog, eof.Layout = EOFTDecoder.ReadHeader(eof.f,
+                os.fstat(eof.f.fileno()).st_size)
+        eof.Epilog.update(epilog)
+        # keep the fixed prolog values (counts, options, times and titles)
+        # so plugins can use them before the prolog is read
+        eof.Prolog.update(prolog)
+        eof.Prolog['WaterQualityOption'] = eof.getWaterQualityOptionText(prolog['WaterQualityOptNum'])
+        eof.Prolog['FlowUnitsOption'] = eof.getFlowUnitsOptionText(prolog['FlowUnitsOptNum'])
+        eof.Prolog['PressureUnitsOption'] = eof.getPressureUnitsOptionText(prolog['PressureUnitsOptNum'])
+        eof.Prolog['TimeStatsOption'] = eof.getTimeStatsOption(prolog['TimeStatsOptNum'])
+        if eof.options.header_only and not eof.options.silent:
+            self.PrintHeader(eof.Prolog, eof.Epilog, eof.Layout)
+        elif eof.options.cache or eof.options.cache_dir is not None:
+            eof.CachePath = EOFTCache.CachePath(eof.fname,
+                    eof.options.cache_dir)
+            eof.Cache = EOFTCache.Load(eof.fname, eof.CachePath)
+            if eof.options.verbose:
+                if eof.Cache is not None:
+                    print(_('Loading from cache file %s') % eof.CachePath)
+                else:
+                    print(_('No valid cache file %s') % eof.CachePath)
         if progupdate is not None: progupdate(100,_('Verified file type.'))
 
 
+    def PrintHeader(self, prolog, epilog, layout):
+        '''Print the summary of an EPANET output file read by --header_only.
+        No return value.
+
+        Args:
+            prolog (dictionary):    fixed prolog values (no node or link arrays)
+            epilog (dictionary):    epilog values
+            layout (dictionary):    section offsets and sizes (see EOFTDecoder.FileLayout)
+
+        '''
+        print("")
+        headingtext = _("Header")
+        print(headingtext)
+        print('='*len(headingtext))
+        print(_('EPANET Version: %d') % prolog['version'])
+        print(_('Problem Title1: %s') % prolog['Title1'])
+        print(_('Number of Nodes: %d') % prolog['nNodes'])
+        print(_('Number of Reservoirs and Tanks: %d') % prolog['nResTanks'])
+        print(_('Number of Links: %d') % prolog['nLinks'])
+        print(_('Number of Pumps: %d') % prolog['nPumps'])
+        print(_('Number of Valves: %d') % prolog['nValves'])
+        print(_('Water Quality Option: %(optnum)d (%(opttext)s)') % {'optnum': prolog['WaterQualityOptNum'], 'opttext': prolog['WaterQualityOption']})
+        print(_('Flow Units Option: %(optnum)d (%(opttext)s)') % {'optnum': prolog['FlowUnitsOptNum'], 'opttext': prolog['FlowUnitsOption']})
+        print(_('Reporting Start Time: %d') % prolog['StartTime'])
+        print(_('Reporting Time Step: %d') % prolog['ReportTimeStep'])
+        print(_('Simulation Duration: %d') % prolog['SimulationDuration'])
+        print(_("Number of reporting periods: %d") % epilog['nPeriods'])
+        if epilog['WarningFlag'] == 0:
+            print(_('Analysis generated no errors or warnings'))
+        else:
+            print(_('Analysis generated warning(s)'))
+        for name, text in [
+                ('Prolog', _('Prolog')),
+                ('EnergyUse', _('Energy Use')),
+                ('DynamicResults', _('Dynamic Results')),
+                ('Epilog', _('Epilog'))]:
+            print(_('%(section)s: offset %(offset)d, size %(size)d') % {
+                'section': text, 'offset': layout[name + 'Offset'],
+                'size': layout[name + 'Size']})
+        print(_('File size: %d') % layout['FileSize'])
+        print("")
+
+
     def ReadProlog(self, eof, f, d, magicend, progupdate):
         '''Read prolog from EPANET output file.  No return value.
 
@@ -143,116 +345,76 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
 
         '''
 
-        if progupdate is not None: progupdate(5,_('Reading prolog info'))
-        d['magic'], = struct.unpack('<i', f.read(4))
+        # progress is the part of the prolog read
+        size = float(eof.Layout['PrologSize'])
+        if progupdate is not None: progupdate(0,_('Reading prolog info'))
+        d.update(EOFTDecoder.DecodePrologHeader(
+                EOFTDecoder.ReadBytes(f, EOFTDecoder.PROLOG_HEADER_SIZE)))
         if d['magic'] != magicend:
             print(_('ERROR: magic number in prolog (%(prologmagic)d) does not match magic number in epilog (%(epilogmagic)d)') % {'prologmagic': d['magic'], 'epilogmagic': magicend})
             raise Exception(_('ERROR: magic numbers do not match: probably not an EPANET output file'))
-        d['version'], = struct.unpack('<i', f.read(4))
-        d['nNodes'], = struct.unpack('<i', f.read(4))
-        d['nResTanks'], = struct.unpack('<i', f.read(4))
-        d['nJunctions'] = d['nNodes'] - d['nResTanks']
-        d['nLinks'], = struct.unpack('<i', f.read(4))
-        d['nPumps'], = struct.unpack('<i', f.read(4))
-        d['nValves'], = struct.unpack('<i', f.read(4))
-        d['nPipes'] = d['nLinks'] - d['nPumps'] - d['nValves']
-        d['WaterQualityOptNum'], = struct.unpack('<i', f.read(4))
         d['WaterQualityOption'] = eof.getWaterQualityOptionText(d['WaterQualityOptNum'])
-        # read source node index and make it 0-based
-        d['source_node_index'] = struct.unpack('<i', f.read(4))[0] - 1
-        d['FlowUnitsOptNum'], = struct.unpack('<i', f.read(4))
         d['FlowUnitsOption'] = eof.getFlowUnitsOptionText(d['FlowUnitsOptNum'])
-        d['PressureUnitsOptNum'], = struct.unpack('<i', f.read(4))
         d['PressureUnitsOption'] = eof.getPressureUnitsOptionText(d['PressureUnitsOptNum'])
-        d['TimeStatsOptNum'], = struct.unpack('<i', f.read(4))
         d['TimeStatsOption'] = eof.getTimeStatsOption(d['TimeStatsOptNum'])
-        d['StartTime'], = struct.unpack('<i', f.read(4))
-        d['ReportTimeStep'], = struct.unpack('<i', f.read(4))
-        d['SimulationDuration'], = struct.unpack('<i', f.read(4))
-        d['Title1'] = f.read(80).strip('\0')
-        d['Title2'] = f.read(80).strip('\0')
-        d['Title3'] = f.read(80).strip('\0')
-        d['InputFile'] =  f.read(260).strip('\0')
-        d['ReportFile'] =  f.read(260).strip('\0')
-        d['ChemicalName'] =  f.read(32).strip('\0')
-        d['ChemicalConcentrationUnits'] =  f.read(32).strip('\0')
-        d['NodeID'] = []
-        d['NodeElev'] = []
-        d['NodeTankResIndex'] = []
-        if progupdate is not None: progupdate(20,_('Reading prolog node info'))
+
+        # each of the following arrays is read with a single read
+        # (and with --compact, kept as an array of 4-byte values)
+        compact = eof.options.compact
+        if progupdate is not None: progupdate(int(100*f.tell()/size),_('Reading prolog node info'))
         if eof.options.verbose:
             print(_('Reading Node IDs (%(nNodes)d)...') % {'nNodes': d['nNodes']})
-        for i in range (0, d['nNodes']):
-            d['NodeID'].append(f.read(32).strip('\0'))
-            #print('  Node %d ID: %s' % (i, NodeID[i]))
-            d['NodeTankResIndex'].append(-1)
-
-        d['LinkID'] = []
-        d['LinkStart'] = []
-        d['LinkEnd'] = []
-        d['LinkType'] = []
-        d['LinkLength'] = []
-        d['LinkDiam'] = []
-
-        if progupdate is not None: progupdate(50,_('Reading prolog link info'))
+        d['NodeID'] = EOFTDecoder.ReadIDs(f, d['nNodes'])
+        d['NodeTankResIndex'] = EOFTDecoder.Ints([-1] * d['nNodes'], compact)
+
+        if progupdate is not None: progupdate(int(100*f.tell()/size),_('Reading prolog link info'))
         if eof.options.verbose:
             print(_('Reading Link IDs (%(nLinks)d)...') % {'nLinks': d['nLinks']})
-        for i in range (0, d['nLinks']):
-            d['LinkID'].append(f.read(32).strip('\0'))
-            #print('  Link %d ID: %s' % (i, d['LinkID[i]))
-        for i in range (0, d['nLinks']):
-            d['LinkStart'].append(struct.unpack('<i', f.read(4))[0]-1)
-            #print('  LinkStart %d ID: %d (0-based)' % (i, LinkStart[i]))
-        for i in range (0, d['nLinks']):
-            d['LinkEnd'].append(struct.unpack('<i', f.read(4))[0]-1)
-            #print('  LinkEnd %d ID: %d (0-based)' % (i, LinkEnd[i]))
-        for i in range (0, d['nLinks']):
-            d['LinkType'].append(struct.unpack('<i', f.read(4))[0])
-            #print('  LinkType %d ID: %d' % (i, LinkType[i]))
-        d['TankResIndex'] = []
+        d['LinkID'] = EOFTDecoder.ReadIDs(f, d['nLinks'])
+        # NB: the LinkStart and LinkEnd values are made zero-based
+        d['LinkStart'] = EOFTDecoder.Ints(
+                [i-1 for i in EOFTDecoder.ReadInts(f, d['nLinks'])], compact)
+        d['LinkEnd'] = EOFTDecoder.Ints(
+                [i-1 for i in EOFTDecoder.ReadInts(f, d['nLinks'])], compact)
+        d['LinkType'] = EOFTDecoder.ReadInts(f, d['nLinks'], compact)
+
         if eof.options.verbose:
             print(_('Reading Tank/Reservoir indexes (%(nResTanks)d)...') % {'nResTanks': d['nResTanks']})
+        # read the indexes of tanks/res and take off 1 to make them zero-based
+        d['TankResIndex'] = EOFTDecoder.Ints(
+                [i-1 for i in EOFTDecoder.ReadInts(f, d['nResTanks'])], compact)
         for i in range (0, d['nResTanks']):
-            # read the index of tank/res and take off 1 to make it zero-based
-            d['TankResIndex'].append(struct.unpack('<i', f.read(4))[0] - 1)
-            #print('  Node index (0-based) of tank %d: %d' % (i, d['TankResIndex[i]))
             # store index of tank or res in node array
             d['NodeTankResIndex'][d['TankResIndex'][i]] = i
-        d['TankResXSectArea'] = []
         if eof.options.verbose:
             print(_('Reading Cross Sectional Areas of Tanks/Reservoirs (%(nResTanks)d)...') % {'nResTanks': d['nResTanks']})
-        nReservoirs = 0
-        for i in range (0, d['nResTanks']):
-            val = struct.unpack('<f', f.read(4))[0]
-            if val == 0.0:
-                nReservoirs += 1
-            d['TankResXSectArea'].append(val)
-            #print('  Cross Sectional Area of tank %d: %d' % (i, TankResXSectArea[i]))
+        d['TankResXSectArea'] = EOFTDecoder.ReadFloats(f, d['nResTanks'], compact)
+        nReservoirs = d['TankResXSectArea'].count(0.0)
         d['nReservoirs'] = nReservoirs
         d['nTanks'] = d['nResTanks'] - nReservoirs
 
-        for i in range (0, d['nNodes']):
-            d['NodeElev'].append(struct.unpack('<f', f.read(4))[0])
-            #print('  Node %d elevation: %s' % (i, d['NodeElev'][i]))
+        d['NodeElev'] = EOFTDecoder.ReadFloats(f, d['nNodes'], compact)
 
-        if progupdate is not None: progupdate(80,_('Reading prolog extra info'))
+        if progupdate is not None: progupdate(int(100*f.tell()/size),_('Reading prolog extra info'))
 
         if eof.options.verbose:
             print(_('Reading Link lengths (%(nLinks)d)...') % {'nLinks': d['nLinks']})
-        for i in range (0, d['nLinks']):
-            d['LinkLength'].append(struct.unpack('<f', f.read(4))[0])
-            #print('  Link %d length: %s' % (i, LinkLength[i]))
+        d['LinkLength'] = EOFTDecoder.ReadFloats(f, d['nLinks'], compact)
         if eof.options.verbose:
             print(_('Reading Link diameters (%(nLinks)d)...') % {'nLinks': d['nLinks']})
-        for i in range (0, d['nLinks']):
-            d['LinkDiam'].append(struct.unpack('<f', f.read(4))[0])
-            #print('  Link %d diameter: %s' % (i, LinkDiam[i]))
+        d['LinkDiam'] = EOFTDecoder.ReadFloats(f, d['nLinks'], compact)
 
     def PrologRead(self, eof, progupdate):
         #print("%s:PrologRead(%s)" % (self.__class__.__name__, eof))
         # read prolog (matching magic numbers at start and end already read
         # and checked)
-        self.ReadProlog(eof, eof.f, eof.Prolog, eof.Epilog['magic'], progupdate)
+        if eof.Cache is not None:
+            eof.Prolog.update(eof.Cache.Prolog(eof.options.compact))
+            eof.f.seek(eof.Layout['EnergyUseOffset'])
+        else:
+            self.ReadProlog(eof, eof.f, eof.Prolog, eof.Epilog['magic'], progupdate)
+            # what we read, without anything the other plugins add
+            self.cacheProlog = dict(eof.Prolog)
 
     def PrintProlog(self, eof, d):
         '''Print EPANET output file prolog.  No return value.
@@ -321,57 +483,74 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
             self.PrintProlog(eof, eof.Prolog)
 
 
-    def WritePrologNodeCSV(self, csvname, d):
+    def ExportPool(self):
+        ''' Pool the CSVs are written with (see EOFTExport), with
+            --export_jobs worker processes (or threads with --export_threads).
+        '''
+        if self.exports is None:
+            self.exports = EOFTExport.ExportPool(
+                    EOFTDecoder.Jobs(self.options.export_jobs),
+                    self.options.export_threads)
+        return self.exports
+
+    def WriteCSV(self, csvname, writer, *args):
+        ''' Write CSV csvname with EOFTCsv function writer(csvf, *args) in
+            the export pool, compressed if its name ends in .gz, .bz2 or .xz
+            as set by the --compress_level and --compress_thread options
+            (see EOFTExport.WriteCSV).  No return value.
+        '''
+        self.ExportPool().Submit(EOFTExport.WriteCSV, csvname,
+                self.options.compress_level, self.options.compress_thread,
+                writer, args)
+
+    def WaitForExports(self):
+        ''' Wait for the CSVs being written by the export pool.  No return
+            value.
+        '''
+        if self.exports is not None:
+            exports = self.exports
+            self.exports = None
+            exports.Wait()
+
+    def WritePrologNodeCSV(self, csvname, d, precision = None):
         '''Export EPANET output file node info to CSV.  No return value.
 
         Args:
             csvname (string):   name of file in which to write prolog node data in CSV format
             d (dictionary):     prolog dictionary with node data to write 
+            precision (int):    decimal places of the numbers or None for
+                                the default (see EOFTCsv.FloatFormat)
         '''
         print(_("Writing prolog node info CSV: %s") % csvname)
-        csvf = open(csvname,'w')
-        csvf.write(_('"ID", "Type", "Elevation", "XSectArea"\n'))
-        for i in range (0, d['nNodes']):
-            if d['NodeTankResIndex'][i] == -1:
-                csvf.write('"%s", "Junction", %f, 0.0\n'
-                        % (d['NodeID'][i], d['NodeElev'][i]))
-            elif d['TankResXSectArea'][d['NodeTankResIndex'][i]] == 0.0:
-                csvf.write('"%s", "Reservoir", %f, 0.0\n'
-                        % (d['NodeID'][i], d['NodeElev'][i]))
-            else:
-                csvf.write('"%s", "Tank", %f, %f\n'
-                        % (d['NodeID'][i], d['NodeElev'][i],
-                        d['TankResXSectArea'][d['NodeTankResIndex'][i]]))
-        csvf.close()
+        self.WriteCSV(csvname, 'WritePrologNodeRows',
+                _('"ID", "Type", "Elevation", "XSectArea"\n'), d, precision)
 
-    def WritePrologLinkCSV(self, eof, csvname, d):
+    def WritePrologLinkCSV(self, eof, csvname, d, precision = None):
         '''Export EPANET output file link info to CSV.  No return value.
 
         Args:
             csvname (string):   name of file in which to write link data in CSV format
             d (dictionary):     prolog dictionary with link data to write 
+            precision (int):    decimal places of the numbers or None for
+                                the default (see EOFTCsv.FloatFormat)
         '''
         print(_("Writing prolog link info CSV: %s") % csvname)
-        csvf = open(csvname,'w')
-        csvf.write(_('"ID", "StartNodeID", "EndNodeID", "Type", "Length", "Diameter"\n'))
-        for i in range (0, d['nLinks']):
-            option = eof.getLinkTypeText(d['LinkType'][i])
-            # NB: the LinkStart and LinkEnd values are indexes which are
-            # zero based, whereas the data file stores them 1-based.
-            csvf.write('"%s", "%s", "%s", "%s", %f, %f\n'
-                    % (d['LinkID'][i], d['NodeID'][d['LinkStart'][i]],
-                        d['NodeID'][d['LinkEnd'][i]],
-                        option, d['LinkLength'][i], d['LinkDiam'][i]))
-        csvf.close()
+        linktypes = [eof.getLinkTypeText(t) for t in d['LinkType']]
+        self.WriteCSV(csvname, 'WritePrologLinkRows',
+                _('"ID", "StartNodeID", "EndNodeID", "Type", "Length", "Diameter"\n'),
+                d, linktypes, precision)
 
     def PrologExport(self, eof, progupdate):
         ''' Callback message: export prolog section. Progress 0-100. '''
         #print("%s:PrologExport(%s)" % (self.__class__.__name__, eof))
+        self.options = eof.options
         if eof.options.prolog_node_csv is not None:
-            self.WritePrologNodeCSV(eof.options.prolog_node_csv, eof.Prolog)
+            self.WritePrologNodeCSV(eof.options.prolog_node_csv, eof.Prolog,
+                    eof.options.csv_precision)
 
         if eof.options.prolog_link_csv is not None:
-            self.WritePrologLinkCSV(eof, eof.options.prolog_link_csv, eof.Prolog)
+            self.WritePrologLinkCSV(eof, eof.options.prolog_link_csv,
+                    eof.Prolog, eof.options.csv_precision)
 
 
     def ReadEnergyUsage(self, eof, f, Prolog, d, progupdate):
@@ -389,32 +568,33 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
 
         if progupdate is not None: progupdate(5,_('Reading energy usage'))
 
-        d['PumpIndex'] = []
-        d['PumpUtilization'] = []
-        d['PumpAveEfficiency'] = []
-        d['PumpAvekWPerVol'] = []
-        d['PumpAvekW'] = []
-        d['PumpPeakkW'] = []
-        d['PumpAveCostPerDay'] = []
-
-        for i in range(0,Prolog['nPumps']):
-            d['PumpIndex'].append(struct.unpack('<i', f.read(4))[0]-1) # make 0-based
-            d['PumpUtilization'].append(struct.unpack('<f', f.read(4))[0])
-            d['PumpAveEfficiency'].append(struct.unpack('<f', f.read(4))[0])
-            d['PumpAvekWPerVol'].append(struct.unpack('<f', f.read(4))[0])
-            d['PumpAvekW'].append(struct.unpack('<f', f.read(4))[0])
-            d['PumpPeakkW'].append(struct.unpack('<f', f.read(4))[0])
-            d['PumpAveCostPerDay'].append(struct.unpack('<f', f.read(4))[0])
+        # each pump has an index followed by 6 floats, then there is one
+        # more float at the end, so read and decode the section at once
+        nPumps = Prolog['nPumps']
+        values = EOFTDecoder.EnergyUseStruct(nPumps).unpack(
+                EOFTDecoder.ReadBytes(f, 28*nPumps + 4))
+        d['PumpIndex'] = [i-1 for i in values[0:7*nPumps:7]] # make 0-based
+        d['PumpUtilization'] = list(values[1:7*nPumps:7])
+        d['PumpAveEfficiency'] = list(values[2:7*nPumps:7])
+        d['PumpAvekWPerVol'] = list(values[3:7*nPumps:7])
+        d['PumpAvekW'] = list(values[4:7*nPumps:7])
+        d['PumpPeakkW'] = list(values[5:7*nPumps:7])
+        d['PumpAveCostPerDay'] = list(values[6:7*nPumps:7])
 
         # should this be PumpPeakDemandCost?
-        d['PumpPeakEnergyUsage'] = struct.unpack('<f', f.read(4))[0]
+        d['PumpPeakEnergyUsage'] = values[7*nPumps]
         if progupdate is not None: progupdate(100,_('Read energy usage'))
 
 
     def EnergyUsageRead(self, eof, progupdate):
         #print("%s:EnergyUsageRead(%s)" % (self.__class__.__name__, eof))
         # read energy usage section
-        self.ReadEnergyUsage(eof, eof.f, eof.Prolog, eof.EnergyUse, progupdate)
+        if eof.Cache is not None:
+            eof.EnergyUse.update(eof.Cache.EnergyUse)
+            eof.f.seek(eof.Layout['DynamicResultsOffset'])
+        else:
+            self.ReadEnergyUsage(eof, eof.f, eof.Prolog, eof.EnergyUse, progupdate)
+            self.cacheEnergyUse = dict(eof.EnergyUse)
 
 
     def PrintEnergyUsage(self, prolog, d):
@@ -453,47 +633,53 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
             self.PrintEnergyUsage(eof.Prolog, eof.EnergyUse)
 
 
-    def WriteEnergyUseCSV(self, csvname, prolog, d):
+    def WriteEnergyUseCSV(self, csvname, prolog, d, precision = None):
         '''Export EPANET output file energy usage info to CSV.  No return value.
 
         Args:
             csvname (string):       name of file in which to write pump energy use data in CSV format
             prolog (dictionary):    prolog dictionary with link data
             d (dictionary):         energy use dictionary to write data from
+            precision (int):        decimal places of the numbers or None for
+                                    the default (see EOFTCsv.FloatFormat)
 
         '''
         print(_("Writing energy usage to CSV: %s") % csvname)
-        csvf = open(csvname,'w')
-        csvf.write(_('"ID", "PumpUtilization", "PumpAveEfficiency", "PumpAvekWPerVol", "PumpAvekW", "PumpPeakkW", "PumpAveCostPerDay"\n'))
-        for i in range(0,prolog['nPumps']):
-            ind = d['PumpIndex'][i]
-            csvf.write( '"%s", %f, %f, %f, %f, %f, %f\n' % (prolog['LinkID'][ind], 
-                d['PumpUtilization'][i], d['PumpAveEfficiency'][i],
-                d['PumpAvekWPerVol'][i], d['PumpAvekW'][i], d['PumpPeakkW'][i],
-                d['PumpAveCostPerDay'][i]))
-        csvf.close()
+        self.WriteCSV(csvname, 'WriteEnergyUseRows',
+                _('"ID", "PumpUtilization", "PumpAveEfficiency", "PumpAvekWPerVol", "PumpAvekW", "PumpPeakkW", "PumpAveCostPerDay"\n'),
+                prolog, d, precision)
 
 
     def EnergyUsageExport(self, eof, progupdate):
         ''' Callback message: epxort file energy usage section. Progress 0-100. '''
         #print("%s:EnergyUsageExport(%s)" % (self.__class__.__name__, eof))
+        self.options = eof.options
         if eof.options.energy_use_csv is not None:
             self.WriteEnergyUseCSV(eof.options.energy_use_csv, 
-                    eof.Prolog, eof.EnergyUse)
+                    eof.Prolog, eof.EnergyUse, eof.options.csv_precision)
 
 
 
 
-    def ReadDynamicResults(self, f, Prolog, nPeriods, DynamicResults, progupdate):
+    def ReadDynamicResults(self, f, Prolog, nPeriods, cube, progupdate,
+            periodread = None, jobs = 1):
         '''Read dynamic results from EPANET output file.  No return value.
 
         Args:
             f (file):               file in correct position to read dynamic results
             Prolog (dictionary):    prolog data already read from file
             nPeriods (int):         number of time steps in simulation
-            DynamicResults (list):  a dictionary is appended to this list for each time step read
+            cube (ResultCube):      columnar store the periods read are appended to;
+                                    only the values of its Nodes and Links in
+                                    the blocks of its variables are read for
+                                    its Periods
             progupdate (None or function):
-                called as progupdate(% of work done (40-79), text description of current step)
+                called as progupdate(% of work done (0-100), text description of current step)
+                with the part of the section read
+            periodread (None or function):
+                called as periodread(i, TimeStepD) for each period i in cube
+                as it is read
+            jobs (int):             number of processes to read with
 
         '''
 
@@ -502,177 +688,687 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         nNodes = Prolog['nNodes']
         nLinks = Prolog['nLinks']
 
-        # our progress goes from 40 to 79 in nPeriods
+        # read as many whole periods as fit in a chunk at once and
+        # decode them all together, skipping the blocks of variables
+        # which are not wanted
+        periodsize = EOFTDecoder.PeriodSize(nNodes, nLinks)
+        runs = EOFTDecoder.PeriodRuns(nNodes, nLinks, cube.variables,
+                cube.Nodes, cube.Links)
+
+        # our progress is the part of the section read, so skipped
+        # periods count as read
         oldprog = 0
 
-        for i in range(0,nPeriods):
+        # each chunk starts with a seek straight to its first period, so
+        # with more than one job the chunks can be read in parallel
+        start = f.tell()
+        chunks = EOFTDecoder.Chunks(cube.Periods, nNodes, nLinks)
+        for k, buf in enumerate(EOFTDecoder.ReadChunks(f, start, chunks,
+                periodsize, runs, jobs)):
+            i, n = chunks[k]
             if progupdate is not None:
-                newprog = int(100*(float(i)/float(nPeriods)))
-                if newprog > oldprog + 2:
+                newprog = (100*i) // nPeriods
+                if newprog > oldprog:
                     progupdate(newprog,_('Reading dynamic results timestep %d') % i)
                     oldprog = newprog
-            NodeDemand = []
-            NodeHead = []
-            NodePressure = []
-            NodeWaterQuality = []
-            LinkFlow = []
-            LinkVelocity = []
-            LinkHeadloss = []
-            LinkAveWaterQuality = []
-            LinkStatus = []
-            LinkSetting = []
-            LinkReactionRate = []
-            LinkFrictionFactor = []
-            for j in range(0,nNodes):
-                NodeDemand.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nNodes):
-                NodeHead.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nNodes):
-                NodePressure.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nNodes):
-                NodeWaterQuality.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkFlow.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkVelocity.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkHeadloss.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkAveWaterQuality.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkStatus.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkSetting.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkReactionRate.append(struct.unpack('<f', f.read(4))[0])
-            for j in range(0,nLinks):
-                LinkFrictionFactor.append(struct.unpack('<f', f.read(4))[0])
-
-            TimeStepD = {}
-            TimeStepD['NodeDemand'] = NodeDemand
-            TimeStepD['NodeHead'] = NodeHead
-            TimeStepD['NodePressure'] = NodePressure
-            TimeStepD['NodeWaterQuality'] = NodeWaterQuality
-            TimeStepD['LinkFlow'] = LinkFlow
-            TimeStepD['LinkVelocity'] = LinkVelocity
-            TimeStepD['LinkHeadloss'] = LinkHeadloss
-            TimeStepD['LinkAveWaterQuality'] = LinkAveWaterQuality
-            TimeStepD['LinkStatus'] = LinkStatus
-            TimeStepD['LinkSetting'] = LinkSetting
-            TimeStepD['LinkReactionRate'] = LinkReactionRate
-            TimeStepD['LinkFrictionFactor'] = LinkFrictionFactor
-
-            DynamicResults.append(TimeStepD)
+            cube.AppendPeriods(buf, n)
+            if periodread is not None:
+                for j in range(cube.nFilled - n, cube.nFilled):
+                    periodread(j, dict([(name, cube.Row(name, j))
+                            for name, width in cube.layout]))
+        f.seek(start + nPeriods*periodsize)
 
         if progupdate is not None: progupdate(100,_('Finished reading dynamic results'))
 
 
+    def MapDynamicResults(self, eof, f, Prolog, nPeriods, variables, periods,
+            nodes, links, progupdate):
+        '''Memory map dynamic results from EPANET output file.  No return value.
+
+        eof.DynamicResults is replaced by a sequence which decodes each
+        time step only when it is first indexed.  The file is left
+        positioned at the start of the epilog.
+
+        Args:
+            f (file):               file in correct position to read dynamic results
+            Prolog (dictionary):    prolog data already read from file
+            nPeriods (int):         number of time steps in simulation
+            variables (list):       names of the variables to decode
+            periods (list):         indexes of the time steps to include
+            nodes (list):           indexes of the nodes to include or None for all
+            links (list):           indexes of the links to include or None for all
+            progupdate (None or function):
+                called as progupdate(% of work done (0-100), text description of current step)
+
+        '''
+        if progupdate is not None: progupdate(0,_('Mapping dynamic results'))
+        offset = f.tell()
+        eof.DynamicResults = EOFTResults.MappedDynamicResults(eof.fname,
+                offset, nPeriods, Prolog['nNodes'], Prolog['nLinks'],
+                eof.options.decoder, variables, periods, nodes, links,
+                eof.options.compact)
+        f.seek(offset + nPeriods*EOFTDecoder.PeriodSize(Prolog['nNodes'],
+                Prolog['nLinks']))
+        if progupdate is not None: progupdate(100,_('Mapped dynamic results'))
+
+    def StreamDynamicResults(self, eof, f, Prolog, nPeriods, variables,
+            periods, nodes, links, progupdate):
+        '''Read dynamic results one period at a time without keeping them.
+        No return value.
+
+        Each period is read into the same buffer, written to the dynamic
+        results CSVs (see OpenStreamExports) and sent to the plugins (see
+        EPANETOutputFile.PeriodRead).  The file is left positioned at the
+        start of the epilog.
+
+        Args:
+            f (file):               file in correct position to read dynamic results
+            Prolog (dictionary):    prolog data already read from file
+            nPeriods (int):         number of time steps in simulation
+            variables (list):       names of the variables to decode
+            periods (list):         indexes of the time steps to read
+            nodes (list):           indexes of the nodes to include or None for all
+            links (list):           indexes of the links to include or None for all
+            progupdate (None or function):
+                called as progupdate(% of work done (0-100), text description of current step)
+
+        '''
+        if progupdate is not None: progupdate(0,_('Reading dynamic results'))
+        offset = f.tell()
+        files, writers = self.OpenStreamExports(eof, Prolog, variables, nodes,
+                links)
+        try:
+            if eof.HasPeriodPlugins() or len(writers) > 0:
+                stream = EOFTResults.PeriodStream(f, offset, nPeriods,
+                        Prolog['nNodes'], Prolog['nLinks'],
+                        eof.options.decoder, variables, periods, nodes, links)
+                oldprog = 0
+                for i, TimeStepD in stream:
+                    if progupdate is not None:
+                        newprog = (100*(periods[i] + 1)) // nPeriods
+                        if newprog > oldprog:
+                            progupdate(newprog,_('Reading dynamic results timestep %d') % periods[i])
+                            oldprog = newprog
+                    for writer, name in writers:
+                        if name is None:
+                            writer.Write(periods[i], TimeStepD)
+                        else:
+                            writer.Write(periods[i], TimeStepD[name])
+                    eof.PeriodRead(i, TimeStepD)
+                for writer, name in writers:
+                    writer.Flush()
+        finally:
+            for csvf in files:
+                csvf.close()
+        f.seek(offset + nPeriods*EOFTDecoder.PeriodSize(Prolog['nNodes'],
+                Prolog['nLinks']))
+        if progupdate is not None: progupdate(100,_('Finished reading dynamic results'))
+
+    def OpenStreamExports(self, eof, Prolog, variables, nodes, links):
+        '''Open the dynamic results CSVs which, with --stream, are written
+        as each period is read (see StreamDynamicResults).
+
+        The node and link CSVs written by the export pool (see
+        WriteDynamicShards) read the file again themselves, so are not
+        included, nor are those already in eof.StreamedCSVs; the names of
+        the others are added to it.
+
+        Args:
+            eof (EPANETOutputFile): the file being read
+            Prolog (dictionary):    prolog data already read from file
+            variables (list):       names of the variables read
+            nodes (list):           indexes of the nodes read or None for all
+            links (list):           indexes of the links read or None for all
+
+        Returns:
+            (files, writers) the open CSV files and, for each of them,
+            (writer, name) where writer is an EOFTCsv.TimeStepRowWriter
+            given each period's dictionary (name is None) or an
+            EOFTCsv.WideRowWriter given the values of variable name
+
+        Raises:
+            Exception if a wide CSV's variable is not read
+        '''
+        files = []
+        writers = []
+        if not eof.options.stream:
+            return files, writers
+        if nodes is None:
+            nodes = range(0, Prolog['nNodes'])
+        if links is None:
+            links = range(0, Prolog['nLinks'])
+        streamed = eof.StreamedCSVs
+        csvs = []
+        if (self.ExportPool().jobs == 1
+                and eof.options.shard_timesteps is None):
+            if (eof.options.dynamic_node_csv is not None
+                    and eof.options.dynamic_node_csv not in streamed):
+                print(_("Writing dynamic results for nodes to CSV: %s")
+                        % eof.options.dynamic_node_csv)
+                csvs.append((eof.options.dynamic_node_csv,
+                        self.DynamicNodeColumns(Prolog, variables),
+                        [Prolog['NodeID'][j] for j in nodes]))
+            if (eof.options.dynamic_link_csv is not None
+                    and eof.options.dynamic_link_csv not in streamed):
+                print(_("Writing dynamic results for links to CSV: %s")
+                        % eof.options.dynamic_link_csv)
+                csvs.append((eof.options.dynamic_link_csv,
+                        self.DynamicLinkColumns(Prolog, variables),
+                        [Prolog['LinkID'][j] for j in links]))
+        wide = [(name, csvname) for name, csvname
+                in self.WideCSVs(eof.options) if csvname not in streamed]
+        for name, csvname in wide:
+            if name not in variables:
+                raise Exception(_('ERROR: %s was not read from the dynamic results so cannot be written as a wide CSV') % name)
+        try:
+            for csvname, columns, ids in csvs:
+                csvf = EOFTCsv.Open(csvname, eof.options.compress_level,
+                        eof.options.compress_thread)
+                files.append(csvf)
+                csvf.write(self.DynamicCSVHeading(columns))
+                writers.append((EOFTCsv.TimeStepRowWriter(csvf, ids,
+                        [c[0] for c in columns], Prolog['StartTime'],
+                        Prolog['ReportTimeStep'], eof.options.csv_precision),
+                        None))
+                streamed.append(csvname)
+            for name, csvname in wide:
+                print(_("Writing dynamic results %(variable)s to wide CSV: %(csv)s")
+                        % {'variable': name, 'csv': csvname})
+                if name in EOFTDecoder.NODE_VARIABLES:
+                    ids = [Prolog['NodeID'][j] for j in nodes]
+                else:
+                    ids = [Prolog['LinkID'][j] for j in links]
+                csvf = EOFTCsv.Open(csvname, eof.options.compress_level,
+                        eof.options.compress_thread)
+                files.append(csvf)
+                csvf.write(self.WideCSVHeading(ids))
+                writers.append((EOFTCsv.WideRowWriter(csvf, len(ids),
+                        Prolog['StartTime'], Prolog['ReportTimeStep'],
+                        eof.options.csv_precision), name))
+                streamed.append(csvname)
+        except:
+            for csvf in files:
+                csvf.close()
+            raise
+        return files, writers
+
+    def WriteStreamExports(self, eof):
+        '''With --stream, write the dynamic results CSVs which were not
+        written as the file was read (eg. those named in a later Export)
+        from the periods read again from the file (see IterPeriods).
+        No return value.
+        '''
+        files, writers = self.OpenStreamExports(eof, eof.Prolog,
+                eof.DynamicVariables, eof.DynamicNodes, eof.DynamicLinks)
+        try:
+            if len(writers) == 0:
+                return
+            for i, TimeStepD in eof.IterPeriods():
+                for writer, name in writers:
+                    if name is None:
+                        writer.Write(eof.DynamicPeriods[i], TimeStepD)
+                    else:
+                        writer.Write(eof.DynamicPeriods[i], TimeStepD[name])
+            for writer, name in writers:
+                writer.Flush()
+        finally:
+            for csvf in files:
+                csvf.close()
+
+    def LoadDynamicResults(self, f, Layout, cache, cube, nodes, links,
+            progupdate, periodread = None):
+        '''Load dynamic results from a cache file.  No return value.
+
+        Args:
+            f (file):               output file, which is left positioned at
+                                    the start of the epilog
+            Layout (dictionary):    offset and size of each section of f
+            cache (CacheEntry):     valid cache of f (see EOFTCache.Load)
+            cube (ResultCube):      empty columnar store to fill with the
+                                    values of its Nodes and Links for its
+                                    variables and Periods
+            nodes (list):           indexes of the nodes to load or None for all
+            links (list):           indexes of the links to load or None for all
+            progupdate (None or function):
+                called as progupdate(% of work done (0-100), text description of current step)
+            periodread (None or function):
+                called as periodread(i, TimeStepD) for each period i in cube
+
+        '''
+        if progupdate is not None: progupdate(0,_('Loading cached dynamic results'))
+        periods = cube.Periods
+        if len(periods) == cache.nPeriods:
+            periods = None
+        columns = {}
+        for name, width in cube.layout:
+            if name in EOFTDecoder.NODE_VARIABLES:
+                entities = nodes
+            else:
+                entities = links
+            columns[name] = cache.Column(name, cube.engine, periods, entities)
+        cube.SetColumns(columns)
+        if periodread is not None:
+            for i in range(0, cube.nPeriods):
+                periodread(i, dict([(name, cube.Row(name, i))
+                        for name, width in cube.layout]))
+        f.seek(Layout['EpilogOffset'])
+        if progupdate is not None: progupdate(100,_('Loaded cached dynamic results'))
+
+    def WriteCache(self, eof):
+        '''Write the cache file for the output file eof has read.
+        No return value.  Failing to write the cache is not an error.
+
+        Args:
+            eof (EPANETOutputFile): output file loading coordinator
+        '''
+        cachesize = None
+        if eof.options.cache_dir is not None and eof.options.cache_size is not None:
+            cachesize = eof.options.cache_size*1024*1024
+        try:
+            if eof.options.cache_dir is not None and not os.path.isdir(eof.options.cache_dir):
+                os.makedirs(eof.options.cache_dir)
+            EOFTCache.Write(eof.fname, eof.CachePath, self.cacheProlog,
+                    self.cacheEnergyUse, eof.Epilog, eof.ResultCube, cachesize)
+            if eof.options.verbose:
+                print(_('Wrote cache file %s') % eof.CachePath)
+        except EnvironmentError as e:
+            if eof.options.verbose:
+                print(_('Could not write cache file %(path)s: %(error)s')
+                        % {'path': eof.CachePath, 'error': e})
+
     def DynamicResultsRead(self, eof, progupdate):
         #print("%s:DynamicResultsRead(%s)" % (self.__class__.__name__, eof))
-        self.ReadDynamicResults(eof.f, eof.Prolog, eof.Epilog['nPeriods'],
-                eof.DynamicResults, progupdate)
+        eof.DynamicVariables = EOFTDecoder.SelectVariables(
+                eof.options.node_variables, eof.options.link_variables)
+        nPeriods = eof.Epilog['nPeriods']
+        eof.DynamicPeriods = EOFTDecoder.SelectPeriods(nPeriods,
+                eof.Prolog['StartTime'], eof.Prolog['ReportTimeStep'],
+                eof.options.timesteps, eof.options.time_window)
+        nodes = EOFTDecoder.SelectIDs(eof.options.node_ids,
+                eof.Prolog['NodeID'])
+        links = EOFTDecoder.SelectIDs(eof.options.link_ids,
+                eof.Prolog['LinkID'])
+        if eof.options.mmap:
+            self.MapDynamicResults(eof, eof.f, eof.Prolog, nPeriods,
+                    eof.DynamicVariables, eof.DynamicPeriods, nodes, links,
+                    progupdate)
+        elif eof.options.stream:
+            self.StreamDynamicResults(eof, eof.f, eof.Prolog, nPeriods,
+                    eof.DynamicVariables, eof.DynamicPeriods, nodes, links,
+                    progupdate)
+        else:
+            periodread = None
+            if eof.HasPeriodPlugins():
+                periodread = eof.PeriodRead
+            eof.ResultCube = EOFTResults.ResultCube(len(eof.DynamicPeriods),
+                    eof.Prolog['nNodes'], eof.Prolog['nLinks'],
+                    eof.options.decoder, eof.DynamicVariables,
+                    eof.DynamicPeriods, nodes, links, eof.options.compact)
+            if eof.Cache is not None:
+                self.LoadDynamicResults(eof.f, eof.Layout, eof.Cache,
+                        eof.ResultCube, nodes, links, progupdate, periodread)
+            else:
+                self.ReadDynamicResults(eof.f, eof.Prolog, nPeriods,
+                        eof.ResultCube, progupdate, periodread,
+                        EOFTDecoder.Jobs(eof.options.jobs))
+                if (eof.CachePath is not None
+                        and len(eof.DynamicVariables) == len(EOFTDecoder.NODE_VARIABLES + EOFTDecoder.LINK_VARIABLES)
+                        and len(eof.DynamicPeriods) == nPeriods
+                        and nodes is None and links is None):
+                    # everything has been read, so it can all be cached
+                    self.WriteCache(eof)
+            eof.DynamicResults = EOFTResults.CubeDynamicResults(eof.ResultCube)
+        if nodes is None:
+            nodes = range(0, eof.Prolog['nNodes'])
+        eof.DynamicNodes = nodes
+        if links is None:
+            links = range(0, eof.Prolog['nLinks'])
+        eof.DynamicLinks = links
+
+
+    def DynamicNodeColumns(self, Prolog, variables = None):
+        '''Node variables printed and exported from the dynamic results.
 
+        Args:
+            Prolog (dictionary):    Prolog dictionary
+            variables (list):       names of the variables read or None for all
+
+        Returns:
+            (list) (variable name, printed value format, CSV heading) for
+            each node variable read, in file order
+
+        '''
+        columns = [
+            ('NodeDemand', _('demand %f'), _('"Demand"')),
+            ('NodeHead', _('head %f'), _('"Head"')),
+            ('NodePressure', _('pressure %f'),
+                _('"Pressure (%s)"') % Prolog['PressureUnitsOption']),
+            ('NodeWaterQuality', _('water quality %f'),
+                _('"WaterQuality (%s)"') % Prolog['WaterQualityOption'])]
+        return [c for c in columns if variables is None or c[0] in variables]
+
+    def DynamicLinkColumns(self, Prolog, variables = None):
+        '''Link variables printed and exported from the dynamic results.
+
+        Args:
+            Prolog (dictionary):    Prolog dictionary
+            variables (list):       names of the variables read or None for all
 
-    def PrintDynamicResults(self, Prolog, nPeriods, DynamicResults):
+        Returns:
+            (list) (variable name, printed value format, CSV heading) for
+            each link variable read, in file order
+
+        '''
+        columns = [
+            ('LinkFlow', _('flow %f'),
+                _('"Flow (%s)"') % Prolog['FlowUnitsOption']),
+            ('LinkVelocity', _('velocity %f'), _('"Velocity"')),
+            ('LinkHeadloss', _('headloss %f'), _('"Headloss"')),
+            ('LinkAveWaterQuality', _('ave water qual %f'),
+                _('"AverageWaterQuality (%s)"') % Prolog['WaterQualityOption']),
+            ('LinkStatus', _('status %f'), _('"Status"')),
+            ('LinkReactionRate', _('react rate %f'), _('"ReactionRate"')),
+            ('LinkFrictionFactor', _('frict fact %f'), _('"FrictionFactor"'))]
+        return [c for c in columns if variables is None or c[0] in variables]
+
+    def PrintDynamicResults(self, Prolog, nPeriods, DynamicResults,
+            variables = None, periods = None, nodes = None, links = None):
         '''Print EPANET output file dynamic results.  No return value.
 
         Args:
             Prolog (dictionary):    Prolog dictionary
-            nPeriods (int):         number of time steps in simulation
+            nPeriods (int):         number of time steps in DynamicResults
             DynamicResults (list):  list of dynamic result dictionaries for printing, one for each timestep
+            variables (list):       names of the variables read or None for all
+            periods (list):         timestep in the file of each entry in
+                                    DynamicResults or None if all were read
+            nodes (list):           index of each node read or None for all
+            links (list):           index of each link read or None for all
 
         '''
         print("")
         headingtext = _("Dynamic Results")
         print(headingtext)
         print('='*len(headingtext))
+        nodecolumns = self.DynamicNodeColumns(Prolog, variables)
+        nodeformat = _("  Node %d: ") + ', '.join([c[1] for c in nodecolumns])
+        linkcolumns = self.DynamicLinkColumns(Prolog, variables)
+        linkformat = _("  Link %d: ") + ', '.join([c[1] for c in linkcolumns])
+        if nodes is None:
+            nodes = range(0, Prolog['nNodes'])
+        if links is None:
+            links = range(0, Prolog['nLinks'])
         for i in range(0,nPeriods):
             d = DynamicResults[i]
+            if periods is not None: i = periods[i]
             print(_("TimeStep %d") % i)
             print(_(" Nodes"))
-            for j in range(0,Prolog['nNodes']):
-                print(_("  Node %d: demand %f, head %f, pressure %f, water quality %f") % (j, d['NodeDemand'][j], d['NodeHead'][j], d['NodePressure'][j], d['NodeWaterQuality'][j]))
+            if len(nodecolumns) > 0:
+                for values in zip(nodes, *[d[c[0]] for c in nodecolumns]):
+                    print(nodeformat % values)
             print(_(" Links"))
-            for j in range(0,Prolog['nLinks']):
-                print(_("  Link %d: flow %f, velocity %f, headloss %f, ave water qual %f, status %f, react rate %f, frict fact %f") % (j,
-                    d['LinkFlow'][j], d['LinkVelocity'][j], d['LinkHeadloss'][j],
-                    d['LinkAveWaterQuality'][j], d['LinkStatus'][j],
-                    d['LinkReactionRate'][j], d['LinkFrictionFactor'][j]))
+            if len(linkcolumns) > 0:
+                for values in zip(links, *[d[c[0]] for c in linkcolumns]):
+                    print(linkformat % values)
             print("")
 
     def DynamicResultsPrint(self, eof, progupdate):
         ''' Callback message: print file dynamic results section. Progress 0-100. '''
         #print("%s:DynamicResultsPrint(%s)" % (self.__class__.__name__, eof))
-        if eof.options.dynamic_results or eof.options.all:
-            self.PrintDynamicResults(eof.Prolog, eof.Epilog['nPeriods'],
-                    eof.DynamicResults)
+        if ((eof.options.dynamic_results or eof.options.all)
+                and not eof.options.stream):
+            self.PrintDynamicResults(eof.Prolog, len(eof.DynamicResults),
+                    eof.DynamicResults, eof.DynamicVariables,
+                    eof.DynamicPeriods, eof.DynamicNodes, eof.DynamicLinks)
 
 
-    def WriteDynamicNodeCSV(self, csvname, prolog, nPeriods, DynamicResults):
+    def WriteDynamicNodeCSV(self, csvname, prolog, nPeriods, DynamicResults,
+            variables = None, periods = None, nodes = None, precision = None):
         '''Export EPANET otuput file dynamic results (nodes) to CSV.  No return value.
 
         Args:
             csvname (string):       name of file in which to write dynamic node data in CSV format
             prolog (dictionary):    prolog dictionary with node data
-            nPeriods (int):         number of time steps in simulation
+            nPeriods (int):         number of time steps in DynamicResults
             DynamicResults (list):  list of dictionaries to write, one for each timestep
+            variables (list):       names of the variables read or None for all
+            periods (list):         timestep in the file of each entry in
+                                    DynamicResults or None if all were read
+            nodes (list):           index of each node read or None for all
+            precision (int):        decimal places of the values or None for
+                                    the default (see EOFTCsv.FloatFormat)
 
         '''
         if csvname is not None:
             print(_("Writing dynamic results for nodes to CSV: %s") % csvname)
-            nodecsvf = open(csvname,'w')
-            nodecsvf.write(_('"TimeStep","Time (sec)","ID", "Demand", "Head", "Pressure (%s)", "WaterQuality (%s)"\n') % (prolog['PressureUnitsOption'], prolog['WaterQualityOption']))
-            for i in range(0,nPeriods):
-                d = DynamicResults[i]
-                for j in range(0,prolog['nNodes']):
-                    nodecsvf.write('%d, %d, "%s", %f, %f, %f, %f\n'
-                            % (i, prolog['StartTime'] +
-                                (i*prolog['ReportTimeStep']),
-                                prolog['NodeID'][j], d['NodeDemand'][j],
-                                d['NodeHead'][j], d['NodePressure'][j],
-                                d['NodeWaterQuality'][j]))
-            nodecsvf.close()
-
-    def WriteDynamicLinkCSV(self, csvname, Prolog, nPeriods, DynamicResults):
+            columns = self.DynamicNodeColumns(prolog, variables)
+            ids = prolog['NodeID']
+            if nodes is not None:
+                ids = [ids[j] for j in nodes]
+            self.WriteDynamicCSV(csvname, prolog, columns, ids, nPeriods,
+                    DynamicResults, periods, precision)
+
+    def WriteDynamicLinkCSV(self, csvname, Prolog, nPeriods, DynamicResults,
+            variables = None, periods = None, links = None, precision = None):
         '''Export EPANET otuput file dynamic results (links) to CSV.  No return value.
 
         Args:
             csvname (string):       name of file in which to write dynamic link data in CSV format
             prolog (dictionary):    prolog dictionary with link data
-            nPeriods (int):         number of time steps in simulation
+            nPeriods (int):         number of time steps in DynamicResults
             DynamicResults (list):  list of dictionaries to write, one for each timestep
+            variables (list):       names of the variables read or None for all
+            periods (list):         timestep in the file of each entry in
+                                    DynamicResults or None if all were read
+            links (list):           index of each link read or None for all
+            precision (int):        decimal places of the values or None for
+                                    the default (see EOFTCsv.FloatFormat)
 
         '''
         print(_("Writing dynamic results for links to CSV: %s") % csvname)
-        linkcsvf = open(csvname,'w')
-        linkcsvf.write(_('"TimeStep","Time (sec)","ID", "Flow (%s)", "Velocity", "Headloss", "AverageWaterQuality (%s)", "Status", "ReactionRate", "FrictionFactor"\n') % (Prolog['FlowUnitsOption'], Prolog['WaterQualityOption']))
-        for i in range(0,nPeriods):
-            d = DynamicResults[i]
-            for j in range(0,Prolog['nLinks']):
-                linkcsvf.write('%d, %d, "%s", %f, %f, %f, %f, %f, %f, %f\n'
-                        % (i, Prolog['StartTime'] +
-                            (i*Prolog['ReportTimeStep']),
-                            Prolog['LinkID'][j], d['LinkFlow'][j],
-                            d['LinkVelocity'][j], d['LinkHeadloss'][j],
-                            d['LinkAveWaterQuality'][j],
-                            d['LinkStatus'][j], d['LinkReactionRate'][j],
-                            d['LinkFrictionFactor'][j]))
-        linkcsvf.close()
+        columns = self.DynamicLinkColumns(Prolog, variables)
+        ids = Prolog['LinkID']
+        if links is not None:
+            ids = [ids[j] for j in links]
+        self.WriteDynamicCSV(csvname, Prolog, columns, ids, nPeriods,
+                DynamicResults, periods, precision)
+
+    def DynamicCSVHeading(self, columns):
+        ''' First line of a dynamic results CSV with the columns from
+            DynamicNodeColumns or DynamicLinkColumns.
+        '''
+        return (_('"TimeStep","Time (sec)","ID"')
+                + ''.join([', ' + c[2] for c in columns]) + '\n')
+
+    def WriteDynamicCSV(self, csvname, Prolog, columns, ids, nPeriods,
+            DynamicResults, periods = None, precision = None):
+        ''' Write the CSV for WriteDynamicNodeCSV or WriteDynamicLinkCSV
+            with the columns from DynamicNodeColumns or DynamicLinkColumns
+            and the IDs of the rows in each timestep.
+        '''
+        csvf = EOFTCsv.Open(csvname, self.options.compress_level,
+                self.options.compress_thread)
+        try:
+            EOFTCsv.WriteTimeStepRows(csvf, self.DynamicCSVHeading(columns),
+                    ids, [c[0] for c in columns],
+                    EOFTCsv.TimeSteps(nPeriods, DynamicResults, periods),
+                    Prolog['StartTime'], Prolog['ReportTimeStep'], precision)
+        finally:
+            csvf.close()
+
+    def WriteDynamicShards(self, eof, csvname, columns, nodes, links):
+        '''Write a dynamic results CSV with the export pool, in pieces of
+        --shard_timesteps timesteps (or all of them in one piece) which are
+        read again from the file (see EOFTExport).  No return value.
+
+        Args:
+            eof (EPANETOutputFile): the file being read
+            csvname (string):       name of the CSV
+            columns (list):         columns from DynamicNodeColumns or
+                                    DynamicLinkColumns
+            nodes (list):           index of the node in each row, or []
+            links (list):           index of the link in each row, or []
+        '''
+        options = eof.options
+        pool = self.ExportPool()
+        ids = ([eof.Prolog['NodeID'][j] for j in nodes]
+                + [eof.Prolog['LinkID'][j] for j in links])
+        heading = self.DynamicCSVHeading(columns)
+        source = (eof.fname, eof.Layout['DynamicResultsOffset'],
+                eof.Epilog['nPeriods'], eof.Prolog['nNodes'],
+                eof.Prolog['nLinks'], options.decoder)
+        shards = EOFTExport.Shards(eof.DynamicPeriods,
+                options.shard_timesteps)
+        parts = []
+        for k in range(0, len(shards)):
+            if options.shard_files:
+                name = EOFTExport.ShardName(csvname, '%04d' % k)
+                if options.verbose:
+                    print(_('Writing timesteps %(first)d to %(last)d to CSV: %(csv)s')
+                            % {'first': shards[k][0], 'last': shards[k][-1],
+                            'csv': name})
+            elif len(shards) == 1:
+                name = csvname
+            else:
+                name = EOFTExport.ShardName(csvname, 'part%04d' % k)
+                parts.append(name)
+            if k > 0 and not options.shard_files:
+                # only the first piece of a joined CSV has the heading
+                heading = None
+            pool.Submit(EOFTExport.WriteTimeStepShard, name,
+                    options.compress_level, options.compress_thread, source,
+                    heading, ids, [c[0] for c in columns], shards[k],
+                    nodes, links, eof.Prolog['StartTime'],
+                    eof.Prolog['ReportTimeStep'], options.csv_precision)
+        if len(parts) > 0:
+            pool.Concatenate(csvname, parts)
+
+
+    def WideCSVHeading(self, ids):
+        ''' First line of a wide dynamic results CSV with a column for each
+            of ids.
+        '''
+        return (_('"TimeStep","Time (sec)"')
+                + ''.join([', "%s"' % ID for ID in ids]) + '\n')
 
+    def WriteWideCSV(self, eof, csvname, name):
+        '''Export one dynamic results variable to CSV with a row for each
+        timestep and a column for each node or link.  No return value.
+
+        The rows are those of the ResultCube (or, with --mmap, of each
+        timestep in turn) so the values are not looked up one at a time.
+
+        Args:
+            eof (EPANETOutputFile): the file being read
+            csvname (string):       name of the CSV (compressed if it ends in
+                                    .gz, .bz2 or .xz)
+            name (string):          name of the variable
+
+        Raises:
+            Exception if the variable was not read
+        '''
+        if name not in eof.DynamicVariables:
+            raise Exception(_('ERROR: %s was not read from the dynamic results so cannot be written as a wide CSV') % name)
+        print(_("Writing dynamic results %(variable)s to wide CSV: %(csv)s")
+                % {'variable': name, 'csv': csvname})
+        if name in EOFTDecoder.NODE_VARIABLES:
+            ids = [eof.Prolog['NodeID'][j] for j in eof.DynamicNodes]
+        else:
+            ids = [eof.Prolog['LinkID'][j] for j in eof.DynamicLinks]
+        cube = eof.ResultCube
+        periods = eof.DynamicPeriods
+        if cube is not None:
+            rows = ((periods[n], cube.Row(name, n))
+                    for n in range(0, len(periods)))
+        else:
+            rows = ((i, d[name]) for i, d in EOFTCsv.TimeSteps(
+                    len(eof.DynamicResults), eof.DynamicResults, periods))
+        csvf = EOFTCsv.Open(csvname, self.options.compress_level,
+                self.options.compress_thread)
+        try:
+            EOFTCsv.WriteWideRows(csvf, self.WideCSVHeading(ids), len(ids),
+                    rows, eof.Prolog['StartTime'],
+                    eof.Prolog['ReportTimeStep'], self.options.csv_precision)
+        finally:
+            csvf.close()
 
     def DynamicResultsExport(self, eof, progupdate):
         ''' Callback message: export file dynamic results section. Progress 0-100. '''
         #print("%s:DynamicResultsExport(%s)" % (self.__class__.__name__, eof))
+        self.options = eof.options
+
+        # with worker processes or pieces, the dynamic results CSVs are
+        # written from the file rather than from memory
+        if (self.ExportPool().jobs > 1
+                or eof.options.shard_timesteps is not None):
+            if eof.options.dynamic_node_csv is not None:
+                print(_("Writing dynamic results for nodes to CSV: %s")
+                        % eof.options.dynamic_node_csv)
+                self.WriteDynamicShards(eof, eof.options.dynamic_node_csv,
+                        self.DynamicNodeColumns(eof.Prolog,
+                            eof.DynamicVariables),
+                        list(eof.DynamicNodes), [])
+            if eof.options.dynamic_link_csv is not None:
+                print(_("Writing dynamic results for links to CSV: %s")
+                        % eof.options.dynamic_link_csv)
+                self.WriteDynamicShards(eof, eof.options.dynamic_link_csv,
+                        self.DynamicLinkColumns(eof.Prolog,
+                            eof.DynamicVariables),
+                        [], list(eof.DynamicLinks))
+
+        # with --stream, the other dynamic results CSVs were written as the
+        # file was read (see StreamDynamicResults) or, if they are new, are
+        # written from the periods read again
+        elif eof.options.stream:
+            self.WriteStreamExports(eof)
 
         # saving the dynamic node info to CSV
-        if eof.options.dynamic_node_csv is not None:
+        elif eof.options.dynamic_node_csv is not None:
             self.WriteDynamicNodeCSV(eof.options.dynamic_node_csv, 
-                    eof.Prolog, eof.Epilog['nPeriods'], eof.DynamicResults)
+                    eof.Prolog, len(eof.DynamicResults), eof.DynamicResults,
+                    eof.DynamicVariables, eof.DynamicPeriods,
+                    eof.DynamicNodes, eof.options.csv_precision)
 
         # saving the dynamic link info to CSV
-        if eof.options.dynamic_link_csv is not None:
+        if (eof.options.dynamic_link_csv is not None
+                and self.ExportPool().jobs == 1
+                and eof.options.shard_timesteps is None
+                and not eof.options.stream):
             self.WriteDynamicLinkCSV(eof.options.dynamic_link_csv, 
-                    eof.Prolog, eof.Epilog['nPeriods'], eof.DynamicResults)
+                    eof.Prolog, len(eof.DynamicResults), eof.DynamicResults,
+                    eof.DynamicVariables, eof.DynamicPeriods,
+                    eof.DynamicLinks, eof.options.csv_precision)
+
+        # saving variables with a column for each node or link
+        if not eof.options.stream:
+            for name, csvname in self.WideCSVs(eof.options):
+                self.WriteWideCSV(eof, csvname, name)
+
+        # saving the dynamic results as .npy files
+        if eof.options.npy_dir is not None:
+            variables = [name for name, width in EOFTDecoder.Layout(
+                    eof.Prolog['nNodes'], eof.Prolog['nLinks'],
+                    eof.DynamicVariables)]
+            EOFTNpy.Write(eof.options.npy_dir, eof.Prolog,
+                    eof.DynamicResults, variables, eof.DynamicPeriods,
+                    eof.DynamicNodes, eof.DynamicLinks, eof.ResultCube)
+
+        # saving all the sections to an SQLite database
+        if eof.options.sqlite is not None:
+            print(_("Writing SQLite database: %s") % eof.options.sqlite)
+            variables = [name for name, width in EOFTDecoder.Layout(
+                    eof.Prolog['nNodes'], eof.Prolog['nLinks'],
+                    eof.DynamicVariables)]
+            rows, seconds = EOFTSqlite.Write(eof.options.sqlite, eof.Prolog,
+                    eof.EnergyUse, eof.Epilog,
+                    [eof.getLinkTypeText(t) for t in eof.Prolog['LinkType']],
+                    eof.DynamicResults, variables, eof.DynamicPeriods,
+                    eof.DynamicNodes, eof.DynamicLinks)
+            if eof.options.verbose:
+                print(_("Wrote %(rows)d rows to %(db)s in %(seconds).1f seconds (%(rate)d rows per second)")
+                        % {'rows': rows, 'db': eof.options.sqlite,
+                        'seconds': seconds,
+                        'rate': rows / max(seconds, 0.001)})
 
 
     def ReadEpilog(self, eof, f, d, progupdate):
@@ -745,6 +1441,10 @@ class InternalPlugin(EPANETOutputFilePlugin.EOFTPlugin):
     def FileClose(self, eof, progupdate):
         ''' Callback message: file has been closed. Progress 0-100. '''
         #print("%s:FileClose(%s)" % (self.__class__.__name__, eof))
+        self.WaitForExports()
+        if eof.Cache is not None:
+            # everything wanted from the cache file has been loaded
+            eof.Cache.Close()
 
 
 
@@ -0,0 +1,164 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool export of dynamic results as NumPy .npy files
+#
+# Each dynamic results variable read is written to its own VARIABLE.npy
+# file holding a (timesteps, nodes or links) array of little-endian 4-byte
+# floats, so other tools can memory map the results (eg. with
+# numpy.load(fname, mmap_mode='r')) instead of parsing CSV text.  The files
+# use version 1.0 of the .npy format and are written without NumPy.
+#
+# MANIFEST (manifest.json) in the same directory describes the files:
+#   Title               the 3 title lines from the prolog
+#   FlowUnitsOption, PressureUnitsOption, WaterQualityOption,
+#   ChemicalName, ChemicalConcentrationUnits
+#                       units and water quality from the prolog
+#   StartTime, ReportTimeStep, SimulationDuration
+#                       reporting period timing (seconds) from the prolog
+#   TimeSteps           timestep in the output file of each row
+#   Times               time (seconds) of each row
+#   NodeID, LinkID      ID of the node or link in each column
+#   Variables           for each variable: its Name, File, Shape, Dtype,
+#                       the IDs of its Columns ('NodeID' or 'LinkID') and
+#                       its Units ('' if not known)
+#
+
+import json
+import os
+import struct
+import sys
+from array import array
+
+import EOFTDecoder
+
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+NPY_DTYPE = '<f4'
+MANIFEST = 'manifest.json'
+
+
+def NpyHeader(shape):
+    ''' .npy format header for a C order array of NPY_DTYPE of shape '''
+    if len(shape) == 1:
+        shapetext = '(%d,)' % shape[0]
+    else:
+        shapetext = '(%s)' % ', '.join(['%d' % n for n in shape])
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %s, }" % (
+            NPY_DTYPE, shapetext)
+    # the data must start at a multiple of 64 bytes, after a newline
+    size = len(NPY_MAGIC) + 2 + len(header) + 1
+    header += ' ' * ((64 - size % 64) % 64) + '\n'
+    return NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin-1')
+
+
+def WriteValues(f, values):
+    ''' Write values (a NumPy array, an array('f') or any sequence of floats)
+        to f as little-endian 4-byte floats.
+    '''
+    if hasattr(values, 'dtype'):
+        if values.dtype != EOFTDecoder.numpy.dtype(NPY_DTYPE):
+            values = values.astype(NPY_DTYPE)
+        f.write(values.tostring())
+        return
+    if not isinstance(values, array) or values.typecode != 'f':
+        values = array('f', values)
+    elif sys.byteorder != 'little':
+        values = array('f', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    values.tofile(f)
+
+
+def _Text(s):
+    # IDs and titles are read as byte strings
+    if not isinstance(s, type(u'')):
+        s = s.decode('utf-8', 'replace')
+    return s
+
+
+def VariableUnits(Prolog, name):
+    ''' Units (or water quality) of dynamic results variable name '''
+    if name == 'NodePressure':
+        return Prolog['PressureUnitsOption']
+    if name == 'LinkFlow':
+        return Prolog['FlowUnitsOption']
+    if name in ['NodeWaterQuality', 'LinkAveWaterQuality']:
+        return Prolog['WaterQualityOption']
+    return ''
+
+
+def Write(dirname, Prolog, DynamicResults, variables, periods, nodes, links,
+        cube = None):
+    '''Write the dynamic results as .npy files with a manifest.
+    No return value.
+
+    Args:
+        dirname (string):       directory to write the files in (created if
+                                it does not exist)
+        Prolog (dictionary):    Prolog dictionary
+        DynamicResults (list):  dictionaries of results, one for each timestep
+        variables (list):       names of the variables to write
+        periods (list):         timestep in the file of each entry in
+                                DynamicResults
+        nodes (list):           index of each node read
+        links (list):           index of each link read
+        cube (ResultCube):      the store DynamicResults is a view of, if
+                                any, so each variable is written at once
+    '''
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    nPeriods = len(DynamicResults)
+    manifest = {
+        'Title': [_Text(Prolog['Title1']), _Text(Prolog['Title2']),
+                _Text(Prolog['Title3'])],
+        'FlowUnitsOption': _Text(Prolog['FlowUnitsOption']),
+        'PressureUnitsOption': _Text(Prolog['PressureUnitsOption']),
+        'WaterQualityOption': _Text(Prolog['WaterQualityOption']),
+        'ChemicalName': _Text(Prolog['ChemicalName']),
+        'ChemicalConcentrationUnits': _Text(Prolog['ChemicalConcentrationUnits']),
+        'StartTime': Prolog['StartTime'],
+        'ReportTimeStep': Prolog['ReportTimeStep'],
+        'SimulationDuration': Prolog['SimulationDuration'],
+        'TimeSteps': list(periods),
+        'Times': [Prolog['StartTime'] + i*Prolog['ReportTimeStep']
+                for i in periods],
+        'NodeID': [_Text(Prolog['NodeID'][j]) for j in nodes],
+        'LinkID': [_Text(Prolog['LinkID'][j]) for j in links],
+        'Variables': []
+    }
+
+    files = {}
+    try:
+        for name in variables:
+            if name in EOFTDecoder.NODE_VARIABLES:
+                shape = (nPeriods, len(nodes))
+                columns = 'NodeID'
+            else:
+                shape = (nPeriods, len(links))
+                columns = 'LinkID'
+            fname = name + '.npy'
+            files[name] = open(os.path.join(dirname, fname), 'wb')
+            files[name].write(NpyHeader(shape))
+            manifest['Variables'].append({'Name': name, 'File': fname,
+                    'Shape': list(shape), 'Dtype': NPY_DTYPE,
+                    'Columns': columns,
+                    'Units': _Text(VariableUnits(Prolog, name))})
+        if cube is not None:
+            for name in variables:
+                WriteValues(files[name], cube.Variables[name])
+        else:
+            for i in range(0, nPeriods):
+                d = DynamicResults[i]
+                for name in variables:
+                    WriteValues(files[name], d[name])
+    finally:
+        for f in files.values():
+            f.close()
+
+    f = open(os.path.join(dirname, MANIFEST), 'w')
+    try:
+        json.dump(manifest, f, indent=1, sort_keys=True,
+                separators=(',', ': '))
+        f.write('\n')
+    finally:
+        f.close()
@@ -0,0 +1,194 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool profiling of the steps of reading a file
+#
+# With --profile (or --profile_json), each message the coordinator sends to
+# the internal plugin and to each user plugin (PrologRead, DynamicResultsPrint,
+# DynamicResultsExport, ...) is timed, so a slow run can be put down to
+# decoding, formatting or a plugin.  For each plugin and step it records:
+#   Calls               number of times it was called
+#   WallSeconds         elapsed time
+#   CPUSeconds          user and system CPU time of this process
+#   BytesRead           how far the position of the file being read moved
+#                       (the size of the section for the read steps; the
+#                       --jobs, --mmap and --stream readers use their own file,
+#                       but leave it at the end of the dynamic results)
+#   PeakMemoryKB        growth of the peak memory use (resident set size) of
+#                       the process, or None where that is not available
+#                       (it needs the resource module, so not on Windows)
+#
+
+import json
+import os
+import sys
+import time
+
+_hasResource = True
+try:
+    import resource
+except ImportError:
+    _hasResource = False
+
+
+def CPUTime():
+    ''' User and system CPU time (seconds) used by this process '''
+    t = os.times()
+    return t[0] + t[1]
+
+
+def PeakMemory():
+    ''' Peak resident set size (KB) of this process or None if not known '''
+    if not _hasResource:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # bytes rather than KB
+        peak = peak // 1024
+    return peak
+
+
+class Step(object):
+    ''' Totals for one plugin's method '''
+
+    def __init__(self, plugin, name):
+        self.Plugin = plugin
+        self.Name = name
+        self.Calls = 0
+        self.WallSeconds = 0.0
+        self.CPUSeconds = 0.0
+        self.BytesRead = 0
+        self.PeakMemoryKB = None
+
+    def Dictionary(self):
+        return {'Plugin': self.Plugin, 'Step': self.Name,
+                'Calls': self.Calls, 'WallSeconds': self.WallSeconds,
+                'CPUSeconds': self.CPUSeconds, 'BytesRead': self.BytesRead,
+                'PeakMemoryKB': self.PeakMemoryKB}
+
+
+class Profile(object):
+    ''' Time taken by each step of reading an output file (see
+        EPANETOutputFile.Profile), in the order they were first called.
+    '''
+
+    def __init__(self, eof):
+        '''Constructor: start profiling
+
+        Args:
+            eof (EPANETOutputFile): the file being read, whose file eof.f
+                                    (once it is open) gives the bytes read
+        '''
+        self.eof = eof
+        self.steps = []
+        self.lookup = {}
+        self.start = time.time()
+        self.startcpu = CPUTime()
+        self.startmemory = PeakMemory()
+        self.end = None
+
+    def _Position(self):
+        # position of the file being read, or None if it is not open
+        f = getattr(self.eof, 'f', None)
+        if f is None:
+            return None
+        try:
+            return f.tell()
+        except ValueError:
+            # closed
+            return None
+
+    def Call(self, plugin, name, method, *args):
+        '''Call method(*args), adding the time taken and so on to the totals
+        of step name of plugin.  No return value.
+
+        Args:
+            plugin (string):    name of the plugin (eg. its class name)
+            name (string):      name of the step (the message's method name)
+            method (function):  what to call
+        '''
+        key = (plugin, name)
+        step = self.lookup.get(key)
+        if step is None:
+            step = self.lookup[key] = Step(plugin, name)
+            self.steps.append(step)
+        position = self._Position()
+        memory = PeakMemory()
+        cpu = CPUTime()
+        start = time.time()
+        try:
+            method(*args)
+        finally:
+            step.WallSeconds += time.time() - start
+            step.CPUSeconds += CPUTime() - cpu
+            step.Calls += 1
+            after = self._Position()
+            if (position is not None and after is not None
+                    and after > position):
+                step.BytesRead += after - position
+            if memory is not None:
+                step.PeakMemoryKB = ((step.PeakMemoryKB or 0)
+                        + PeakMemory() - memory)
+
+    def Stop(self):
+        ''' Stop profiling: the totals are for the time until now '''
+        self.end = time.time()
+        self.endcpu = CPUTime()
+        self.endmemory = PeakMemory()
+
+    def Steps(self):
+        ''' (list) dictionary of the totals of each step (see Step.Dictionary) '''
+        return [step.Dictionary() for step in self.steps]
+
+    def Total(self):
+        ''' (dictionary) totals from the start to Stop (or now) '''
+        if self.end is None:
+            end, endcpu, endmemory = time.time(), CPUTime(), PeakMemory()
+        else:
+            end, endcpu, endmemory = self.end, self.endcpu, self.endmemory
+        memory = None
+        if self.startmemory is not None:
+            memory = endmemory - self.startmemory
+        return {'WallSeconds': end - self.start,
+                'CPUSeconds': endcpu - self.startcpu,
+                'BytesRead': sum([step.BytesRead for step in self.steps]),
+                'PeakMemoryKB': memory}
+
+    def Json(self):
+        ''' The totals as JSON text '''
+        return json.dumps({'Steps': self.Steps(), 'Total': self.Total()},
+                indent=1, sort_keys=True, separators=(',', ': '))
+
+    def Report(self, headings):
+        '''The totals as a table, one row for each step.
+
+        Args:
+            headings (list):    (translated) headings of the columns: plugin,
+                                step, calls, wall seconds, CPU seconds, bytes
+                                read, peak memory KB and the text of the
+                                total row
+
+        Returns:
+            (string) the table, with its rows separated by newlines
+        '''
+        rows = [[step.Plugin, step.Name, '%d' % step.Calls,
+                '%.3f' % step.WallSeconds, '%.3f' % step.CPUSeconds,
+                '%d' % step.BytesRead, self._Memory(step.PeakMemoryKB)]
+                for step in self.steps]
+        total = self.Total()
+        rows.append([headings[7], '', '', '%.3f' % total['WallSeconds'],
+                '%.3f' % total['CPUSeconds'], '%d' % total['BytesRead'],
+                self._Memory(total['PeakMemoryKB'])])
+        rows.insert(0, list(headings[:7]))
+        widths = [max([len(row[k]) for row in rows])
+                for k in range(0, len(rows[0]))]
+        lines = []
+        for row in rows:
+            cells = ['%-*s' % (widths[0], row[0]), '%-*s' % (widths[1], row[1])]
+            cells += ['%*s' % (widths[k], row[k]) for k in range(2, len(row))]
+            lines.append('  '.join(cells).rstrip())
+        return '\n'.join(lines)
+
+    def _Memory(self, kb):
+        if kb is None:
+            return '-'
+        return '%d' % kb
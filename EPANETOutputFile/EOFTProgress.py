@@ -0,0 +1,181 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool progress of reading a file
+#
+# The progress of reading a file (see EPANETOutputFile.readFile) is divided
+# between its sections in proportion to their size in bytes, so it moves
+# steadily however big the dynamic results are compared with the rest of
+# the file.  Within a section, each step (reading, printing and exporting
+# it, by the internal plugin then the user plugins) has a fixed part of its
+# range (see StepLimits).
+#
+# The progress object given to EPANETOutputFile is wrapped in a Progress,
+# which only passes on updates at a limited rate (--progress_rate), so a
+# dialog is not repainted for every timestep of a big file, and works out
+# the throughput and the time left.  With --progress and no progress
+# object, a TextProgress displays them on the standard error instead.
+#
+
+import sys
+import time
+
+# the range of the progress (0-100) of reading the sections of a file:
+# before FIRST the file is opened and checked and after LAST it is closed
+FIRST = 10
+LAST = 97
+
+SECTIONS = ['Prolog', 'EnergyUse', 'DynamicResults', 'Epilog']
+
+# the relative part of the range of a section given to each of its steps:
+# read by the internal plugin, read by the user plugins, printed (internal,
+# user) and exported (internal, user)
+STEP_WEIGHTS = [6, 1, 1, 1, 2, 1]
+
+# default maximum number of updates passed on each second
+DEFAULT_RATE = 10
+
+
+def StepLimits(layout):
+    '''Progress limits of the steps of reading each section of a file.
+
+    Args:
+        layout (dictionary):    section offsets and sizes (see
+                                EOFTDecoder.FileLayout)
+
+    Returns:
+        (dictionary) for each name in SECTIONS, the list of the
+        (rangemin, rangemax) of each of its steps (see STEP_WEIGHTS)
+    '''
+    scale = float(LAST - FIRST) / float(layout['FileSize'])
+    weights = float(sum(STEP_WEIGHTS))
+    limits = {}
+    for name in SECTIONS:
+        start = FIRST + scale*layout[name + 'Offset']
+        size = scale*layout[name + 'Size']
+        steps = []
+        done = 0
+        for weight in STEP_WEIGHTS:
+            steps.append((start + size*done/weights,
+                    start + size*(done + weight)/weights))
+            done += weight
+        limits[name] = steps
+    return limits
+
+
+def FormatSeconds(seconds):
+    ''' seconds as H:MM:SS '''
+    seconds = int(seconds + 0.5)
+    return '%d:%02d:%02d' % (seconds // 3600, (seconds // 60) % 60,
+            seconds % 60)
+
+
+class Progress(object):
+    ''' Progress of reading a file, passed on to a progress object with 2
+        functions at no more than rate updates each second:
+            progress.SetStepLimits(rangemin, rangemax)
+            progress.Update(% of work done (0-100), text description of current step)
+        It has the same functions and its rangemin and rangemax, so it can
+        be used in its place.
+    '''
+
+    def __init__(self, progress, filesize, rate = DEFAULT_RATE):
+        '''Constructor: start timing
+
+        Args:
+            progress (None or progress object): what to pass the updates to
+            filesize (int):     size of the file being read in bytes
+            rate (float):       maximum number of updates passed on each
+                                second (0 for no limit)
+        '''
+        self.progress = progress
+        self.filesize = filesize
+        self.interval = 0.0
+        if rate > 0:
+            self.interval = 1.0 / rate
+        self.rangemin = 0
+        self.rangemax = 100
+        self.value = 0
+        self.start = time.time()
+        # time before which updates are not passed on
+        self.due = 0.0
+
+    def SetStepLimits(self, rangemin, rangemax):
+        self.rangemin = rangemin
+        self.rangemax = rangemax
+        if self.progress is not None:
+            self.progress.SetStepLimits(rangemin, rangemax)
+
+    def Update(self, value, newmsg = None):
+        ''' value % of the current step is done: pass it on if it is due '''
+        now = time.time()
+        if now < self.due:
+            return
+        self.due = now + self.interval
+        self.value = value
+        self.Show(value, newmsg)
+
+    def Finish(self, newmsg = None):
+        ''' Reading the file is done: always passed on '''
+        self.SetStepLimits(LAST, 100)
+        self.value = 100
+        self.Show(100, newmsg)
+
+    def Show(self, value, newmsg):
+        if self.progress is not None:
+            self.progress.Update(value, newmsg)
+
+    def Percent(self):
+        ''' (float) progress of reading the file (0-100) '''
+        value = max(0, min(100, self.value))
+        return self.rangemin + value*(self.rangemax - self.rangemin)/100.0
+
+    def Fraction(self):
+        # fraction of the sections of the file done
+        return max(0.0, min(1.0,
+                (self.Percent() - FIRST) / float(LAST - FIRST)))
+
+    def BytesDone(self):
+        ''' (int) bytes of the file done, from the progress '''
+        return int(self.Fraction()*self.filesize)
+
+    def BytesPerSecond(self):
+        ''' (float) throughput so far in bytes per second '''
+        seconds = time.time() - self.start
+        if seconds <= 0:
+            return 0.0
+        return self.BytesDone() / seconds
+
+    def SecondsLeft(self):
+        ''' (float) estimate of the time left or None if not yet known '''
+        fraction = self.Fraction()
+        if fraction <= 0:
+            return None
+        return (time.time() - self.start)*(1.0 - fraction)/fraction
+
+
+class TextProgress(Progress):
+    ''' Progress displayed on a line of stream (with --progress) '''
+
+    def __init__(self, filesize, rate = DEFAULT_RATE, stream = None):
+        Progress.__init__(self, None, filesize, rate)
+        if stream is None:
+            stream = sys.stderr
+        self.stream = stream
+        self.width = 0
+
+    def Show(self, value, newmsg):
+        line = '%3d%% %s' % (int(self.Percent()), newmsg or '')
+        left = self.SecondsLeft()
+        if left is not None:
+            line += ' [%s]' % (_('%(rate).1f MB/s, %(left)s left') %
+                    {'rate': self.BytesPerSecond()/1e6,
+                     'left': FormatSeconds(left)})
+        # overwrite the previous line
+        self.stream.write('\r' + line.ljust(self.width))
+        self.width = len(line)
+        self.stream.flush()
+
+    def Finish(self, newmsg = None):
+        Progress.Finish(self, newmsg)
+        self.stream.write('\n')
+        self.stream.flush()
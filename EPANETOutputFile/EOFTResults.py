@@ -0,0 +1,462 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool containers for dynamic results
+#
+# EPANETOutputFile.DynamicResults has always been a list with one dictionary
+# for each reporting period, keyed by variable name (see
+# EOFTDecoder.NODE_VARIABLES and EOFTDecoder.LINK_VARIABLES), so callers
+# use it as:
+#
+#   eof.DynamicResults[i]['NodePressure'][j]
+#
+# The sequence classes here provide the same interface, but build each
+# period's dictionary only when it is first indexed.  Dictionaries are
+# kept once built, so plugins can still add their own entries to them
+# (eg. the demo plugin's 'demo_' statistics).  A MappedDynamicResults only
+# keeps the MAPPED_PERIODS most recently used, as the values in each are
+# decoded copies: when one is built again, the entries which plugins added
+# are put back into it (but changes to the values of the variables are
+# lost).
+#
+# Results read into memory are stored in a ResultCube which holds one
+# contiguous float32 array per variable, so both a whole period (row) and
+# the time series for one node or link (column) can be taken directly:
+#
+#   eof.ResultCube.Row('NodePressure', i)      pressures at all nodes at period i
+#   eof.ResultCube.Column('NodePressure', j)   pressure at node j over all periods
+#
+# With NumPy the arrays are 2-dimensional (nPeriods, nNodes or nLinks) and
+# rows and columns are views.  Without NumPy they are flat array('f')
+# buffers in period order and rows and columns are array slices.
+#
+# Only the variables selected when reading (see
+# EOFTDecoder.SelectVariables) are stored; their names are listed in the
+# variables attribute of the cube and the sequences here.  Similarly, only
+# the reporting periods selected (see EOFTDecoder.SelectPeriods) may be
+# stored, so index i in the cube or a sequence is reporting period
+# Periods[i] in the file, and only the selected nodes and links (see
+# EOFTDecoder.SelectIDs), so column j is node Nodes[j] or link Links[j].
+#
+# With compact set, the period dictionaries built from a ResultCube with
+# the array engine hold ArrayRow views of the cube instead of copies, and
+# MappedDynamicResults keeps array('f') slices instead of lists of floats.
+#
+# A PeriodStream does not store the results at all: it reads the periods
+# in order into one reused buffer and gives them out one at a time, so
+# the memory used is the same however many periods the file has.
+#
+
+import collections
+import mmap
+import os
+from array import array
+
+import EOFTDecoder
+
+# number of period dictionaries kept by a MappedDynamicResults
+MAPPED_PERIODS = 8
+
+
+class DynamicResultsSequence(object):
+    ''' Read-only sequence of dynamic results dictionaries, one per period.
+
+        Subclasses implement BuildPeriod(i) to create the dictionary for
+        period i the first time it is used.  Only the keep most recently
+        used dictionaries are kept (all of them if keep is None); the
+        entries other than the variables are kept for the others.
+    '''
+
+    def __init__(self, nPeriods, variables, periods, keep = None):
+        self.nPeriods = nPeriods
+        # names of the variables in each period's dictionary
+        self.variables = variables
+        # index in the file of each reporting period in the sequence
+        self.Periods = periods
+        self.keep = keep
+        self._periods = collections.OrderedDict()
+        # entries added by plugins to the dictionaries not kept
+        self._extras = {}
+
+    def __len__(self):
+        return self.nPeriods
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.nPeriods))]
+        if i < 0:
+            i += self.nPeriods
+        if i < 0 or i >= self.nPeriods:
+            raise IndexError(_('dynamic results period index out of range'))
+        d = self._periods.pop(i, None)
+        if d is None:
+            d = self.BuildPeriod(i)
+            d.update(self._extras.pop(i, {}))
+            if self.keep is not None and len(self._periods) >= self.keep:
+                # forget the least recently used but what was added to it
+                j, old = self._periods.popitem(last = False)
+                extras = dict([(name, value) for name, value in old.items()
+                        if name not in self.variables])
+                if len(extras) > 0:
+                    self._extras[j] = extras
+        self._periods[i] = d
+        return d
+
+    def __iter__(self):
+        for i in range(0, self.nPeriods):
+            yield self[i]
+
+    def BuildPeriod(self, i):
+        ''' Return a new dictionary of results for period i '''
+        raise NotImplementedError
+
+    def Close(self):
+        ''' Release any resources held by the sequence '''
+        pass
+
+
+class MappedDynamicResults(DynamicResultsSequence):
+    ''' Dynamic results decoded on demand from a memory-mapped output file.
+
+        Opening is immediate whatever the size of the file: nothing is
+        read from the dynamic results section until a period is indexed
+        and only the MAPPED_PERIODS most recently used are kept decoded in
+        memory.
+    '''
+
+    def __init__(self, fname, offset, nPeriods, nNodes, nLinks,
+            decoder = EOFTDecoder.DECODER_AUTO, variables = None,
+            periods = None, nodes = None, links = None, compact = False):
+        '''Constructor: map the dynamic results section of an output file
+
+        Args:
+            fname (string):     name of EPANET output file
+            offset (int):       file position of the start of the dynamic results
+            nPeriods (int):     number of time steps in simulation
+            nNodes (int):       number of nodes in the network
+            nLinks (int):       number of links in the network
+            decoder (string):   decoding engine to use (see EOFTDecoder.DECODERS)
+            variables (list):   names of the variables to decode or None for all
+                                (see EOFTDecoder.SelectVariables)
+            periods (list):     indexes of the periods to include or None for all
+                                (see EOFTDecoder.SelectPeriods)
+            nodes (list):       indexes of the nodes to include or None for all
+                                (see EOFTDecoder.SelectIDs)
+            links (list):       indexes of the links to include or None for all
+            compact (bool):     keep array('f') slices rather than lists with
+                                the array engine
+
+        Raises:
+            Exception if the file is too short to hold nPeriods periods
+        '''
+        if periods is None:
+            periods = range(0, nPeriods)
+        self.layout = EOFTDecoder.Layout(nNodes, nLinks, variables,
+                nodes, links)
+        DynamicResultsSequence.__init__(self, len(periods),
+                [name for name, width in self.layout], periods,
+                MAPPED_PERIODS)
+        self.nNodes = nNodes
+        self.nLinks = nLinks
+        if nodes is None:
+            nodes = range(0, nNodes)
+        self.Nodes = nodes
+        if links is None:
+            links = range(0, nLinks)
+        self.Links = links
+        self.offset = offset
+        self.periodsize = EOFTDecoder.PeriodSize(nNodes, nLinks)
+        self.runs = EOFTDecoder.PeriodRuns(nNodes, nLinks, variables,
+                nodes, links)
+        self.engine = EOFTDecoder.GetDecoder(decoder)
+        self.compact = compact
+        if os.path.getsize(fname) < offset + nPeriods*self.periodsize:
+            raise Exception(_('ERROR: output file is too short to contain %d reporting periods') % nPeriods)
+        self.f = open(fname, 'rb')
+        self.map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def BuildPeriod(self, i):
+        start = self.offset + self.Periods[i]*self.periodsize
+        buf = b''.join([self.map[start+offset:start+offset+size]
+                for offset, size in self.runs])
+        return EOFTDecoder.DecodePeriods(buf, 1, self.layout, self.engine,
+                self.compact)[0]
+
+    def Close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+class ResultCube(object):
+    ''' Columnar store of dynamic results: one float32 array per variable
+        with one row per period and one column per node or link.
+    '''
+
+    def __init__(self, nPeriods, nNodes, nLinks,
+            decoder = EOFTDecoder.DECODER_AUTO, variables = None,
+            periods = None, nodes = None, links = None, compact = False):
+        '''Constructor: allocate an empty store for nPeriods periods
+
+        Args:
+            nPeriods (int):     number of time steps to store
+            nNodes (int):       number of nodes in the network
+            nLinks (int):       number of links in the network
+            decoder (string):   decoding engine to use (see EOFTDecoder.DECODERS)
+            variables (list):   names of the variables to store or None for all
+                                (see EOFTDecoder.SelectVariables)
+            periods (list):     index in the file of each of the nPeriods time
+                                steps stored or None for the first nPeriods
+                                (see EOFTDecoder.SelectPeriods)
+            nodes (list):       indexes of the nodes to store or None for all
+                                (see EOFTDecoder.SelectIDs)
+            links (list):       indexes of the links to store or None for all
+            compact (bool):     make period dictionaries (see RowView) from
+                                views instead of copies of the rows
+        '''
+        self.nPeriods = nPeriods
+        self.compact = compact
+        if periods is None:
+            periods = range(0, nPeriods)
+        self.Periods = periods
+        self.nNodes = nNodes
+        self.nLinks = nLinks
+        # index in the file of the node or link in each column
+        if nodes is None:
+            nodes = range(0, nNodes)
+        self.Nodes = nodes
+        if links is None:
+            links = range(0, nLinks)
+        self.Links = links
+        self.engine = EOFTDecoder.GetDecoder(decoder)
+        # number of periods stored so far
+        self.nFilled = 0
+        # (name, width) of each stored variable block in a period, in file
+        # order; only these arrays are allocated
+        self.layout = EOFTDecoder.Layout(nNodes, nLinks, variables,
+                nodes, links)
+        self.variables = [name for name, width in self.layout]
+        self.Variables = {}
+        for name, width in self.layout:
+            if self.engine == EOFTDecoder.DECODER_NUMPY:
+                self.Variables[name] = EOFTDecoder.numpy.empty(
+                        (nPeriods, width), dtype=EOFTDecoder.numpy.float32)
+            else:
+                self.Variables[name] = array('f')
+
+    def Width(self, name):
+        ''' Number of columns (nodes or links) for variable name '''
+        if name in EOFTDecoder.NODE_VARIABLES:
+            return len(self.Nodes)
+        return len(self.Links)
+
+    def AppendPeriods(self, buf, nPeriods):
+        '''Decode consecutive periods read from the file and store them.
+
+        Args:
+            buf (string):   bytes read for nPeriods periods holding only the
+                            blocks of the stored variables
+                            (see EOFTDecoder.ReadPeriodRuns)
+            nPeriods (int): number of periods in buf
+        '''
+        if len(buf) == 0:
+            # no variables, nodes or links selected
+            self.nFilled += nPeriods
+            return
+        values = EOFTDecoder.DecodeFloats(buf, self.engine)
+        if self.engine == EOFTDecoder.DECODER_NUMPY:
+            # copy each variable's block for all the periods at once
+            block = values.reshape(nPeriods, -1)
+            first = self.nFilled
+            pos = 0
+            for name, width in self.layout:
+                self.Variables[name][first:first+nPeriods] = block[:, pos:pos+width]
+                pos += width
+        else:
+            pos = 0
+            for i in range(0, nPeriods):
+                for name, width in self.layout:
+                    self.Variables[name].extend(values[pos:pos+width])
+                    pos += width
+        self.nFilled += nPeriods
+
+    def SetColumns(self, columns):
+        '''Store all the periods at once instead of appending them.
+
+        Args:
+            columns (dictionary):   for each stored variable, its values for
+                                    all nPeriods periods stored the same way
+                                    as Variables (eg. see EOFTCache.CacheEntry.Column)
+        '''
+        for name, width in self.layout:
+            self.Variables[name] = columns[name]
+        self.nFilled = self.nPeriods
+
+    def Row(self, name, i):
+        ''' Values of variable name for all nodes or links at period i '''
+        values = self.Variables[name]
+        if self.engine == EOFTDecoder.DECODER_NUMPY:
+            return values[i]
+        width = self.Width(name)
+        return values[i*width:(i+1)*width]
+
+    def RowView(self, name, i):
+        ''' Row(name, i) without copying the values from the cube '''
+        if self.engine == EOFTDecoder.DECODER_NUMPY:
+            return self.Variables[name][i]
+        width = self.Width(name)
+        return ArrayRow(self.Variables[name], i*width, width)
+
+    def Column(self, name, j):
+        ''' Values of variable name for node or link j over all periods '''
+        values = self.Variables[name]
+        if self.engine == EOFTDecoder.DECODER_NUMPY:
+            return values[:, j]
+        return values[j::self.Width(name)]
+
+    def Value(self, name, i, j):
+        ''' Value of variable name for node or link j at period i '''
+        if self.engine == EOFTDecoder.DECODER_NUMPY:
+            return self.Variables[name][i, j]
+        return self.Variables[name][i*self.Width(name) + j]
+
+
+class CubeDynamicResults(DynamicResultsSequence):
+    ''' Compatibility view of a ResultCube as the DynamicResults list.
+
+        Each period's dictionary holds the cube rows for that period.
+    '''
+
+    def __init__(self, cube):
+        DynamicResultsSequence.__init__(self, cube.nPeriods, cube.variables,
+                cube.Periods)
+        self.cube = cube
+
+    def BuildPeriod(self, i):
+        TimeStepD = {}
+        for name, width in self.cube.layout:
+            if self.cube.compact:
+                TimeStepD[name] = self.cube.RowView(name, i)
+            else:
+                TimeStepD[name] = self.cube.Row(name, i)
+        return TimeStepD
+
+
+class ArrayRow(object):
+    ''' Read-only view of width values of a flat array starting at start,
+        used for the rows of a compact ResultCube without NumPy.
+    '''
+
+    __slots__ = ['values', 'start', 'width']
+
+    def __init__(self, values, start, width):
+        self.values = values
+        self.start = start
+        self.width = width
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, j):
+        if isinstance(j, slice):
+            return [self[k] for k in range(*j.indices(self.width))]
+        if j < 0:
+            j += self.width
+        if j < 0 or j >= self.width:
+            raise IndexError(_('row index out of range'))
+        return self.values[self.start + j]
+
+    def __iter__(self):
+        values = self.values
+        for k in range(self.start, self.start + self.width):
+            yield values[k]
+
+    def index(self, value):
+        ''' Index of the first value equal to value '''
+        for j, v in enumerate(self):
+            if v == value:
+                return j
+        raise ValueError(_('value not in row'))
+
+    def tolist(self):
+        ''' Copy of the values as a list '''
+        return self.values[self.start:self.start+self.width].tolist()
+
+
+class PeriodStream(object):
+    ''' Dynamic results read one period at a time into a reused buffer.
+
+        Iterating gives (i, TimeStepD) for each period in turn, where i is
+        the index in Periods of the reporting period and TimeStepD is its
+        dictionary of results.  The buffer (and with NumPy, the dictionary
+        and its arrays) is overwritten by the next period, so copy any
+        values which are needed later.
+    '''
+
+    def __init__(self, f, offset, nPeriods, nNodes, nLinks,
+            decoder = EOFTDecoder.DECODER_AUTO, variables = None,
+            periods = None, nodes = None, links = None):
+        '''Constructor: prepare to stream the dynamic results of an open file
+
+        Args:
+            f (file):           output file opened for reading in binary mode
+            offset (int):       file position of the start of the dynamic results
+            nPeriods (int):     number of time steps in simulation
+            nNodes (int):       number of nodes in the network
+            nLinks (int):       number of links in the network
+            decoder (string):   decoding engine to use (see EOFTDecoder.DECODERS)
+            variables (list):   names of the variables to decode or None for all
+                                (see EOFTDecoder.SelectVariables)
+            periods (list):     indexes of the periods to include or None for all
+                                (see EOFTDecoder.SelectPeriods)
+            nodes (list):       indexes of the nodes to include or None for all
+                                (see EOFTDecoder.SelectIDs)
+            links (list):       indexes of the links to include or None for all
+        '''
+        if periods is None:
+            periods = range(0, nPeriods)
+        self.f = f
+        self.offset = offset
+        self.nPeriods = len(periods)
+        self.Periods = periods
+        if nodes is None:
+            nodes = range(0, nNodes)
+        self.Nodes = nodes
+        if links is None:
+            links = range(0, nLinks)
+        self.Links = links
+        self.layout = EOFTDecoder.Layout(nNodes, nLinks, variables,
+                nodes, links)
+        self.variables = [name for name, width in self.layout]
+        self.periodsize = EOFTDecoder.PeriodSize(nNodes, nLinks)
+        self.runs = EOFTDecoder.PeriodRuns(nNodes, nLinks, variables,
+                nodes, links)
+        self.engine = EOFTDecoder.GetDecoder(decoder)
+        self.buf = bytearray(sum([size for offset, size in self.runs]))
+        self.TimeStepD = None
+        if self.engine == EOFTDecoder.DECODER_NUMPY and len(self.buf) > 0:
+            # views of the buffer, so reading a period updates them
+            self.TimeStepD = EOFTDecoder.DecodePeriods(self.buf, 1,
+                    self.layout, self.engine)[0]
+
+    def __len__(self):
+        return self.nPeriods
+
+    def __iter__(self):
+        i = 0
+        for first, count in EOFTDecoder.Consecutive(self.Periods):
+            self.f.seek(self.offset + first*self.periodsize)
+            for n in range(0, count):
+                EOFTDecoder.ReadPeriodInto(self.f, self.buf,
+                        self.periodsize, self.runs)
+                if self.TimeStepD is not None:
+                    yield i, self.TimeStepD
+                elif len(self.buf) == 0:
+                    # no variables, nodes or links selected
+                    yield i, dict([(name, []) for name, width in self.layout])
+                else:
+                    yield i, EOFTDecoder.DecodePeriods(bytes(self.buf), 1,
+                            self.layout, self.engine)[0]
+                i += 1
@@ -0,0 +1,221 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# EPANET Output File Tool export to an SQLite database
+#
+# The database (replaced if it exists) has these tables:
+#   Info        Section ('Prolog' or 'Epilog'), Name, Value for each single
+#               value in the prolog and epilog (titles, units, times, counts)
+#   Nodes       NodeIndex, ID, Type, Elevation, XSectArea
+#   Links       LinkIndex, ID, StartNodeIndex, EndNodeIndex, Type, Length,
+#               Diameter
+#   EnergyUse   LinkIndex of each pump, Utilization, AveEfficiency,
+#               AvekWPerVol, AvekW, PeakkW, AveCostPerDay
+#   TimeSteps   TimeStep, Time (seconds) of each timestep read
+#   NodeResults NodeIndex, TimeStep and a column for each node variable read
+#               (NodeDemand, NodeHead, NodePressure, NodeWaterQuality)
+#   LinkResults LinkIndex, TimeStep and a column for each link variable read
+#               (LinkFlow, ..., LinkFrictionFactor)
+# NodeIndex and LinkIndex are the 0-based indexes of the nodes and links in
+# the output file.  Only the nodes, links and timesteps read have results.
+#
+# The rows are inserted with executemany() in batches of SQLITE_BATCH rows,
+# all in one transaction, and the indexes of the results by (NodeIndex,
+# TimeStep) and (LinkIndex, TimeStep) are made once they are loaded.
+#
+
+import os
+import time
+
+_hasSqlite = True
+try:
+    import sqlite3
+except ImportError:
+    _hasSqlite = False
+
+import EOFTDecoder
+
+
+# rows passed to each executemany()
+SQLITE_BATCH = 50000
+
+
+def _Text(s):
+    # IDs and titles are read as byte strings
+    if not isinstance(s, type(u'')):
+        s = s.decode('utf-8', 'replace')
+    return s
+
+
+def _Values(values):
+    # NumPy or array('f') values as Python floats
+    if hasattr(values, 'tolist'):
+        return values.tolist()
+    return values
+
+
+def _IsSingle(value):
+    # not one of the prolog arrays
+    return not (isinstance(value, (list, tuple, dict))
+            or hasattr(value, 'typecode') or hasattr(value, 'dtype'))
+
+
+class Loader(object):
+    ''' Inserts rows into a table in batches, counting them '''
+
+    def __init__(self, db, table, columns):
+        self.db = db
+        self.sql = 'INSERT INTO %s (%s) VALUES (%s)' % (table,
+                ', '.join(columns), ', '.join(['?']*len(columns)))
+        self.rows = []
+        self.count = 0
+
+    def Add(self, rows):
+        ''' Insert rows (a list of tuples) '''
+        self.rows.extend(rows)
+        if len(self.rows) >= SQLITE_BATCH:
+            self.Flush()
+
+    def Flush(self):
+        if len(self.rows) > 0:
+            self.db.executemany(self.sql, self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def Write(dbname, Prolog, EnergyUse, Epilog, linktypes, DynamicResults,
+        variables, periods, nodes, links):
+    '''Write the file sections to SQLite database dbname.
+
+    Args:
+        dbname (string):        name of the database file (replaced if it
+                                exists)
+        Prolog (dictionary):    Prolog dictionary
+        EnergyUse (dictionary): EnergyUse dictionary
+        Epilog (dictionary):    Epilog dictionary
+        linktypes (list):       text of the type of each link
+        DynamicResults (list):  dictionaries of results, one for each timestep
+        variables (list):       names of the variables read
+        periods (list):         timestep in the file of each entry in
+                                DynamicResults
+        nodes (list):           index of each node read
+        links (list):           index of each link read
+
+    Returns:
+        (rows, seconds) the number of rows written and the time taken
+
+    Raises:
+        Exception if sqlite3 is not available
+    '''
+    if not _hasSqlite:
+        raise Exception(_('ERROR: writing an SQLite database needs the sqlite3 module'))
+    started = time.time()
+    if os.path.exists(dbname):
+        os.remove(dbname)
+    nodevariables = [name for name in EOFTDecoder.NODE_VARIABLES
+            if name in variables]
+    linkvariables = [name for name in EOFTDecoder.LINK_VARIABLES
+            if name in variables]
+    db = sqlite3.connect(dbname)
+    try:
+        # a new file, so there is nothing to protect while it is loaded
+        db.execute('PRAGMA synchronous = OFF')
+        db.execute('PRAGMA journal_mode = MEMORY')
+        db.execute('CREATE TABLE Info (Section TEXT, Name TEXT, Value)')
+        db.execute('CREATE TABLE Nodes (NodeIndex INTEGER PRIMARY KEY, '
+                'ID TEXT, Type TEXT, Elevation REAL, XSectArea REAL)')
+        db.execute('CREATE TABLE Links (LinkIndex INTEGER PRIMARY KEY, '
+                'ID TEXT, StartNodeIndex INTEGER, EndNodeIndex INTEGER, '
+                'Type TEXT, Length REAL, Diameter REAL)')
+        db.execute('CREATE TABLE EnergyUse (LinkIndex INTEGER, '
+                'Utilization REAL, AveEfficiency REAL, AvekWPerVol REAL, '
+                'AvekW REAL, PeakkW REAL, AveCostPerDay REAL)')
+        db.execute('CREATE TABLE TimeSteps (TimeStep INTEGER PRIMARY KEY, '
+                'Time INTEGER)')
+        db.execute('CREATE TABLE NodeResults (NodeIndex INTEGER, '
+                'TimeStep INTEGER%s)'
+                % ''.join([', %s REAL' % name for name in nodevariables]))
+        db.execute('CREATE TABLE LinkResults (LinkIndex INTEGER, '
+                'TimeStep INTEGER%s)'
+                % ''.join([', %s REAL' % name for name in linkvariables]))
+        count = 0
+
+        loader = Loader(db, 'Info', ['Section', 'Name', 'Value'])
+        for section, d in [('Prolog', Prolog), ('Epilog', Epilog)]:
+            for name in sorted(d.keys()):
+                value = d[name]
+                if not _IsSingle(value):
+                    continue
+                if isinstance(value, (type(''), type(u''))):
+                    value = _Text(value)
+                loader.Add([(section, name, value)])
+        loader.Flush()
+        count += loader.count
+
+        loader = Loader(db, 'Nodes', ['NodeIndex', 'ID', 'Type', 'Elevation',
+                'XSectArea'])
+        for i in range(0, Prolog['nNodes']):
+            area = 0.0
+            j = Prolog['NodeTankResIndex'][i]
+            if j == -1:
+                nodetype = 'Junction'
+            elif Prolog['TankResXSectArea'][j] == 0.0:
+                nodetype = 'Reservoir'
+            else:
+                nodetype = 'Tank'
+                area = Prolog['TankResXSectArea'][j]
+            loader.Add([(i, _Text(Prolog['NodeID'][i]), nodetype,
+                    Prolog['NodeElev'][i], area)])
+        loader.Flush()
+        count += loader.count
+
+        loader = Loader(db, 'Links', ['LinkIndex', 'ID', 'StartNodeIndex',
+                'EndNodeIndex', 'Type', 'Length', 'Diameter'])
+        loader.Add([(i, _Text(Prolog['LinkID'][i]), Prolog['LinkStart'][i],
+                Prolog['LinkEnd'][i], linktypes[i], Prolog['LinkLength'][i],
+                Prolog['LinkDiam'][i]) for i in range(0, Prolog['nLinks'])])
+        loader.Flush()
+        count += loader.count
+
+        loader = Loader(db, 'EnergyUse', ['LinkIndex', 'Utilization',
+                'AveEfficiency', 'AvekWPerVol', 'AvekW', 'PeakkW',
+                'AveCostPerDay'])
+        d = EnergyUse
+        loader.Add([(d['PumpIndex'][i], d['PumpUtilization'][i],
+                d['PumpAveEfficiency'][i], d['PumpAvekWPerVol'][i],
+                d['PumpAvekW'][i], d['PumpPeakkW'][i],
+                d['PumpAveCostPerDay'][i])
+                for i in range(0, Prolog['nPumps'])])
+        loader.Flush()
+        count += loader.count
+
+        loader = Loader(db, 'TimeSteps', ['TimeStep', 'Time'])
+        loader.Add([(i, Prolog['StartTime'] + i*Prolog['ReportTimeStep'])
+                for i in periods])
+        loader.Flush()
+        count += loader.count
+
+        nodeloader = Loader(db, 'NodeResults',
+                ['NodeIndex', 'TimeStep'] + nodevariables)
+        linkloader = Loader(db, 'LinkResults',
+                ['LinkIndex', 'TimeStep'] + linkvariables)
+        for n in range(0, len(periods)):
+            d = DynamicResults[n]
+            i = periods[n]
+            if len(nodes) > 0:
+                nodeloader.Add(zip(nodes, [i]*len(nodes),
+                        *[_Values(d[name]) for name in nodevariables]))
+            if len(links) > 0:
+                linkloader.Add(zip(links, [i]*len(links),
+                        *[_Values(d[name]) for name in linkvariables]))
+        nodeloader.Flush()
+        linkloader.Flush()
+        count += nodeloader.count + linkloader.count
+
+        db.execute('CREATE INDEX NodeResultsByNode ON NodeResults '
+                '(NodeIndex, TimeStep)')
+        db.execute('CREATE INDEX LinkResultsByLink ON LinkResults '
+                '(LinkIndex, TimeStep)')
+        db.commit()
+    finally:
+        db.close()
+    return count, time.time() - started
@@ -38,7 +38,112 @@
 #   -L DYNAMIC_LINK_CSV, --dynamic_link_csv=DYNAMIC_LINK_CSV
 #                         write CSV for links from dynamic results to
 #                         DYNAMIC_LINK_CSV
+#   --wide_csv=VARIABLE=WIDE_CSV
+#                         write CSV WIDE_CSV of dynamic results VARIABLE (eg.
+#                         NodePressure=pressure.csv) with a row for each
+#                         timestep and a column for each node or link; can be
+#                         given more than once
+#   --npy_dir=NPY_DIR     write each dynamic results variable to
+#                         NPY_DIR/VARIABLE.npy (4-byte floats, timesteps x nodes
+#                         or links) with NPY_DIR/manifest.json describing them
+#   --sqlite=DB           write the prolog, energy use, epilog and dynamic
+#                         results to tables in SQLite database DB (replaced if
+#                         it exists)
+#   --csv_precision=DIGITS
+#                         write the numbers in CSVs with DIGITS decimal places
+#                         (default 6)
+#   -o OUTPUT, --output=OUTPUT
+#                         write what is displayed to OUTPUT instead of the
+#                         standard output (compressed if OUTPUT ends in .gz,
+#                         .bz2 or .xz)
+#   --compress_level=LEVEL
+#                         compression LEVEL of the CSVs and OUTPUT written
+#                         compressed because their names end in .gz, .bz2 or .xz
+#                         (1-9 for .gz and .bz2, default 9; 0-9 for .xz, default
+#                         6)
+#   --compress_thread     compress the CSVs and OUTPUT in a background thread
+#                         while the text is formatted
+#   --export_jobs=JOBS    write the CSVs at the same time with JOBS processes
+#                         (default 1, 0 for one per CPU)
+#   --export_threads      with --export_jobs, write the CSVs with threads
+#                         instead of processes (as the GUI does, which must not
+#                         start processes)
+#   --shard_timesteps=TIMESTEPS
+#                         write the dynamic results CSVs in pieces of TIMESTEPS
+#                         timesteps, each by its own process with --export_jobs,
+#                         which are joined in order
+#   --shard_files         keep the pieces of the dynamic results CSVs as
+#                         separate CSVs, named by adding the piece number before
+#                         .csv (eg. NODES.0000.csv)
 #   -c, --coda, --epilog  display file epilog
+#   --decoder=DECODER     decode dynamic results using DECODER (auto, numpy or
+#                         array)
+#   --mmap                memory map dynamic results and only decode timesteps
+#                         when used
+#   --jobs=JOBS           read the dynamic results with JOBS processes (default
+#                         1, 0 for one per CPU)
+#   --compact             keep prolog arrays and dynamic results as arrays of
+#                         4-byte values instead of lists of Python numbers to
+#                         use less memory
+#   --cache               keep the decoded file in a cache file next to it
+#                         (FILENAME.eoftc) and load it from there when it has
+#                         not changed
+#   --cache_dir=CACHE_DIR
+#                         like --cache, but keep the cache files in CACHE_DIR
+#   --cache_size=CACHE_MB
+#                         limit the cache files in CACHE_DIR to CACHE_MB
+#                         megabytes in total, removing the least recently used
+#   --stream              pass each dynamic results timestep to the plugins and
+#                         the dynamic results CSVs as it is read without keeping
+#                         them, so memory use does not depend on the number of
+#                         timesteps (dynamic results cannot then be displayed or
+#                         exported except as CSVs; used from the command line
+#                         whenever CSVs are the only dynamic results output)
+#   --node_variables=NODE_VARIABLES
+#                         only read the comma separated NODE_VARIABLES from the
+#                         dynamic results (default all of NodeDemand, NodeHead,
+#                         NodePressure, NodeWaterQuality)
+#   --link_variables=LINK_VARIABLES
+#                         only read the comma separated LINK_VARIABLES from the
+#                         dynamic results (default all of LinkFlow,
+#                         LinkVelocity, LinkHeadloss, LinkAveWaterQuality,
+#                         LinkStatus, LinkSetting, LinkReactionRate,
+#                         LinkFrictionFactor)
+#   --timesteps=START:STOP:STEP
+#                         only read dynamic results timesteps START:STOP:STEP
+#                         (0-based, as a Python slice so -24: is the last 24
+#                         timesteps)
+#   --time_window=FROM:TO
+#                         only read dynamic results reported from FROM to TO
+#                         seconds inclusive
+#   -i NODE_IDS, --node_ids=NODE_IDS
+#                         only read dynamic results for the comma separated
+#                         NODE_IDS (or @FILENAME to read the IDs from a file)
+#   -I LINK_IDS, --link_ids=LINK_IDS
+#                         only read dynamic results for the comma separated
+#                         LINK_IDS (or @FILENAME to read the IDs from a file)
+#   --header_only         only read the prolog counts and epilog, check the file
+#                         size and display a summary of the file sections
+#   --profile             display the calls, wall and CPU time, bytes read and
+#                         peak memory growth of each step of reading the file
+#                         and of each plugin
+#   --profile_json=PROFILE_JSON
+#                         write the times of each step (see --profile) to
+#                         PROFILE_JSON
+#   --progress            display the progress of reading the file, its
+#                         throughput and the time left on the standard error
+#   --progress_rate=UPDATES
+#                         update the progress at most UPDATES times a second
+#                         (default 10, 0 for every update)
+#   --batch               read each of the output files named (or matched by
+#                         glob patterns) with the same options; {name} and {dir}
+#                         in the names of the files written are replaced by the
+#                         name and directory of each output file
+#   --batch_jobs=JOBS     with --batch, read the output files with JOBS
+#                         processes (default 1, 0 for one per CPU)
+#   --batch_summary=SUMMARY_CSV
+#                         with --batch, write the counts, warnings and time
+#                         taken for each output file to SUMMARY_CSV
 #   -v, --verbose         display verbose output
 # 
 # Available translations/locales:
@@ -104,7 +209,7 @@
 #   - one call per pump
 # - PostReadEnergyUsage
 # - PreReadDynamicResults
-#   - one call per timestep
+#   - one call per timestep (DynamicResultsPeriod)
 # - PostReadDynamicResults
 # - PreReadEpilog
 # - PostReadEpilog
@@ -128,6 +233,8 @@
 # One consistent format for Nodes and one for Links is best, so we might as
 # well include both the ID and time columns even when the user has specified
 # an ID or time.
+# --wide_csv writes a third shape for one variable: a row for each time step
+# with a column for each node or link ID.
 #
 # Item 2: How about:
 # -i ID which specifies one node for prolog, dynamic results or power
@@ -135,6 +242,8 @@
 # (probably best to work out what the ID relates to ASAP)
 # -t time in seconds
 # -T TimeStep count (0-based since it starts at initial conditions)
+# (the timesteps read can now be chosen with --timesteps or --time_window
+# and the nodes and links with -i/--node_ids and -I/--link_ids)
 #
 # Item 3 How about allowing including static information in the dynamic
 # output for each time step ie. everything included in the prolog report could
@@ -158,94 +267,350 @@ import gettext
 from datetime import datetime
 import struct
 from types import ModuleType
-
-import os
-#print('Current file: %s' % os.path.realpath(__file__))
-# look first for a locale directory in same directory as this file
-localedir = os.path.dirname(os.path.realpath(__file__)) + '/locale'
-#print('looking for locale directory: %s' % localedir)
-if os.path.exists(localedir) == False or os.path.isdir(localedir) == False:
-    # next try up a directory
-    localedir = os.path.dirname(os.path.realpath(__file__)) + '/../locale'
-    #print('looking for locale directory: %s' % localedir)
-    if os.path.exists(localedir) == False or os.path.isdir(localedir) == False:
-        # and finally we look for it in the current working directory
-        localedir = os.getcwd() + '/locale'
-        #print('looking for locale directory: %s' % localedir)
-#print('using locale directory: %s' % localedir)
-gettext.install('EPANETOutputFile', localedir, unicode=1)
-
-EOFTusage = _("%prog [options] filename")
-EOFTparser = OptionParser(version=_('%prog 1.0.0'), usage=EOFTusage)
-# set up the command line option parsing
-EOFTparser.add_option('-v','--verbose',
-        action='store_true', dest = 'verbose', default=False,
-        help=_('display verbose output'))
+import hashlib
+import json
+import copy
+
+import EOFTCompress
+import EOFTProfile
+import EOFTProgress
+import EPANETOutputFilePlugin
+
+# Importing this module has no side effects: gettext, the command line
+# option parser and the internal plugin are set up by Initialize() when the
+# first file is opened, and the user plugins are only imported (see
+# LoadPlugins) when the command line uses their options (see NeedPlugins).
+
+# command line option parser (made by Initialize)
+EOFTparser = None
+
+# Internal 'plugin' which the coordinator calls before any of the other
+# plugins and actually reads the file (installed by Initialize).
+# This plugin also adds more command line options for export to CSV.
+EOFTInternalPlugin = None
+
+# the plugins directory: each directory in it is a package which we can
+# import and which will also return us a plugin class object when we
+# Initialize() it
+EOFTPluginsDir = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+        u'plugins')
+
+# directory in the user's cache directory for the cached command line
+# options of the plugins (see PluginManifestPath)
+EOFTPLUGIN_MANIFEST_DIR = 'EPANETFileUtility'
+
+# the plugins loaded by LoadPlugins, the name of the directory of each and
+# their packages (so that we can call the Terminate function also)
+EOFTPlugins = []
+EOFTPluginDirs = []
+EOFTPluginPackages = []
+EOFTPluginsLoaded = False
 
 
-'''
-Install Internal 'plugin' which the coordinator calls before any
-of the other plugins and actually reads the file.
-This plugin also adds more command line options for export to CSV.
-'''
-import EOFTInternalPlugin
-EOFTInternalPlugin = EOFTInternalPlugin.Initialize()
-#print(EOFTInternalPlugin)
+def LocaleDir():
+    ''' Directory of the translations '''
+    # look first for a locale directory in same directory as this file
+    localedir = os.path.dirname(os.path.realpath(__file__)) + '/locale'
+    if os.path.exists(localedir) == False or os.path.isdir(localedir) == False:
+        # next try up a directory
+        localedir = os.path.dirname(os.path.realpath(__file__)) + '/../locale'
+        if os.path.exists(localedir) == False or os.path.isdir(localedir) == False:
+            # and finally we look for it in the current working directory
+            localedir = os.getcwd() + '/locale'
+    return localedir
+
+
+def Initialize():
+    '''Install gettext (unless _ has already been installed, eg. by the
+    GUI), make the command line option parser and install the internal
+    plugin.  No return value.  Only the first call does anything.
+    '''
+    global EOFTparser, EOFTInternalPlugin, EOFTResults
+    if EOFTparser is not None:
+        return
+    try:
+        import __builtin__ as builtins
+    except ImportError:
+        import builtins
+    if not hasattr(builtins, '_'):
+        gettext.install('EPANETOutputFile', LocaleDir(), unicode=1)
+
+    EOFTusage = _("%prog [options] filename")
+    parser = OptionParser(version=_('%prog 1.0.0'), usage=EOFTusage)
+    # set up the command line option parsing
+    parser.add_option('-v','--verbose',
+            action='store_true', dest = 'verbose', default=False,
+            help=_('display verbose output'))
+    parser.add_option('--profile',
+            action='store_true', dest = 'profile', default=False,
+            help=_('display the calls, wall and CPU time, bytes read and peak memory growth of each step of reading the file and of each plugin'))
+    parser.add_option('--profile_json',
+            action='store', type='string', dest = 'profile_json',
+            metavar = 'PROFILE_JSON',
+            help=_('write the times of each step (see --profile) to PROFILE_JSON'))
+    parser.add_option('--progress',
+            action='store_true', dest = 'progress', default=False,
+            help=_('display the progress of reading the file, its throughput and the time left on the standard error'))
+    parser.add_option('--progress_rate',
+            action='store', type='float', dest = 'progress_rate',
+            default = EOFTProgress.DEFAULT_RATE, metavar = 'UPDATES',
+            help=_('update the progress at most UPDATES times a second (default %d, 0 for every update)') % EOFTProgress.DEFAULT_RATE)
+    parser.add_option('--batch',
+            action='store_true', dest = 'batch', default=False,
+            help=_('read each of the output files named (or matched by glob patterns) with the same options; {name} and {dir} in the names of the files written are replaced by the name and directory of each output file'))
+    parser.add_option('--batch_jobs',
+            action='store', type='int', dest = 'batch_jobs', default=1,
+            metavar = 'JOBS',
+            help=_('with --batch, read the output files with JOBS processes (default 1, 0 for one per CPU)'))
+    parser.add_option('--batch_summary',
+            action='store', type='string', dest = 'batch_summary',
+            metavar = 'SUMMARY_CSV',
+            help=_('with --batch, write the counts, warnings and time taken for each output file to SUMMARY_CSV'))
+
+    import EOFTInternalPlugin
+    import EOFTResults
+    EOFTInternalPlugin = EOFTInternalPlugin.Initialize()
+    EOFTInternalMethods.update(PluginMethods(EOFTInternalPlugin))
+    CallInternalPlugin(EOFTPLUGIN_INIT, parser)
+    EOFTparser = parser
+
+
+def FindPlugins():
+    ''' Names of the plugin directories in the plugins directory '''
+    if hasattr(sys, 'frozen'):
+        return []
+    # unfortunately, to make this work we need to go back to ASCII...
+    return sorted([name.encode('ascii','replace')
+            for name in os.listdir(EOFTPluginsDir)
+            if os.path.isdir(os.path.join(EOFTPluginsDir, name))
+                and not name.startswith('.')])
 
 
-'''
-Install Plugins
-'''
+def PluginDigest(name):
+    ''' SHA-1 (hex) of the .py files of plugin name, which tells when its
+        entry in the manifest is out of date.
+    '''
+    digest = hashlib.sha1()
+    pluginpath = os.path.join(EOFTPluginsDir, name)
+    for fname in sorted(os.listdir(pluginpath)):
+        if fname.endswith('.py'):
+            f = open(os.path.join(pluginpath, fname), 'rb')
+            try:
+                digest.update(f.read())
+            finally:
+                f.close()
+    return digest.hexdigest()
+
+
+def PluginManifestPath():
+    ''' Name of the manifest of the plugins' command line options, in the
+        user's cache directory (%LOCALAPPDATA% on Windows, else
+        $XDG_CACHE_HOME or ~/.cache) rather than the package, which may not
+        be writable.  It is named from a hash of the plugins directory, so
+        each copy of the library has its own.  None if there is no cache
+        directory.
+    '''
+    if os.name == 'nt':
+        cachedir = os.environ.get('LOCALAPPDATA')
+    else:
+        cachedir = (os.environ.get('XDG_CACHE_HOME')
+                or os.path.join(os.path.expanduser('~'), '.cache'))
+    if not cachedir or cachedir.startswith('~'):
+        return None
+    pluginsdir = EOFTPluginsDir
+    if not isinstance(pluginsdir, bytes):
+        pluginsdir = pluginsdir.encode('utf-8')
+    return os.path.join(cachedir, EOFTPLUGIN_MANIFEST_DIR,
+            'plugins-%s.json' % hashlib.sha1(pluginsdir).hexdigest()[:16])
+
+
+def PluginManifest():
+    '''Command line options of the plugins from the manifest written by
+    LoadPlugins (see PluginManifestPath).
+
+    Returns:
+        (dictionary) the option strings (eg. '--demo_all') of each plugin
+        directory, or None if the manifest is missing or out of date
+    '''
+    path = PluginManifestPath()
+    if path is None:
+        return None
+    try:
+        f = open(path)
+        try:
+            manifest = json.load(f)
+        finally:
+            f.close()
+        names = FindPlugins()
+        if sorted(manifest.keys()) != names:
+            return None
+        for name in names:
+            if manifest[name]['Digest'] != PluginDigest(name):
+                return None
+        return dict([(name, manifest[name]['Options']) for name in names])
+    except (EnvironmentError, ValueError, KeyError, TypeError):
+        return None
+
+
+def NeedPlugins(args):
+    '''True if the user plugins must be loaded for command line args:
+    help is asked for, one of args is a plugin's option or the manifest of
+    their options has to be made again.
+
+    Args:
+        args (list):    arguments in command line format
+    '''
+    if EOFTPluginsLoaded:
+        return False
+    manifest = PluginManifest()
+    if manifest is None:
+        return len(FindPlugins()) > 0
+    options = []
+    for name in manifest:
+        options.extend(manifest[name])
+    for arg in args:
+        if arg == '--':
+            break
+        if not arg.startswith('-') or arg == '-':
+            continue
+        if arg in ['-h', '--help']:
+            return True
+        if arg.startswith('--'):
+            # optparse also takes abbreviations of long options
+            opt = arg.split('=', 1)[0]
+            if len([o for o in options if o.startswith(opt)]) > 0:
+                return True
+        else:
+            # short options can be grouped (eg. -pc)
+            for c in arg[1:]:
+                if '-' + c in options:
+                    return True
+    return False
 
-# our empty plugins list
-EOFTPlugins = []
 
-# read all the directories in the plugins directory
-# each one is to be a package which we can import and which will also
-# return us a plugin class object when we Initialize() it
-EOFTPluginDirs = []
-if hasattr(sys, 'frozen'):
-    #Py2EXE gets paths wrong
-    #print('cwd=%s' % os.getcwd())
-    #path = os.path.dirname(sys.argv[0])
-    #print('dir=%s' % path)
-    #if path:
-    #    os.chdir(path)
-    #else:
-    #    path = '.'
-    #pluginsdir = os.path.join(path,u'plugins')
-    print("Can't import plugins after using Py2exe")
-else:    
-    path = os.path.dirname(os.path.realpath(__file__))
-    pluginsdir = os.path.join(path,u'plugins')
-    # unfortunately, to make this work we need to go back to ASCII...
-    EOFTPluginDirs = [name.encode('ascii','replace') for name in os.listdir(pluginsdir)
-            if os.path.isdir(os.path.join(pluginsdir, name)) and not name.startswith('.')]
-EOFTPluginPackages = []
+def _OptionStrings(parser):
+    # all the option strings parser has, eg. '-v' and '--verbose'
+    return set(list(parser._short_opt.keys()) + list(parser._long_opt.keys()))
 
 
-'''
-Import any plugins found
-One-off initialising of plugin modules:
-call must return a plugin object we can call later
-'''
-#print(EOFTPluginDirs)
-#print (dir())
-#print ('__name__="%s"' % __name__)
-for p in EOFTPluginDirs:
-    if __name__ == '__main__':
-        if hasattr(sys, 'frozen'):
+def LoadPlugins():
+    '''Import the user plugins found in the plugins directory, send them
+    Init with the command line option parser and write the manifest of
+    their options (if it can be).  No return value.  Only the first call
+    does anything.
+    '''
+    global EOFTPluginsLoaded
+    Initialize()
+    if EOFTPluginsLoaded:
+        return
+    EOFTPluginsLoaded = True
+    if hasattr(sys, 'frozen'):
+        #Py2EXE gets paths wrong
+        print("Can't import plugins after using Py2exe")
+        return
+
+    manifest = {}
+    for p in FindPlugins():
+        if __name__ == '__main__':
             tmp = __import__(('plugins.%s' % p), fromlist=[p])
         else:
-            tmp = __import__(('plugins.%s' % p), fromlist=[p])
-    else:
-        tmp = __import__('EPANETOutputFile.plugins.%s' % p, fromlist=[p])
-    # store it so that we can call the Terminate function also
-    EOFTPluginPackages.append(tmp)
-    a = tmp.Initialize()
-    #print(a)
-    # store it so that we can send the messages to the plugins
-    EOFTPlugins.append(a)
+            tmp = __import__('EPANETOutputFile.plugins.%s' % p, fromlist=[p])
+        EOFTPluginPackages.append(tmp)
+        # One-off initialising of plugin modules:
+        # call must return a plugin object we can call later
+        a = tmp.Initialize()
+        EOFTPlugins.append(a)
+        EOFTPluginDirs.append(p)
+        # store its methods so that we can send the messages to it
+        methods = PluginMethods(a)
+        for msg, method in methods.items():
+            EOFTUserMethods[msg].append(method)
+        before = _OptionStrings(EOFTparser)
+        if EOFTPLUGIN_INIT in methods:
+            methods[EOFTPLUGIN_INIT](EOFTparser)
+        manifest[p] = {'Digest': PluginDigest(p),
+                'Options': sorted(_OptionStrings(EOFTparser) - before)}
+
+    path = PluginManifestPath()
+    if path is not None and PluginManifest() != dict(
+            [(name, manifest[name]['Options']) for name in manifest]):
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            f = open(path, 'w')
+            try:
+                json.dump(manifest, f, indent=1, sort_keys=True,
+                        separators=(',', ': '))
+                f.write('\n')
+            finally:
+                f.close()
+        except EnvironmentError:
+            # the plugins are loaded for every file until it is written
+            pass
+
+
+def CheckOptions(options):
+    '''Check options (a dictionary of option values by name, as set by the
+    command line options; eg. {'prolog_node_csv': 'nodes.csv'}) are all
+    known.  No return value.
+
+    Raises:
+        TypeError if a name is not an option of the library or of a loaded
+        user plugin
+    '''
+    unknown = [name for name in options if name not in EOFTparser.defaults]
+    if len(unknown) > 0:
+        raise TypeError(_('Unknown options: %s') % ', '.join(sorted(unknown)))
+
+def Options(**options):
+    '''Options to read a file with (see Open), made without parsing a
+    command line.
+
+    Args:
+        **options:  option values by name (the dest of the command line
+                    option, eg. node_ids for --node_ids), the rest having
+                    their defaults.  The selections can also be given as
+                    Python values: node_variables, link_variables, node_ids
+                    and link_ids as lists, timesteps as a slice or a single
+                    timestep and time_window as a (FROM, TO) tuple.  The
+                    options of user plugins load the plugins.
+
+    Returns:
+        (optparse.Values) new options, shared with nothing else
+
+    Raises:
+        TypeError if an option is unknown
+    '''
+    Initialize()
+    if len([name for name in options
+            if name not in EOFTparser.defaults]) > 0:
+        LoadPlugins()
+    CheckOptions(options)
+    values = EOFTparser.get_default_values()
+    values._update_loose(options)
+    return values
+
+def Open(fname, progress = None, **options):
+    '''Read EPANET output file fname with options given as keyword arguments
+    (see Options) instead of a command line, eg.
+        eof = Open('Net3.hyd', node_variables=['NodePressure'],
+                timesteps=slice(-24, None))
+    Nothing is displayed unless silent=False is given (silent wins over
+    the other display options, as on the command line).
+
+    Args:
+        fname (string):     name of the output file
+        progress (None or progress bar dialog): see EPANETOutputFile
+        **options:          option values by name
+
+    Returns:
+        (EPANETOutputFile) the file read
+
+    Raises:
+        TypeError if an option is unknown
+    '''
+    options.setdefault('silent', True)
+    return EPANETOutputFile([fname], progress, Options(**options))
 
 
 '''
@@ -266,6 +631,7 @@ EOFTPLUGIN_ENERGYUSAGEEXPORT=22
 EOFTPLUGIN_DYNAMICRESULTSREAD=30
 EOFTPLUGIN_DYNAMICRESULTSPRINT=31
 EOFTPLUGIN_DYNAMICRESULTSEXPORT=32
+EOFTPLUGIN_DYNAMICRESULTSPERIOD=33
 EOFTPLUGIN_EPILOGREAD=40
 EOFTPLUGIN_EPILOGPRINT=41
 EOFTPLUGIN_EPILOGEXPORT=42
@@ -274,10 +640,76 @@ EOFTPLUGIN_FILECLOSE=99
 EOFTPLUGIN_FILETERM=100
 # no EOFTPLUGIN_TERM to match EOFTPLUGIN_INIT - no way of sending it
 
+# name of the plugin method each message calls
+EOFTPLUGIN_METHODS = {
+    EOFTPLUGIN_TEST: 'Test',
+    EOFTPLUGIN_INIT: 'Init',
+    EOFTPLUGIN_FILEINIT: 'FileInit',
+    EOFTPLUGIN_FILEOPEN: 'FileOpen',
+    EOFTPLUGIN_PROLOGREAD: 'PrologRead',
+    EOFTPLUGIN_PROLOGPRINT: 'PrologPrint',
+    EOFTPLUGIN_PROLOGEXPORT: 'PrologExport',
+    EOFTPLUGIN_ENERGYUSAGEREAD: 'EnergyUsageRead',
+    EOFTPLUGIN_ENERGYUSAGEPRINT: 'EnergyUsagePrint',
+    EOFTPLUGIN_ENERGYUSAGEEXPORT: 'EnergyUsageExport',
+    EOFTPLUGIN_DYNAMICRESULTSREAD: 'DynamicResultsRead',
+    EOFTPLUGIN_DYNAMICRESULTSPRINT: 'DynamicResultsPrint',
+    EOFTPLUGIN_DYNAMICRESULTSEXPORT: 'DynamicResultsExport',
+    EOFTPLUGIN_DYNAMICRESULTSPERIOD: 'DynamicResultsPeriod',
+    EOFTPLUGIN_EPILOGREAD: 'EpilogRead',
+    EOFTPLUGIN_EPILOGPRINT: 'EpilogPrint',
+    EOFTPLUGIN_EPILOGEXPORT: 'EpilogExport',
+    EOFTPLUGIN_FILECLOSE: 'FileClose',
+    EOFTPLUGIN_FILETERM: 'FileTerm'
+}
+
+def PluginMethods(plugin):
+    '''Methods of plugin which are called for each message.
+
+    Only the methods the plugin overrides are included: the ones inherited
+    from EPANETOutputFilePlugin.EOFTPlugin do nothing, so are not called.
+
+    Args:
+        plugin (EOFTPlugin):    plugin object
+
+    Returns:
+        (dictionary) the bound method to call for each message ID in
+        EOFTPLUGIN_METHODS which plugin overrides
+    '''
+    methods = {}
+    for msg, name in EOFTPLUGIN_METHODS.items():
+        method = getattr(plugin, name, None)
+        if method is None:
+            continue
+        default = getattr(EPANETOutputFilePlugin.EOFTPlugin, name, None)
+        if (default is not None and getattr(method, '__func__', None)
+                is getattr(default, '__func__', default)):
+            continue
+        methods[msg] = method
+    return methods
+
+# the method of the internal plugin and the methods of the user plugins
+# (in EOFTPlugins order) to call for each message, filled in once when the
+# plugins are installed so sending a message is a dictionary lookup and only
+# calls the plugins which override its method
+EOFTInternalMethods = {}
+EOFTUserMethods = dict([(msg, []) for msg in EOFTPLUGIN_METHODS])
+
+# only the plugins which override DynamicResultsPeriod are sent each dynamic
+# results period, and if there are none the periods are not sent
+EOFTPeriodMethods = EOFTUserMethods[EOFTPLUGIN_DYNAMICRESULTSPERIOD]
+
 def SetStepLimits(progress, rangemin, rangemax):
     if progress is not None:
         progress.SetStepLimits(rangemin, rangemax)
 
+def _Profile(args):
+    # the profile of the file a message is about, if it is being profiled
+    # (see EPANETOutputFile.Profile)
+    if len(args) == 0:
+        return None
+    return getattr(args[0], 'Profile', None)
+
 def CallInternalPlugin(msg, *args):
     ''' Pass message with *args to internal plugin
 
@@ -287,48 +719,20 @@ def CallInternalPlugin(msg, *args):
 
         Any return values from plugin is ignored.
     '''
-    if msg == EOFTPLUGIN_TEST:
-        EOFTInternalPlugin.Test(*args)
-    elif msg == EOFTPLUGIN_INIT:
-        EOFTInternalPlugin.Init(*args)
-    elif msg == EOFTPLUGIN_FILEINIT:
-        EOFTInternalPlugin.FileInit(*args)
-    elif msg == EOFTPLUGIN_FILEOPEN:
-        EOFTInternalPlugin.FileOpen(*args)
-    elif msg == EOFTPLUGIN_PROLOGREAD:
-        EOFTInternalPlugin.PrologRead(*args)
-    elif msg == EOFTPLUGIN_PROLOGPRINT:
-        EOFTInternalPlugin.PrologPrint(*args)
-    elif msg == EOFTPLUGIN_PROLOGEXPORT:
-        EOFTInternalPlugin.PrologExport(*args)
-    elif msg == EOFTPLUGIN_ENERGYUSAGEREAD:
-        EOFTInternalPlugin.EnergyUsageRead(*args)
-    elif msg == EOFTPLUGIN_ENERGYUSAGEPRINT:
-        EOFTInternalPlugin.EnergyUsagePrint(*args)
-    elif msg == EOFTPLUGIN_ENERGYUSAGEEXPORT:
-        EOFTInternalPlugin.EnergyUsageExport(*args)
-    elif msg == EOFTPLUGIN_DYNAMICRESULTSREAD:
-        EOFTInternalPlugin.DynamicResultsRead(*args)
-    elif msg == EOFTPLUGIN_DYNAMICRESULTSPRINT:
-        EOFTInternalPlugin.DynamicResultsPrint(*args)
-    elif msg == EOFTPLUGIN_DYNAMICRESULTSEXPORT:
-        EOFTInternalPlugin.DynamicResultsExport(*args)
-    elif msg == EOFTPLUGIN_EPILOGREAD:
-        EOFTInternalPlugin.EpilogRead(*args)
-    elif msg == EOFTPLUGIN_EPILOGPRINT:
-        EOFTInternalPlugin.EpilogPrint(*args)
-    elif msg == EOFTPLUGIN_EPILOGEXPORT:
-        EOFTInternalPlugin.EpilogExport(*args)
-    elif msg == EOFTPLUGIN_FILECLOSE:
-        EOFTInternalPlugin.FileClose(*args)
-    elif msg == EOFTPLUGIN_FILETERM:
-        EOFTInternalPlugin.FileTerm(*args)
-    else:
+    if msg not in EOFTPLUGIN_METHODS:
         print(_('Invalid message %d passed to CallInternalPlugin') % msg)
+    elif msg in EOFTInternalMethods:
+        profile = _Profile(args)
+        if profile is None:
+            EOFTInternalMethods[msg](*args)
+        else:
+            profile.Call(EOFTInternalPlugin.__class__.__name__,
+                    EOFTPLUGIN_METHODS[msg], EOFTInternalMethods[msg], *args)
 
 
 def CallUserPlugins(msg, progress, *args):
-    ''' Pass message with *args to all loaded user plugins
+    ''' Pass message with *args to all loaded user plugins which override
+        its method
 
         Args:
             message (int)   ID specifying which plugin function to call.
@@ -336,55 +740,29 @@ def CallUserPlugins(msg, progress, *args):
 
         Any return values from plugins are ignored.
     '''
+    if msg not in EOFTPLUGIN_METHODS:
+        print(_('Invalid message %d passed to CallUserPlugins') % msg)
+        return
+    methods = EOFTUserMethods[msg]
+    if len(methods) == 0:
+        return
+
     if progress is not None:
         # as we loop, we need to adjust the progress bounds
         rangemin = float(progress.rangemin)
         rangemax = float(progress.rangemax)
-        rangestep = (rangemax - rangemin) / float(len(EOFTPlugins))
+        rangestep = (rangemax - rangemin) / float(len(methods))
         prangemin = rangemin
         prangemax = rangemin+rangestep
         progress.SetStepLimits(prangemin, prangemax)
 
-    for p in EOFTPlugins:
-
-        if msg == EOFTPLUGIN_TEST:
-            p.Test(*args)
-        elif msg == EOFTPLUGIN_INIT:
-            p.Init(*args)
-        elif msg == EOFTPLUGIN_FILEINIT:
-            p.FileInit(*args)
-        elif msg == EOFTPLUGIN_FILEOPEN:
-            p.FileOpen(*args)
-        elif msg == EOFTPLUGIN_PROLOGREAD:
-            p.PrologRead(*args)
-        elif msg == EOFTPLUGIN_PROLOGPRINT:
-            p.PrologPrint(*args)
-        elif msg == EOFTPLUGIN_PROLOGEXPORT:
-            p.PrologExport(*args)
-        elif msg == EOFTPLUGIN_ENERGYUSAGEREAD:
-            p.EnergyUsageRead(*args)
-        elif msg == EOFTPLUGIN_ENERGYUSAGEPRINT:
-            p.EnergyUsagePrint(*args)
-        elif msg == EOFTPLUGIN_ENERGYUSAGEEXPORT:
-            p.EnergyUsageExport(*args)
-        elif msg == EOFTPLUGIN_DYNAMICRESULTSREAD:
-            p.DynamicResultsRead(*args)
-        elif msg == EOFTPLUGIN_DYNAMICRESULTSPRINT:
-            p.DynamicResultsPrint(*args)
-        elif msg == EOFTPLUGIN_DYNAMICRESULTSEXPORT:
-            p.DynamicResultsExport(*args)
-        elif msg == EOFTPLUGIN_EPILOGREAD:
-            p.EpilogRead(*args)
-        elif msg == EOFTPLUGIN_EPILOGPRINT:
-            p.EpilogPrint(*args)
-        elif msg == EOFTPLUGIN_EPILOGEXPORT:
-            p.EpilogExport(*args)
-        elif msg == EOFTPLUGIN_FILECLOSE:
-            p.FileClose(*args)
-        elif msg == EOFTPLUGIN_FILETERM:
-            p.FileTerm(*args)
+    profile = _Profile(args)
+    for method in methods:
+        if profile is None:
+            method(*args)
         else:
-            print(_('Invalid message %d passed to CallUserPlugins') % msg)
+            profile.Call(method.__self__.__class__.__name__,
+                    EOFTPLUGIN_METHODS[msg], method, *args)
 
         if progress is not None:
             prangemin = prangemax
@@ -399,15 +777,6 @@ def CallPlugins(msg, progress, *args):
     CallInternalPlugin(msg, *args)
     CallUserPlugins(msg, progress, *args)
 
-'''
-One-off initialising of plugin objects
-Plugins can add any command line arguments they wish to support
-NB: called once per session (when this module is imported),
-    not once per EPANETOutputFile() call
-'''
-CallPlugins(EOFTPLUGIN_INIT, None, EOFTparser)
-
-
 class EPANETOutputFile():
 
 
@@ -415,25 +784,59 @@ class EPANETOutputFile():
     # for each section:
     #   Prolog
     #   EnergyUse
-    #   DynamicResults (this one is a list of dictionaries - 1 for each timestep)
+    #   DynamicResults (this one is a list of dictionaries - 1 for each timestep,
+    #       or with --mmap, a sequence which builds each dictionary when used)
     #   Epilog
-
-    def __init__(self, args = sys.argv[1:], progress = None):
+    # Dynamic results read into memory are stored in columns in ResultCube
+    # (see EOFTResults.py) and DynamicResults is a view of it.
+    # DynamicVariables lists the names of the dynamic results variables read
+    # (all of them unless --node_variables or --link_variables was used) and
+    # DynamicPeriods gives the timestep in the file of each DynamicResults
+    # entry (all of them unless --timesteps or --time_window was used).
+    # DynamicNodes and DynamicLinks give the index of the node or link of
+    # each value read (all of them unless --node_ids or --link_ids was used).
+    # With --compact the numeric prolog arrays (NodeElev, LinkLength, ...)
+    # are array('i') or array('f') buffers instead of lists.
+    # With --stream DynamicResults is left empty: plugins see each period
+    # as it is read (DynamicResultsPeriod), the dynamic results CSVs are
+    # written from it and IterPeriods() reads them again one at a time.
+    # StreamedCSVs names the dynamic results CSVs written as the file was
+    # read; those named in a later Export are written from the periods read
+    # again.  main() sets --stream whenever CSVs are the only dynamic
+    # results output and no user plugin reads, prints or exports them.
+    # Layout gives the offset and size of each section.  Once the file is
+    # opened, Prolog has the values from its fixed size start; with
+    # --header_only no sections are read, so that is all it has.
+    # Profile has the time taken by each step and plugin with --profile (see
+    # EOFTProfile.py), and is None otherwise.
+
+    def __init__(self, args = sys.argv[1:], progress = None, options = None):
         '''Constructor: Read an EPANET output file into formatted memory
 
         Args:
-            args (list):    arguments in command line format
+            args (list):    arguments in command line format, or with
+                            options, just the name of the file
             progress (None or progress bar dialog with 2 functions):
                 progress.SetStepLimits(rangemin, rangemax)
                 progress.Update(% of work done (0-100), text description of current step)
+                which is updated at most --progress_rate times a second
+                (see EOFTProgress.py)
+            options (None or optparse.Values):
+                options to use instead of parsing args (see Options); they
+                are used by this file only (its plugins may change them)
         Raises:
             Exception('ERROR: magic numbers do not match: probably not an EPANET output file')
 
         '''
 
-        # options output from optparse option parsing
-        # args remaining arguments that could not be parsed
-        (options, args) = EOFTparser.parse_args(args)
+        Initialize()
+        if options is None:
+            if NeedPlugins(args):
+                LoadPlugins()
+
+            # options output from optparse option parsing
+            # args remaining arguments that could not be parsed
+            (options, args) = EOFTparser.parse_args(args)
 
         if len(args) != 1:
             if len(args) == 0:
@@ -449,28 +852,152 @@ class EPANETOutputFile():
         self.Prolog = {}
         self.EnergyUse = {}
         self.DynamicResults = []
+        self.ResultCube = None
+        self.DynamicVariables = []
+        self.DynamicPeriods = []
+        self.DynamicNodes = []
+        self.DynamicLinks = []
+        self.StreamedCSVs = []
         self.Epilog = {}
+        # offset and size of each section (see EOFTDecoder.FileLayout)
+        self.Layout = {}
+        # cache file name and, if it is valid, the cache loaded from it
+        # (see EOFTCache.py; only with --cache or --cache_dir)
+        self.CachePath = None
+        self.Cache = None
+        # time taken by each step and plugin (see EOFTProfile.py; only with
+        # --profile or --profile_json)
+        self.Profile = None
+        if options.profile or options.profile_json is not None:
+            self.Profile = EOFTProfile.Profile(self)
+
+        # with --output, everything displayed goes to that file (see
+        # EOFTCompress.Open) until the file has been read
+        stdout = sys.stdout
+        output = None
+        if options.output is not None:
+            output = EOFTCompress.Open(options.output, options.compress_level,
+                    options.compress_thread)
+            sys.stdout = output
+        try:
+            self.fname = fname = args[0]
+            if options.verbose: print(_("Loading EPANET output file %s") % fname)
+
+            CallPlugins(EOFTPLUGIN_TEST, None, self)
+
+            CallPlugins(EOFTPLUGIN_FILEINIT, None, self, options)
+
+            self.f = f = open(fname,'rb')
+
+            # the progress is based on the bytes of each section of the
+            # file, and passed on at a limited rate
+            filesize = os.fstat(f.fileno()).st_size
+            if progress is not None:
+                progress = EOFTProgress.Progress(progress, filesize,
+                        options.progress_rate)
+            elif options.progress:
+                progress = EOFTProgress.TextProgress(filesize,
+                        options.progress_rate)
+
+            progupdate = None 
+            if progress is not None: progupdate = progress.Update
+            SetStepLimits(progress, 2, 5)
+            CallInternalPlugin(EOFTPLUGIN_FILEOPEN, self, progupdate)
+            SetStepLimits(progress, 6, 9)
+            CallUserPlugins(EOFTPLUGIN_FILEOPEN, progress, self, progupdate)
+
+            if options.header_only:
+                # FileOpen has read and checked the prolog counts and epilog,
+                # which is all that is wanted
+                self.closeFile(f, progress)
+            else:
+                self.readFile(f, progress)
 
-        self.fname = fname = args[0]
-        if options.verbose: print(_("Loading EPANET output file %s") % fname)
-
-        CallPlugins(EOFTPLUGIN_TEST, None, self)
-
-        CallPlugins(EOFTPLUGIN_FILEINIT, None, self, options)
-
-        self.f = f = open(fname,'rb')
-
-        progupdate = None 
-        if progress is not None: progupdate = progress.Update
-        SetStepLimits(progress, 2, 5)
-        CallInternalPlugin(EOFTPLUGIN_FILEOPEN, self, progupdate)
-        SetStepLimits(progress, 6, 9)
-        CallUserPlugins(EOFTPLUGIN_FILEOPEN, progress, self, progupdate)
-
-        # Progress updates could be done better using file size and basing progress
-        # on number of bytes read, but the current process does not do this.
+            if self.Profile is not None:
+                self.Profile.Stop()
+                self.ReportProfile()
+        finally:
+            if output is not None:
+                sys.stdout = stdout
+                output.close()
 
-        self.readFile(f, progress)
+    def ReportProfile(self):
+        ''' Display the --profile table and write the --profile_json file.
+            No return value.
+        '''
+        if self.options.profile:
+            print("")
+            headingtext = _("Profile")
+            print(headingtext)
+            print('='*len(headingtext))
+            print(self.Profile.Report([_('Plugin'), _('Step'), _('Calls'),
+                    _('Wall (s)'), _('CPU (s)'), _('Bytes read'),
+                    _('Peak memory (KB)'), _('Total')]))
+        if self.options.profile_json is not None:
+            f = open(self.options.profile_json, 'w')
+            try:
+                f.write(self.Profile.Json())
+                f.write('\n')
+            finally:
+                f.close()
+
+    def Close(self):
+        ''' Release any resources still held after reading the file
+        (eg. the memory map used for the dynamic results with --mmap or
+        of the cache file they were loaded from).
+        '''
+        if hasattr(self.DynamicResults, 'Close'):
+            self.DynamicResults.Close()
+        if self.Cache is not None:
+            self.Cache.Close()
+
+    def HasPeriodPlugins(self):
+        ''' True if any plugin wants each dynamic results period as it is read '''
+        return len(EOFTPeriodMethods) > 0
+
+    def PeriodRead(self, i, TimeStepD):
+        ''' Send dynamic results period DynamicPeriods[i] to the plugins as it is read '''
+        profile = getattr(self, 'Profile', None)
+        for method in EOFTPeriodMethods:
+            if profile is None:
+                method(self, i, TimeStepD)
+            else:
+                profile.Call(method.__self__.__class__.__name__,
+                        'DynamicResultsPeriod', method, self, i, TimeStepD)
+
+    def IterPeriods(self):
+        '''Generator giving the dynamic results one period at a time.
+
+        The periods are read again from the file into one reused buffer
+        (see EOFTResults.PeriodStream), so memory use does not depend on the
+        number of periods, even after reading the file with --stream.
+        Only the variables, timesteps, nodes and links selected by the
+        options are read (all of them with --header_only).
+
+        Yields:
+            (i, TimeStepD) for each period, where i is the index of the
+            period in DynamicPeriods (or in the file with --header_only)
+            and TimeStepD is its dictionary of results, which may be
+            reused for the next period.
+        '''
+        if self.options.header_only:
+            variables = periods = nodes = links = None
+        else:
+            variables = self.DynamicVariables
+            periods = self.DynamicPeriods
+            nodes = self.DynamicNodes
+            links = self.DynamicLinks
+        f = open(self.fname, 'rb')
+        try:
+            stream = EOFTResults.PeriodStream(f,
+                    self.Layout['DynamicResultsOffset'],
+                    self.Epilog['nPeriods'], self.Prolog['nNodes'],
+                    self.Prolog['nLinks'], self.options.decoder,
+                    variables, periods, nodes, links)
+            for i, TimeStepD in stream:
+                yield i, TimeStepD
+        finally:
+            f.close()
 
     def GetEOFTPlugins(self):
         return EOFTPlugins
@@ -486,8 +1013,8 @@ class EPANETOutputFile():
             progress (None or progress bar dialog with 2 functions):
                 progress.SetStepLimits(rangemin, rangemax)
                 progress.Update(% of work done (0-100), text description of current step)
-                TODO Progress updates could be done better using file size and basing progress
-                on number of bytes read, but the current process does not do this.
+                The range of each section is in proportion to its size in
+                bytes (see EOFTProgress.StepLimits).
 
         '''
 
@@ -513,70 +1040,73 @@ class EPANETOutputFile():
         progupdate = None 
         if progress is not None: progupdate = progress.Update
 
+        # each section has a part of the progress in proportion to its size
+        limits = EOFTProgress.StepLimits(self.Layout)
+
         # read, print and export prolog
         # (matching magic numbers at start and end already read by internal plugin)
-        SetStepLimits(progress, 10, 14)
+        SetStepLimits(progress, *limits['Prolog'][0])
         CallInternalPlugin(EOFTPLUGIN_PROLOGREAD, self, progupdate)
-        SetStepLimits(progress, 15, 16)
+        SetStepLimits(progress, *limits['Prolog'][1])
         CallUserPlugins(EOFTPLUGIN_PROLOGREAD, progress, self, progupdate)
-        SetStepLimits(progress, 16, 17)
+        SetStepLimits(progress, *limits['Prolog'][2])
         CallInternalPlugin(EOFTPLUGIN_PROLOGPRINT, self, progupdate)
-        SetStepLimits(progress, 17, 18)
+        SetStepLimits(progress, *limits['Prolog'][3])
         CallUserPlugins(EOFTPLUGIN_PROLOGPRINT, progress, self, progupdate)
-        SetStepLimits(progress, 18, 20)
+        SetStepLimits(progress, *limits['Prolog'][4])
         CallInternalPlugin(EOFTPLUGIN_PROLOGEXPORT, self, progupdate)
-        SetStepLimits(progress, 20, 21)
+        SetStepLimits(progress, *limits['Prolog'][5])
         CallUserPlugins(EOFTPLUGIN_PROLOGEXPORT, progress, self, progupdate)
 
 
         # read, print and export energy use section
-        SetStepLimits(progress, 21, 22)
+        SetStepLimits(progress, *limits['EnergyUse'][0])
         CallInternalPlugin(EOFTPLUGIN_ENERGYUSAGEREAD, self, progupdate)
-        SetStepLimits(progress, 22, 23)
+        SetStepLimits(progress, *limits['EnergyUse'][1])
         CallUserPlugins(EOFTPLUGIN_ENERGYUSAGEREAD, progress, self, progupdate)
 
-        SetStepLimits(progress, 23, 24)
+        SetStepLimits(progress, *limits['EnergyUse'][2])
         CallInternalPlugin(EOFTPLUGIN_ENERGYUSAGEPRINT, self, progupdate)
-        SetStepLimits(progress, 24, 25)
+        SetStepLimits(progress, *limits['EnergyUse'][3])
         CallUserPlugins(EOFTPLUGIN_ENERGYUSAGEPRINT, progress, self, progupdate)
 
-        SetStepLimits(progress, 25, 26)
+        SetStepLimits(progress, *limits['EnergyUse'][4])
         CallInternalPlugin(EOFTPLUGIN_ENERGYUSAGEEXPORT, self, progupdate)
-        SetStepLimits(progress, 26, 27)
+        SetStepLimits(progress, *limits['EnergyUse'][5])
         CallUserPlugins(EOFTPLUGIN_ENERGYUSAGEEXPORT, progress, self, progupdate)
 
 
         # read, print and export dynamic results section
-        SetStepLimits(progress, 27, 75)
+        SetStepLimits(progress, *limits['DynamicResults'][0])
         CallInternalPlugin(EOFTPLUGIN_DYNAMICRESULTSREAD, self, progupdate)
-        SetStepLimits(progress, 75, 83)
+        SetStepLimits(progress, *limits['DynamicResults'][1])
         CallUserPlugins(EOFTPLUGIN_DYNAMICRESULTSREAD, progress, self, progupdate)
 
-        SetStepLimits(progress, 83, 84)
+        SetStepLimits(progress, *limits['DynamicResults'][2])
         CallInternalPlugin(EOFTPLUGIN_DYNAMICRESULTSPRINT, self, progupdate)
-        SetStepLimits(progress, 84, 85)
+        SetStepLimits(progress, *limits['DynamicResults'][3])
         CallUserPlugins(EOFTPLUGIN_DYNAMICRESULTSPRINT, progress, self, progupdate)
 
-        SetStepLimits(progress, 85, 87)
+        SetStepLimits(progress, *limits['DynamicResults'][4])
         CallInternalPlugin(EOFTPLUGIN_DYNAMICRESULTSEXPORT, self, progupdate)
-        SetStepLimits(progress, 87, 89)
+        SetStepLimits(progress, *limits['DynamicResults'][5])
         CallUserPlugins(EOFTPLUGIN_DYNAMICRESULTSEXPORT, progress, self, progupdate)
 
 
         # read, print and export epilog
-        SetStepLimits(progress, 90, 92)
+        SetStepLimits(progress, *limits['Epilog'][0])
         CallInternalPlugin(EOFTPLUGIN_EPILOGREAD, self, progupdate)
-        SetStepLimits(progress, 92, 93)
+        SetStepLimits(progress, *limits['Epilog'][1])
         CallUserPlugins(EOFTPLUGIN_EPILOGREAD, progress, self, progupdate)
 
-        SetStepLimits(progress, 93, 94)
+        SetStepLimits(progress, *limits['Epilog'][2])
         CallInternalPlugin(EOFTPLUGIN_EPILOGPRINT, self, progupdate)
-        SetStepLimits(progress, 94, 95)
+        SetStepLimits(progress, *limits['Epilog'][3])
         CallUserPlugins(EOFTPLUGIN_EPILOGPRINT, progress, self, progupdate)
 
-        SetStepLimits(progress, 95, 96)
+        SetStepLimits(progress, *limits['Epilog'][4])
         CallInternalPlugin(EOFTPLUGIN_EPILOGEXPORT, self, progupdate)
-        SetStepLimits(progress, 96, 97)
+        SetStepLimits(progress, *limits['Epilog'][5])
         CallUserPlugins(EOFTPLUGIN_EPILOGEXPORT, progress, self, progupdate)
 
         #if progupdate is not None: progupdate(90,_('Reading epilog'))
@@ -586,14 +1116,28 @@ class EPANETOutputFile():
         #if self.options.epilog or self.options.all:
         #    self.PrintEpilog(self.Epilog)
 
-        if self.options.silent == False: print(_('Done.'))
+        self.closeFile(f, progress)
+
+    def closeFile(self, f, progress):
+        '''Finish reading EPANET output file and close it.  No return value.
+
+        Args:
+            f (file):   file which has been read
+            progress (None or progress bar dialog with 2 functions):
+                progress.SetStepLimits(rangemin, rangemax)
+                progress.Update(% of work done (0-100), text description of current step)
+
+        '''
+        progupdate = None 
+        if progress is not None: progupdate = progress.Update
 
-        if progupdate is not None: progupdate(100,_('Finished reading file'))
+        if self.options.silent == False: print(_('Done.'))
 
         SetStepLimits(progress, 97, 98)
         CallInternalPlugin(EOFTPLUGIN_FILECLOSE, self, progupdate)
         SetStepLimits(progress, 98, 99)
         CallUserPlugins(EOFTPLUGIN_FILECLOSE, progress, self, progupdate)
+        if progress is not None: progress.Finish(_('Finished reading file'))
         f.close()
 
 
@@ -729,88 +1273,143 @@ class EPANETOutputFile():
             option = _('unknown')
         return option
 
-    def _updateOptions(self, options):
-        ''' Update self.options from options dictionary (loosely).
-        Returns deepcopy of existing self.options if options was not empty,
+    def _updateOptions(self, options, targets = {}):
+        ''' Use the values in options dictionary and targets (keyword
+        arguments) for the options of the same names until self.options is
+        restored.  The existing self.options is not changed: it is replaced
+        by a (shallow) copy with the new values.
+        Returns the existing self.options if there were any new values,
         else returns None.
         '''
-        from copy import deepcopy
-        oldoptions = None
-        if len(options) > 0:
-            oldoptions = deepcopy(self.options)
-            #self.options._update(options,'careful')
-            #self.options._update_careful(options)
-            self.options._update_loose(options)
+        if len(options) == 0 and len(targets) == 0:
+            return None
+        values = dict(options)
+        values.update(targets)
+        CheckOptions(values)
+        oldoptions = self.options
+        self.options = copy.copy(oldoptions)
+        self.options._update_loose(values)
         return oldoptions
 
-    def ExportProlog(self, options={}, progress=None):
+    def ExportProlog(self, options={}, progress=None, wait=True, **targets):
         progupdate = None 
         if progress is not None: progupdate = progress.Update
-        oldoptions = self._updateOptions(options)
+        oldoptions = self._updateOptions(options, targets)
         try:
 			CallInternalPlugin(EOFTPLUGIN_PROLOGEXPORT, self, progupdate)
 			CallUserPlugins(EOFTPLUGIN_PROLOGEXPORT, progress, self, progupdate)
+			if wait:
+				EOFTInternalPlugin.WaitForExports()
         finally:
             if oldoptions is not None:
                 # restore the options to what they were
                 self.options = oldoptions
 
-    def ExportEnergyUsage(self, options={}, progress=None):
+    def ExportEnergyUsage(self, options={}, progress=None, wait=True, **targets):
         progupdate = None 
         if progress is not None: progupdate = progress.Update
-        oldoptions = self._updateOptions(options)
+        oldoptions = self._updateOptions(options, targets)
         try:
 			CallInternalPlugin(EOFTPLUGIN_ENERGYUSAGEEXPORT, self, progupdate)
 			CallUserPlugins(EOFTPLUGIN_ENERGYUSAGEEXPORT, progress, self, progupdate)
+			if wait:
+				EOFTInternalPlugin.WaitForExports()
         finally:
             if oldoptions is not None:
                 # restore the options to what they were
                 self.options = oldoptions
-    def ExportDynamicResults(self, options={}, progress=None):
+    def ExportDynamicResults(self, options={}, progress=None, wait=True, **targets):
         progupdate = None 
         if progress is not None: progupdate = progress.Update
-        oldoptions = self._updateOptions(options)
+        oldoptions = self._updateOptions(options, targets)
         try:
 			CallInternalPlugin(EOFTPLUGIN_DYNAMICRESULTSEXPORT, self, progupdate)
 			CallUserPlugins(EOFTPLUGIN_DYNAMICRESULTSEXPORT, progress, self, progupdate)
+			if wait:
+				EOFTInternalPlugin.WaitForExports()
         finally:
             if oldoptions is not None:
                 # restore the options to what they were
                 self.options = oldoptions
 
-    def ExportEpilog(self, options={}, progress=None):
+    def ExportEpilog(self, options={}, progress=None, wait=True, **targets):
         progupdate = None 
         if progress is not None: progupdate = progress.Update
-        oldoptions = self._updateOptions(options)
+        oldoptions = self._updateOptions(options, targets)
         try:
 			CallInternalPlugin(EOFTPLUGIN_EPILOGEXPORT, self, progupdate)
 			CallUserPlugins(EOFTPLUGIN_EPILOGEXPORT, progress, self, progupdate)
+			if wait:
+				EOFTInternalPlugin.WaitForExports()
         finally:
             if oldoptions is not None:
                 # restore the options to what they were
                 self.options = oldoptions
 
-    def Export(self, options={}, progress=None):
-        ''' Export all output file sections '''
+    def Export(self, options={}, progress=None, **targets):
+        ''' Export all output file sections to the CSVs and so on named by
+        options (a dictionary) or targets (keyword arguments), eg.
+            eof.Export(prolog_node_csv='nodes.csv', dynamic_node_csv='dnodes.csv')
+        which are used instead of the options the file was read with for
+        this export only.
+        '''
 
-        oldoptions = self._updateOptions(options)
+        oldoptions = self._updateOptions(options, targets)
         try:
-            self.ExportProlog({}, progress)
-            self.ExportEnergyUsage({}, progress)
-            self.ExportDynamicResults({}, progress)
-            self.ExportEpilog({}, progress)
+            # the CSVs are written at the same time with --export_jobs
+            self.ExportProlog({}, progress, False)
+            self.ExportEnergyUsage({}, progress, False)
+            self.ExportDynamicResults({}, progress, False)
+            self.ExportEpilog({}, progress, False)
+            EOFTInternalPlugin.WaitForExports()
         finally:
             if oldoptions is not None:
                 # restore the options to what they were
                 self.options = oldoptions
 
 
-def main():
+def StreamWanted(options):
+    ''' True if the dynamic results are only wanted for CSVs, so they can
+        be written as each period is read (see --stream) instead of being
+        kept and memory use does not depend on the number of periods.
+        Only for the command line, where everything to export is known
+        before the file is read, and not if a user plugin reads, prints or
+        exports the dynamic results, as they would not be kept for it.
+    '''
+    for msg in [EOFTPLUGIN_DYNAMICRESULTSREAD, EOFTPLUGIN_DYNAMICRESULTSPRINT,
+            EOFTPLUGIN_DYNAMICRESULTSEXPORT]:
+        if len(EOFTUserMethods[msg]) > 0:
+            return False
+    return (not options.stream and not options.mmap
+            and (options.silent or not options.dynamic_results)
+            and not options.all
+            and options.npy_dir is None and options.sqlite is None
+            and not options.cache and options.cache_dir is None
+            and (options.dynamic_node_csv is not None
+                or options.dynamic_link_csv is not None
+                or options.wide_csv is not None))
+
+
+def main(args = sys.argv[1:]):
+    '''Run command line args: read the output file named or, with --batch,
+    each of the output files named (see EOFTBatch.py).  No return value.
+    '''
     #sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")))
-    # the constructor uses the sys.argv by default
-    epanetoutput = EPANETOutputFile()
-    #print epanetoutput.options
-    #print epanetoutput.args
+    Initialize()
+    if NeedPlugins(args):
+        LoadPlugins()
+    (options, args) = EOFTparser.parse_args(args)
+    if StreamWanted(options):
+        options.stream = True
+        if options.verbose and not options.silent:
+            print(_("Writing the dynamic results CSVs as the file is read"))
+    if options.batch:
+        import EOFTBatch
+        EOFTBatch.Run(options, args)
+    else:
+        epanetoutput = EPANETOutputFile(args, None, options)
+        #print epanetoutput.options
+        #print epanetoutput.args
 
 
 if __name__ == '__main__':
@@ -18,6 +18,9 @@
 #   EnergyUse	dictionary of entries read from output file Energy Use section
 #   DynamicResults list of dictionaries of entries read from output file
 #   			Dynamic Results section - one per timestep in the file
+#   			(with --mmap, a sequence which builds each dictionary
+#   			when it is first indexed, and with --stream, empty:
+#   			use DynamicResultsPeriod to see each period)
 #   Epilog		dictionary of entries read from output file Epilog section
 #   fname		name of file to read
 #   f			file we are reading
@@ -26,6 +29,11 @@
 # underscore '_' as a prefix to the key to make sure names remain unique.
 #
 # The Init function is called when the plugin is first loaded.
+# Plugins are only loaded when a file is opened with one of their command
+# line options (or with -h), which EPANETOutputFile finds in the manifest
+# that it writes to the user's cache directory after loading them (see
+# EPANETOutputFile.NeedPlugins), so a plugin with nothing to do unless its
+# options are given costs nothing otherwise.
 # This function initialises the plugin eg. adding command line options to
 # the parser provided.  Extra command line options should only be given
 # a long option which should be prefixed with the plugin name followed
@@ -73,6 +81,9 @@
 # - EnergyUsageRead: the energy usage section has been read
 # - EnergyUsagePrint: print the energy usage section
 # - EnergyUsageExport: export the energy usage section
+# - DynamicResultsPeriod: one dynamic results period has been read (sent
+#   once for each period as the dynamic results section is read, before
+#   DynamicResultsRead)
 # - DynamicResultsRead: the dynamic results section has been read
 # - DynamicResultsPrint: print the dynamic results section
 # - DynamicResultsExport: export the dynamic results section
@@ -151,6 +162,12 @@ class EOFTPlugin():
         ''' Callback message: epxort file energy usage section. Progress 0-100. '''
         #print("%s:EnergyUsageExport(%s)" % (self.__class__.__name__, eof))
 
+    def DynamicResultsPeriod(self, eof, i, TimeStepD):
+        ''' Callback message: dynamic results period eof.DynamicPeriods[i] has been read.
+            TimeStepD may be reused for the next period, so copy any values needed later.
+            Not sent with --mmap. '''
+        #print("%s:DynamicResultsPeriod(%s, %d)" % (self.__class__.__name__, eof, i))
+
     def DynamicResultsRead(self, eof, progupdate):
         ''' Callback message: file dynamic results section has been read. Progress 80-89. '''
         #print("%s:DynamicResultsRead(%s)" % (self.__class__.__name__, eof))
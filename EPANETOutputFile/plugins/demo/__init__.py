@@ -15,6 +15,8 @@
 #   EnergyUse   dictionary of entries read from output file Energy Use section
 #   DynamicResults list of dictionaries of entries read from output file
 #               Dynamic Results section - one per timestep in the file
+#               (with --mmap, a sequence which builds each dictionary
+#               when it is first indexed)
 #   Epilog      dictionary of entries read from output file Epilog section
 #   fname       name of file to read
 #   f           file we are reading
@@ -94,7 +96,6 @@
 #
 
 import os
-import struct
 from optparse import OptionGroup
 
 #print(dir())
@@ -128,6 +129,7 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         self.minMinVelContext = (None, None)
         self.maxMaxVel = None
         self.maxMaxVelContext = (None, None)
+        self.haveDynamicInfo = False
         pass
 
     # These are the callback messages that can be overridden
@@ -206,9 +208,9 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         if self.options.demo_info:
             if progupdate:
                 progupdate(100,_('Demo plugin FileOpen starting.'))
-            # if we have been called , the file has been verified to some
-            # extent by the internal plugin.
-            # we want to display the file section sizes, so we need to know:
+            # if we have been called , the file has been verified by the
+            # internal plugin, which has also worked out the file section
+            # sizes (eof.Layout) from:
             # 1. number of nodes (from prolog - 8 bytes in)
             # 2. number of links (from prolog - 16 bytes in)
             # 3. number of tanks and reservoirs (from prolog - 12 bytes in)
@@ -218,18 +220,17 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
             # Energy use size: 28*Npumps + 4
             # Dynamic results size: (16*Nnodes + 32*Nlinks)*Nperiods
             # Epilog size: 28
-            eof.f.seek(8)
-            Nnodes, = struct.unpack('<i', eof.f.read(4))
-            Ntanks, = struct.unpack('<i', eof.f.read(4))
-            Nlinks, = struct.unpack('<i', eof.f.read(4))
-            Npumps, = struct.unpack('<i', eof.f.read(4))
+            # and has kept the counts in eof.Prolog
+            Nnodes = eof.Prolog['nNodes']
+            Ntanks = eof.Prolog['nResTanks']
+            Nlinks = eof.Prolog['nLinks']
+            Npumps = eof.Prolog['nPumps']
             Nperiods = eof.Epilog['nPeriods']
-            PrologSize = 884 + 36*Nnodes + 52*Nlinks + 8*Ntanks
-            EnergyUseSize = 28*Npumps + 4
-            DynamicResultsSize = (16*Nnodes + 32*Nlinks)*Nperiods
-            EpilogSize = 28
-            TotalSize = PrologSize + EnergyUseSize + DynamicResultsSize + EpilogSize
-            eof.f.seek(0)
+            PrologSize = eof.Layout['PrologSize']
+            EnergyUseSize = eof.Layout['EnergyUseSize']
+            DynamicResultsSize = eof.Layout['DynamicResultsSize']
+            EpilogSize = eof.Layout['EpilogSize']
+            TotalSize = eof.Layout['FileSize']
             if not eof.options.silent:
                 print('DEMO: File section size definitions:')
                 print('DEMO:   Prolog size: 884 + 36*Nnodes + 52*Nlinks + 8*Ntanks')
@@ -309,7 +310,20 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         if self.options.demo_verbose:
             print("DEMO: %s:DynamicResultsRead(eof)" % self.__class__.__name__)
         if self.options.demo_dynamic_results_info:
-            nNodes = eof.Prolog['nNodes']
+            # only collect the statistics if all the variables they use
+            # have been read (see --node_variables and --link_variables)
+            self.haveDynamicInfo = True
+            for name in ['NodeDemand', 'NodeHead', 'NodePressure',
+                    'NodeWaterQuality', 'LinkVelocity']:
+                if name not in eof.DynamicVariables:
+                    print(_('DEMO: %s not read: skipping dynamic results info') % name)
+                    self.haveDynamicInfo = False
+            if (len(eof.DynamicResults) == 0 or len(eof.DynamicNodes) == 0
+                    or len(eof.DynamicLinks) == 0):
+                print(_('DEMO: no timesteps, nodes or links read: skipping dynamic results info'))
+                self.haveDynamicInfo = False
+            if not self.haveDynamicInfo:
+                return
             minMinDemand = float("+inf")
             maxMaxDemand = float("-inf")
             minMinHead = float("+inf")
@@ -318,45 +332,28 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
             maxMaxPress = float("-inf")
             minMinWaterQ = float("+inf")
             maxMaxWaterQ = float("-inf")
-            for i in range (0, eof.Epilog['nPeriods']):
-                minDemand = float("+inf")
-                maxDemand = float("-inf")
-                minHead = float("+inf")
-                maxHead = float("-inf")
-                minPress = float("+inf")
-                maxPress = float("-inf")
-                minWaterQ = float("+inf")
-                maxWaterQ = float("-inf")
-                d = eof.DynamicResults[i]
-                for j in range (0, nNodes):
-                    dem = d['NodeDemand'][j]
-                    if dem < minDemand:
-                        minDemand = dem
-                        minDemandContext = (i,j)
-                    if dem > maxDemand:
-                        maxDemand = dem
-                        maxDemandContext = (i,j)
-                    head = d['NodeHead'][j]
-                    if head < minHead:
-                        minHead = head
-                        minHeadContext = (i,j)
-                    if head > maxHead:
-                        maxHead = head
-                        maxHeadContext = (i,j)
-                    press = d['NodePressure'][j]
-                    if press < minPress:
-                        minPress = press
-                        minPressContext = (i,j)
-                    if press > maxPress:
-                        maxPress = press
-                        maxPressContext = (i,j)
-                    waterq = d['NodeWaterQuality'][j]
-                    if waterq < minWaterQ:
-                        minWaterQ = waterq
-                        minWaterQContext = (i,j)
-                    if waterq > maxWaterQ:
-                        maxWaterQ = waterq
-                        maxWaterQContext = (i,j)
+            minMinVel = float("+inf")
+            maxMaxVel = float("-inf")
+            for n in range (0, len(eof.DynamicResults)):
+                # work on each variable's values for the whole period at once
+                d = eof.DynamicResults[n]
+                # timestep in the file (see --timesteps and --time_window)
+                i = eof.DynamicPeriods[n]
+                minDemand, j, maxDemand, k = _MinMax(d['NodeDemand'], eof.DynamicNodes)
+                minDemandContext = (i,j)
+                maxDemandContext = (i,k)
+                minHead, j, maxHead, k = _MinMax(d['NodeHead'], eof.DynamicNodes)
+                minHeadContext = (i,j)
+                maxHeadContext = (i,k)
+                minPress, j, maxPress, k = _MinMax(d['NodePressure'], eof.DynamicNodes)
+                minPressContext = (i,j)
+                maxPressContext = (i,k)
+                minWaterQ, j, maxWaterQ, k = _MinMax(d['NodeWaterQuality'], eof.DynamicNodes)
+                minWaterQContext = (i,j)
+                maxWaterQContext = (i,k)
+                minVel, j, maxVel, k = _MinMax(d['LinkVelocity'], eof.DynamicLinks)
+                minVelContext = (i,j)
+                maxVelContext = (i,k)
 
                 d['demo_NodeDemandMin'] = minDemand
                 d['demo_NodeDemandMinContext'] = minDemandContext
@@ -374,6 +371,10 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
                 d['demo_NodeWaterQMinContext'] = minWaterQContext
                 d['demo_NodeWaterQMax'] = maxWaterQ
                 d['demo_NodeWaterQMaxContext'] = maxWaterQContext
+                d['demo_LinkVelocityMin'] = minVel
+                d['demo_LinkVelocityMinContext'] = minVelContext
+                d['demo_LinkVelocityMax'] = maxVel
+                d['demo_LinkVelocityMaxContext'] = maxVelContext
 
                 if minDemand < minMinDemand:
                     minMinDemand = minDemand
@@ -399,6 +400,12 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
                 if maxWaterQ > maxMaxWaterQ:
                     maxMaxWaterQ = maxWaterQ
                     maxMaxWaterQContext = maxWaterQContext
+                if minVel < minMinVel:
+                    minMinVel = minVel
+                    minMinVelContext = minVelContext
+                if maxVel > maxMaxVel:
+                    maxMaxVel = maxVel
+                    maxMaxVelContext = maxVelContext
 
             # save the answers
             self.minMinDemand = minMinDemand
@@ -417,33 +424,6 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
             self.minMinWaterQContext = minMinWaterQContext
             self.maxMaxWaterQ = maxMaxWaterQ
             self.maxMaxWaterQContext = maxMaxWaterQContext
-
-            nLinks = eof.Prolog['nLinks']
-            minMinVel = float("+inf")
-            maxMaxVel = float("-inf")
-            for i in range (0, eof.Epilog['nPeriods']):
-                minVel = float("+inf")
-                maxVel = float("-inf")
-                d = eof.DynamicResults[i]
-                for j in range (0, nLinks):
-                    if d['LinkVelocity'][j] < minVel:
-                        minVel = d['LinkVelocity'][j]
-                        minVelContext = (i,j)
-                    if d['LinkVelocity'][j] > maxVel:
-                        maxVel = d['LinkVelocity'][j]
-                        maxVelContext = (i,j)
-                d['demo_LinkVelocityMin'] = minVel
-                d['demo_LinkVelocityMinContext'] = minVelContext
-                d['demo_LinkVelocityMax'] = maxVel
-                d['demo_LinkVelocityMaxContext'] = maxVelContext
-                if minVel < minMinVel:
-                    minMinVel = minVel
-                    minMinVelContext = minVelContext
-                if maxVel > maxMaxVel:
-                    maxMaxVel = maxVel
-                    maxMaxVelContext = maxVelContext
-
-            # save the answers
             self.minMinVel = minMinVel
             self.minMinVelContext = minMinVelContext
             self.maxMaxVel = maxMaxVel
@@ -453,10 +433,11 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
         ''' Callback message: print file dynamic results section. Progress 0-100. '''
         if self.options.demo_verbose:
             print("DEMO: %s:DynamicResultsPrint(eof)" % self.__class__.__name__)
-        if self.options.demo_dynamic_results_info and not eof.options.silent:
-            for i in range (0, eof.Epilog['nPeriods']):
-                d = eof.DynamicResults[i]
-                print(_("DEMO: TimeStep %d") % i)
+        if (self.options.demo_dynamic_results_info and self.haveDynamicInfo
+                and not eof.options.silent):
+            for n in range (0, len(eof.DynamicResults)):
+                d = eof.DynamicResults[n]
+                print(_("DEMO: TimeStep %d") % eof.DynamicPeriods[n])
                 print(_('DEMO:   Minimum node demand %f (%d), Maximum node demand %f (%d)' % (
                     d['demo_NodeDemandMin'], d['demo_NodeDemandMinContext'][1],
                     d['demo_NodeDemandMax'], d['demo_NodeDemandMaxContext'][1])))
@@ -526,6 +507,27 @@ class DemoPlugin(EPANETOutputFilePlugin.EOFTPlugin):
 
 
 
+def _MinMax(values, indexes):
+    ''' Find the minimum and maximum of a row of values.
+
+        Args:
+            values:         values for one variable at one timestep
+            indexes (list): node or link index of each value
+
+        Returns:
+            (min, index of min, max, index of max) using the first index
+            of each if they occur more than once
+    '''
+    if hasattr(values, 'argmin'):
+        # NumPy array
+        j = int(values.argmin())
+        k = int(values.argmax())
+    else:
+        j = values.index(min(values))
+        k = values.index(max(values))
+    return (values[j], indexes[j], values[k], indexes[k])
+
+
 def Initialize():
     #print("demo.__init__.py: Initialize()")
     return DemoPlugin()
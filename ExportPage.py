@@ -191,6 +191,10 @@ class ExportPage(wx.Panel):
                     # don't overwrite
                     return
 
+            # write the files at the same time, with a thread for each CPU
+            # (not processes, which must not be started from the GUI)
+            options["export_jobs"] = 0
+            options["export_threads"] = True
             self.epanetoutputfile().Export(options)
 
         except Exception, e:
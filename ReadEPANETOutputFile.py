@@ -30,7 +30,112 @@
 #   -L DYNAMIC_LINK_CSV, --dynamic_link_csv=DYNAMIC_LINK_CSV
 #                         write CSV for links from dynamic results to
 #                         DYNAMIC_LINK_CSV
+#   --wide_csv=VARIABLE=WIDE_CSV
+#                         write CSV WIDE_CSV of dynamic results VARIABLE (eg.
+#                         NodePressure=pressure.csv) with a row for each
+#                         timestep and a column for each node or link; can be
+#                         given more than once
+#   --npy_dir=NPY_DIR     write each dynamic results variable to
+#                         NPY_DIR/VARIABLE.npy (4-byte floats, timesteps x nodes
+#                         or links) with NPY_DIR/manifest.json describing them
+#   --sqlite=DB           write the prolog, energy use, epilog and dynamic
+#                         results to tables in SQLite database DB (replaced if
+#                         it exists)
+#   --csv_precision=DIGITS
+#                         write the numbers in CSVs with DIGITS decimal places
+#                         (default 6)
+#   -o OUTPUT, --output=OUTPUT
+#                         write what is displayed to OUTPUT instead of the
+#                         standard output (compressed if OUTPUT ends in .gz,
+#                         .bz2 or .xz)
+#   --compress_level=LEVEL
+#                         compression LEVEL of the CSVs and OUTPUT written
+#                         compressed because their names end in .gz, .bz2 or .xz
+#                         (1-9 for .gz and .bz2, default 9; 0-9 for .xz, default
+#                         6)
+#   --compress_thread     compress the CSVs and OUTPUT in a background thread
+#                         while the text is formatted
+#   --export_jobs=JOBS    write the CSVs at the same time with JOBS processes
+#                         (default 1, 0 for one per CPU)
+#   --export_threads      with --export_jobs, write the CSVs with threads
+#                         instead of processes (as the GUI does, which must not
+#                         start processes)
+#   --shard_timesteps=TIMESTEPS
+#                         write the dynamic results CSVs in pieces of TIMESTEPS
+#                         timesteps, each by its own process with --export_jobs,
+#                         which are joined in order
+#   --shard_files         keep the pieces of the dynamic results CSVs as
+#                         separate CSVs, named by adding the piece number before
+#                         .csv (eg. NODES.0000.csv)
 #   -c, --coda, --epilog  display file epilog
+#   --decoder=DECODER     decode dynamic results using DECODER (auto, numpy or
+#                         array)
+#   --mmap                memory map dynamic results and only decode timesteps
+#                         when used
+#   --jobs=JOBS           read the dynamic results with JOBS processes (default
+#                         1, 0 for one per CPU)
+#   --compact             keep prolog arrays and dynamic results as arrays of
+#                         4-byte values instead of lists of Python numbers to
+#                         use less memory
+#   --cache               keep the decoded file in a cache file next to it
+#                         (FILENAME.eoftc) and load it from there when it has
+#                         not changed
+#   --cache_dir=CACHE_DIR
+#                         like --cache, but keep the cache files in CACHE_DIR
+#   --cache_size=CACHE_MB
+#                         limit the cache files in CACHE_DIR to CACHE_MB
+#                         megabytes in total, removing the least recently used
+#   --stream              pass each dynamic results timestep to the plugins and
+#                         the dynamic results CSVs as it is read without keeping
+#                         them, so memory use does not depend on the number of
+#                         timesteps (dynamic results cannot then be displayed or
+#                         exported except as CSVs; used from the command line
+#                         whenever CSVs are the only dynamic results output)
+#   --node_variables=NODE_VARIABLES
+#                         only read the comma separated NODE_VARIABLES from the
+#                         dynamic results (default all of NodeDemand, NodeHead,
+#                         NodePressure, NodeWaterQuality)
+#   --link_variables=LINK_VARIABLES
+#                         only read the comma separated LINK_VARIABLES from the
+#                         dynamic results (default all of LinkFlow,
+#                         LinkVelocity, LinkHeadloss, LinkAveWaterQuality,
+#                         LinkStatus, LinkSetting, LinkReactionRate,
+#                         LinkFrictionFactor)
+#   --timesteps=START:STOP:STEP
+#                         only read dynamic results timesteps START:STOP:STEP
+#                         (0-based, as a Python slice so -24: is the last 24
+#                         timesteps)
+#   --time_window=FROM:TO
+#                         only read dynamic results reported from FROM to TO
+#                         seconds inclusive
+#   -i NODE_IDS, --node_ids=NODE_IDS
+#                         only read dynamic results for the comma separated
+#                         NODE_IDS (or @FILENAME to read the IDs from a file)
+#   -I LINK_IDS, --link_ids=LINK_IDS
+#                         only read dynamic results for the comma separated
+#                         LINK_IDS (or @FILENAME to read the IDs from a file)
+#   --header_only         only read the prolog counts and epilog, check the file
+#                         size and display a summary of the file sections
+#   --profile             display the calls, wall and CPU time, bytes read and
+#                         peak memory growth of each step of reading the file
+#                         and of each plugin
+#   --profile_json=PROFILE_JSON
+#                         write the times of each step (see --profile) to
+#                         PROFILE_JSON
+#   --progress            display the progress of reading the file, its
+#                         throughput and the time left on the standard error
+#   --progress_rate=UPDATES
+#                         update the progress at most UPDATES times a second
+#                         (default 10, 0 for every update)
+#   --batch               read each of the output files named (or matched by
+#                         glob patterns) with the same options; {name} and {dir}
+#                         in the names of the files written are replaced by the
+#                         name and directory of each output file
+#   --batch_jobs=JOBS     with --batch, read the output files with JOBS
+#                         processes (default 1, 0 for one per CPU)
+#   --batch_summary=SUMMARY_CSV
+#                         with --batch, write the counts, warnings and time
+#                         taken for each output file to SUMMARY_CSV
 #   -v, --verbose         display verbose output
 # 
 # How to get an EPANET output file:
@@ -60,9 +165,13 @@ from datetime import datetime
 from EPANETOutputFile import EPANETOutputFile
 
 
-start_time = datetime.now()
-epanetoutput = EPANETOutputFile.EPANETOutputFile()
-end_time = datetime.now()
-dt = end_time - start_time
-print(_("Time taken: %s") % dt)
+# the guard lets --jobs worker processes import this file (as they do on
+# Windows) without reading the output file again
+if __name__ == '__main__':
+    start_time = datetime.now()
+    # with --batch, many output files are read (see EOFTBatch.py)
+    EPANETOutputFile.main()
+    end_time = datetime.now()
+    dt = end_time - start_time
+    print(_("Time taken: %s") % dt)
 
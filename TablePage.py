@@ -356,6 +356,73 @@ See http://pypi.python.org/pypi/xlutils"""))
         #comments, texts = xlsg.ReadExcelCOM(fname, sname, rows, cols)
         #self.TablesXLSGrid.PopulateGrid(book, sheet, texts, comments)
 
+    def NodeColumnSources(self):
+        # where the values for each of the NodeColumnList() columns come from:
+        # ('prolog', key) or ('dynamic', variable) or None if not available
+        return [
+                ('prolog', 'NodeElev'),         # 'Elevation'
+                None,                           # 'Base Demand'
+                None,                           # 'Intial Quality'
+                ('dynamic', 'NodeDemand'),      # 'Demand'
+                ('dynamic', 'NodeHead'),        # 'Head'
+                ('dynamic', 'NodePressure'),    # 'Pressure'
+                ('dynamic', 'NodeWaterQuality') # 'Water Quality'
+            ]
+
+    def LinkColumnSources(self):
+        # where the values for each of the LinkColumnList() columns come from:
+        # ('prolog', key) or ('dynamic', variable) or None if not available
+        return [
+                ('prolog', 'LinkLength'),       # 'Length'
+                ('prolog', 'LinkDiam'),         # 'Diameter'
+                None,                           # 'Roughness'
+                None,                           # 'Bulk Coeff.'
+                None,                           # 'Wall Coeff.'
+                ('dynamic', 'LinkFlow'),        # 'Flow'
+                ('dynamic', 'LinkVelocity'),    # 'Velocity'
+                ('dynamic', 'LinkHeadloss'),    # 'Unit Headloss'
+                ('dynamic', 'LinkFrictionFactor'), # 'Friction Factor'
+                ('dynamic', 'LinkReactionRate'),   # 'Reaction Rate'
+                ('dynamic', 'LinkAveWaterQuality'),# 'Water Quality'
+                ('dynamic', 'LinkStatus')       # 'Status'
+            ]
+
+    def GenerateRows(self, sources, tmin, tmax, idmin, idmax):
+        """ Generate (timestep, ID index, values) for each table row.
+
+        Values are looked up a whole row or column at a time rather than
+        one cell at a time.  None is given for columns with no values.
+        """
+        eof = self.epanetoutputfile()
+        p = eof.Prolog
+        cube = eof.ResultCube
+        if idmax - idmin == 1 and cube is not None:
+            # one ID over time: use its time series from the result cube
+            j = idmin
+            columns = []
+            for source in sources:
+                if source is None:
+                    columns.append(None)
+                elif source[0] == 'prolog':
+                    columns.append([p[source[1]][j]] * cube.nPeriods)
+                else:
+                    columns.append(cube.Column(source[1], j))
+            for i in range(tmin, tmax):
+                yield (i, j, [None if c is None else c[i] for c in columns])
+        else:
+            for i in range(tmin, tmax):
+                d = eof.DynamicResults[i]
+                rows = []
+                for source in sources:
+                    if source is None:
+                        rows.append(None)
+                    elif source[0] == 'prolog':
+                        rows.append(p[source[1]])
+                    else:
+                        rows.append(d[source[1]])
+                for j in range(idmin, idmax):
+                    yield (i, j, [None if r is None else r[j] for r in rows])
+
     def GenerateTable(self):
         book = Workbook()
         fname = 'simple.xls'
@@ -370,120 +437,58 @@ See http://pypi.python.org/pypi/xlutils"""))
             tmax = self.TimestepIndex
 
         heading_xf = xlwt.easyxf('font: bold on; align: wrap on, vert centre, horiz center')
+        # format with 0 decimal places
+        timestep_xf = xlwt.easyxf(num_format_str='#,##0')
         if self.TableNodeRadioButton.GetValue() == True:
             # generate a node table
+            ids = self.epanetoutputfile().Prolog['NodeID']
             if self.NodeIDChoice == 0:
                 # generate table for all node IDs
                 idmin = 0
-                idmax = len(self.epanetoutputfile().Prolog['NodeID'])
+                idmax = len(ids)
             else:
                 # generate table for selected node ID
                 idmin = self.NodeIDChoice-1 # (-1 since we offer 'All' option)
                 idmax = self.NodeIDChoice
-
-            rownum = 0
-            
             cols = self.NodeColumnList()
-            sheet1.write(rownum,0,_('Timestep'),heading_xf)
-            sheet1.col(0).width = 3000
-            sheet1.write(rownum,1,_('ID'),heading_xf)
-            sheet1.col(1).width = 3000
-            for i in range(len(self.NodeCurrentColumns)):
-                sheet1.write(rownum,i+2,cols[self.NodeCurrentColumns[i]],heading_xf)
-                sheet1.col(i+2).width = 4000
-
-            rownum = 1
-            for i in range(tmin, tmax):
-                t = self.epanetoutputfile().DynamicResults[i]
-                p = self.epanetoutputfile().Prolog
-                for j in range(idmin, idmax):
-                    # format with 0 decimal places
-                    sheet1.write(rownum,0,i,
-                        xlwt.easyxf(num_format_str='#,##0'))
-                    sheet1.write(rownum,1,
-                        self.epanetoutputfile().Prolog['NodeID'][j])
-                    for k in range(len(self.NodeCurrentColumns)):
-                        if self.NodeCurrentColumns[k] == 0:   # Elevation
-                            sheet1.write(rownum,k+2,p['NodeElev'][j])
-                        elif self.NodeCurrentColumns[k] == 1: # Base Demand
-                            pass
-                        elif self.NodeCurrentColumns[k] == 2: # Initial Quality
-                            pass
-                        elif self.NodeCurrentColumns[k] == 3: # Demand
-                            sheet1.write(rownum,k+2,t['NodeDemand'][j])
-                        elif self.NodeCurrentColumns[k] == 4: # Head
-                            sheet1.write(rownum,k+2,t['NodeHead'][j])
-                        elif self.NodeCurrentColumns[k] == 5: # Pressure
-                            sheet1.write(rownum,k+2,t['NodePressure'][j])
-                        elif self.NodeCurrentColumns[k] == 6: # Water Quality
-                            sheet1.write(rownum,k+2,t['NodeWaterQuality'][j])
-                    rownum += 1
-                    if rownum >= 65536:
-                        break
-                if rownum >= 65536:
-                    break
+            allsources = self.NodeColumnSources()
+            current = self.NodeCurrentColumns
         else:
             # generate a link table
+            ids = self.epanetoutputfile().Prolog['LinkID']
             if self.LinkIDChoice == 0:
                 # generate table for all IDs
                 idmin = 0
-                idmax = len(self.epanetoutputfile().Prolog['LinkID'])
+                idmax = len(ids)
             else:
                 # generate table for selected link ID
                 idmin = self.LinkIDChoice-1 # (-1 since we offer 'All' option)
                 idmax = self.LinkIDChoice
-
-            rownum = 0
-
             cols = self.LinkColumnList()
-            sheet1.write(rownum,0,_('Timestep'),heading_xf)
-            sheet1.col(0).width = 3000
-            sheet1.write(rownum,1,_('ID'),heading_xf)
-            sheet1.col(1).width = 3000
-            for i in range(len(self.LinkCurrentColumns)):
-                sheet1.write(rownum,i+2,cols[self.LinkCurrentColumns[i]],heading_xf)
-                sheet1.col(i+2).width = 4000
-
-            rownum = 1
-            for i in range(tmin, tmax):
-                t = self.epanetoutputfile().DynamicResults[i]
-                p = self.epanetoutputfile().Prolog
-                for j in range(idmin, idmax):
-                    # format with 0 decimal places
-                    sheet1.write(rownum,0,i,
-                        xlwt.easyxf(num_format_str='#,##0'))
-                    sheet1.write(rownum,1,
-                        self.epanetoutputfile().Prolog['LinkID'][j])
-                    for k in range(len(self.LinkCurrentColumns)):
-                        if self.LinkCurrentColumns[k] == 0:   # Length
-                            sheet1.write(rownum,k+2,p['LinkLength'][j])
-                        elif self.LinkCurrentColumns[k] == 1: # Diameter
-                            sheet1.write(rownum,k+2,p['LinkDiam'][j])
-                        elif self.LinkCurrentColumns[k] == 2: # Roughness
-                            pass
-                        elif self.LinkCurrentColumns[k] == 3: # Bulk Coeff.
-                            pass
-                        elif self.LinkCurrentColumns[k] == 4: # Wall Coeff.
-                            pass
-                        elif self.LinkCurrentColumns[k] == 5: # Flow
-                            sheet1.write(rownum,k+2,t['LinkFlow'][j])
-                        elif self.LinkCurrentColumns[k] == 6: # Velocity
-                            sheet1.write(rownum,k+2,t['LinkVelocity'][j])
-                        elif self.LinkCurrentColumns[k] == 7: # Unit Headloss
-                            sheet1.write(rownum,k+2,t['LinkHeadloss'][j])
-                        elif self.LinkCurrentColumns[k] == 8: # Friction Factor
-                            sheet1.write(rownum,k+2,t['LinkFrictionFactor'][j])
-                        elif self.LinkCurrentColumns[k] == 9: # Reaction Rate
-                            sheet1.write(rownum,k+2,t['LinkReactionRate'][j])
-                        elif self.LinkCurrentColumns[k] == 10: # Water Quality
-                            sheet1.write(rownum,k+2,t['LinkAveWaterQuality'][j])
-                        elif self.LinkCurrentColumns[k] == 11: # Status
-                            sheet1.write(rownum,k+2,t['LinkStatus'][j])
-                    rownum += 1
-                    if rownum >= 65536:
-                        break
-                if rownum >= 65536:
-                    break
+            allsources = self.LinkColumnSources()
+            current = self.LinkCurrentColumns
+
+        rownum = 0
+
+        sheet1.write(rownum,0,_('Timestep'),heading_xf)
+        sheet1.col(0).width = 3000
+        sheet1.write(rownum,1,_('ID'),heading_xf)
+        sheet1.col(1).width = 3000
+        for i in range(len(current)):
+            sheet1.write(rownum,i+2,cols[current[i]],heading_xf)
+            sheet1.col(i+2).width = 4000
+
+        sources = [allsources[k] for k in current]
+        rownum = 1
+        for i, j, values in self.GenerateRows(sources, tmin, tmax, idmin, idmax):
+            sheet1.write(rownum,0,i,timestep_xf)
+            sheet1.write(rownum,1,ids[j])
+            for k in range(len(values)):
+                if values[k] is not None:
+                    sheet1.write(rownum,k+2,float(values[k]))
+            rownum += 1
+            if rownum >= 65536:
+                break
 
         if rownum >= 65536:
             errdlg = wx.MessageDialog(self,
@@ -1,6 +1,6 @@
 #!/bin/sh
-#xgettext -n -d EPANETOutputFile -p EPANETOutputFile -o EPANETOutputFile.pot -L Python EPANETOutputFile/EPANETOutputFile.py EPANETOutputFile/EPANETOutputFilePlugin.py EPANETOutputFile/EOFTInternalPlugin.py EPANETOutputFile/plugins/demo/__init__.py
-xgettext --copyright-holder="Mark Morgan" --package-name="EPANETOutputFile" --package-version="1.0.0" -n -d EPANETOutputFile -p EPANETOutputFile -o EPANETOutputFile.pot -L Python EPANETOutputFile/EPANETOutputFile.py EPANETOutputFile/EPANETOutputFilePlugin.py EPANETOutputFile/EOFTInternalPlugin.py EPANETOutputFile/plugins/demo/__init__.py
+#xgettext -n -d EPANETOutputFile -p EPANETOutputFile -o EPANETOutputFile.pot -L Python EPANETOutputFile/EPANETOutputFile.py EPANETOutputFile/EPANETOutputFilePlugin.py EPANETOutputFile/EOFTInternalPlugin.py EPANETOutputFile/EOFTDecoder.py EPANETOutputFile/EOFTResults.py EPANETOutputFile/EOFTCompress.py EPANETOutputFile/EOFTSqlite.py EPANETOutputFile/EOFTProgress.py EPANETOutputFile/EOFTBatch.py EPANETOutputFile/plugins/demo/__init__.py
+xgettext --copyright-holder="Mark Morgan" --package-name="EPANETOutputFile" --package-version="1.0.0" -n -d EPANETOutputFile -p EPANETOutputFile -o EPANETOutputFile.pot -L Python EPANETOutputFile/EPANETOutputFile.py EPANETOutputFile/EPANETOutputFilePlugin.py EPANETOutputFile/EOFTInternalPlugin.py EPANETOutputFile/EOFTDecoder.py EPANETOutputFile/EOFTResults.py EPANETOutputFile/EOFTCompress.py EPANETOutputFile/EOFTSqlite.py EPANETOutputFile/EOFTProgress.py EPANETOutputFile/EOFTBatch.py EPANETOutputFile/plugins/demo/__init__.py
 cp EPANETOutputFile/EPANETOutputFile.pot locale
 xgettext --copyright-holder="Mark Morgan" --package-name="EPANETFileUtility" --package-version="0.0.1" -n -d EPANETFileUtility -o EPANETFileUtility.pot -L Python EPANETFileUtility.py DataPage.py TablePage.py ExportPage.py
 cp EPANETFileUtility.pot locale
@@ -0,0 +1,89 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# Microbenchmark of sending messages to the plugins
+#
+# Each message is sent once per file, except DynamicResultsPeriod which is
+# sent for every dynamic results period, so its cost is multiplied by the
+# number of periods and plugins.  This times sending a message from the
+# table made when the plugins are loaded (EPANETOutputFile.CallUserPlugins
+# and EPANETOutputFile.PeriodRead) against calling the method of every
+# plugin, as was done before the table, with PLUGINS plugins of which only
+# OVERRIDING override the methods.
+#
+# Usage (from the test directory):
+#   python benchdispatch.py [PLUGINS [OVERRIDING [PERIODS]]]
+#
+
+import os
+import sys
+import timeit
+
+args = [int(a) for a in sys.argv[1:]]
+sys.argv = sys.argv[:1]
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+        '..'))
+from EPANETOutputFile import EPANETOutputFile as EOF
+from EPANETOutputFile import EPANETOutputFilePlugin
+
+PLUGINS = 10
+OVERRIDING = 1
+PERIODS = 100000
+if len(args) > 0: PLUGINS = args[0]
+if len(args) > 1: OVERRIDING = args[1]
+if len(args) > 2: PERIODS = args[2]
+
+
+class IdlePlugin(EPANETOutputFilePlugin.EOFTPlugin):
+    ''' A plugin which only has the inherited methods '''
+    pass
+
+
+class BusyPlugin(EPANETOutputFilePlugin.EOFTPlugin):
+    ''' A plugin which overrides the methods timed '''
+
+    def PrologRead(self, eof, progupdate):
+        pass
+
+    def DynamicResultsPeriod(self, eof, i, TimeStepD):
+        pass
+
+
+def CallEveryPlugin(plugins, name, *args):
+    for p in plugins:
+        getattr(p, name)(*args)
+
+
+def main():
+    plugins = ([BusyPlugin() for n in range(0, OVERRIDING)]
+            + [IdlePlugin() for n in range(OVERRIDING, PLUGINS)])
+    # only the benchmark's plugins are sent the messages
+    EOF.EOFTUserMethods = dict([(msg, []) for msg in EOF.EOFTPLUGIN_METHODS])
+    for p in plugins:
+        for msg, method in EOF.PluginMethods(p).items():
+            EOF.EOFTUserMethods[msg].append(method)
+    EOF.EOFTPeriodMethods = EOF.EOFTUserMethods[EOF.EOFTPLUGIN_DYNAMICRESULTSPERIOD]
+    PeriodRead = EOF.EPANETOutputFile.__dict__['PeriodRead']
+    TimeStepD = {}
+
+    print('%d plugins, %d overriding, %d periods' % (PLUGINS, OVERRIDING,
+            PERIODS))
+    timings = [
+        ('DynamicResultsPeriod, every plugin',
+            lambda: CallEveryPlugin(plugins, 'DynamicResultsPeriod', None,
+                0, TimeStepD)),
+        ('DynamicResultsPeriod, table (PeriodRead)',
+            lambda: PeriodRead(None, 0, TimeStepD)),
+        ('PrologRead, every plugin',
+            lambda: CallEveryPlugin(plugins, 'PrologRead', None, None)),
+        ('PrologRead, table (CallUserPlugins)',
+            lambda: EOF.CallUserPlugins(EOF.EOFTPLUGIN_PROLOGREAD, None,
+                None, None)),
+    ]
+    for text, f in timings:
+        seconds = min(timeit.repeat(f, number=PERIODS, repeat=3))
+        print('%-42s %8.3f s  %8.3f us per message' % (text, seconds,
+                seconds*1e6/PERIODS))
+
+
+if __name__ == '__main__':
+    main()
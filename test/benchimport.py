@@ -0,0 +1,92 @@
+# ex:set ts=4 sw=4: <- for vim
+#
+# Startup benchmark of importing the EPANETOutputFile library
+#
+# Importing EPANETOutputFile.EPANETOutputFile must not have side effects
+# (installing gettext's _, making the command line option parser, importing
+# the internal plugin with its decoders or the user plugins) as scripts
+# which just need the reader and short-lived worker processes pay for them;
+# they happen when the first file is opened (see Initialize and
+# LoadPlugins).  This imports the library in fresh Python processes, reports
+# any side effects and the time taken to import it and then to set it up.
+#
+# Usage (from the test directory):
+#   python benchimport.py [--check] [REPEATS]
+# With --check only side effects and an import slower than IMPORT_BUDGET
+# are reported (so nothing is output if there are none), as runtests does,
+# and the exit status is 1 if there are any.
+#
+
+import os
+import subprocess
+import sys
+
+REPEATS = 10
+
+# most seconds importing the library may take with --check (best of
+# CHECK_REPEATS, so a busy machine does not fail it)
+IMPORT_BUDGET = 0.1
+CHECK_REPEATS = 3
+
+# run in a fresh process: the side effects and times of importing the library
+CHILD = '''
+import sys, time
+sys.path.insert(0, %r)
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+start = time.time()
+from EPANETOutputFile import EPANETOutputFile as EOF
+imported = time.time()
+problems = []
+if hasattr(builtins, '_'):
+    problems.append('gettext _ is installed')
+if EOF.EOFTparser is not None:
+    problems.append('the option parser has been made')
+if EOF.EOFTInternalPlugin is not None:
+    problems.append('the internal plugin has been installed')
+for name in sorted(sys.modules):
+    if name.startswith('EPANETOutputFile.plugins.') or name == 'numpy':
+        problems.append('%%s has been imported' %% name)
+EOF.Initialize()
+initialized = time.time()
+EOF.LoadPlugins()
+loaded = time.time()
+print('%%f %%f %%f' %% (imported - start, initialized - imported,
+        loaded - initialized))
+for problem in problems:
+    print(problem)
+'''
+
+
+def main():
+    check = '--check' in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != '--check']
+    repeats = REPEATS
+    if len(args) > 0: repeats = int(args[0])
+    if check: repeats = CHECK_REPEATS
+    top = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    times = []
+    for n in range(0, repeats):
+        output = subprocess.Popen([sys.executable, '-c', CHILD % top],
+                stdout=subprocess.PIPE).communicate()[0]
+        lines = output.decode('utf-8').splitlines()
+        times.append([float(t) for t in lines[0].split()])
+        problems = lines[1:]
+    best = min([t[0] for t in times])
+    if check and best > IMPORT_BUDGET:
+        problems.append('took %.1f ms, more than %.1f ms' %
+                (best*1000, IMPORT_BUDGET*1000))
+    for problem in problems:
+        print('importing EPANETOutputFile: %s' % problem)
+    if check and len(problems) > 0:
+        sys.exit(1)
+    if not check:
+        for k, text in enumerate(['import', 'Initialize()', 'LoadPlugins()']):
+            print('%-16s %8.1f ms (best of %d)' % (text,
+                    min([t[k] for t in times])*1000, repeats))
+
+
+if __name__ == '__main__':
+    main()
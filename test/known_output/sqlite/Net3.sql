@@ -0,0 +1,284 @@
+BEGIN TRANSACTION;
+CREATE TABLE EnergyUse (LinkIndex INTEGER, Utilization REAL, AveEfficiency REAL, AvekWPerVol REAL, AvekW REAL, PeakkW REAL, AveCostPerDay REAL);
+INSERT INTO "EnergyUse" VALUES(117,5.83333320617675781232e+01,75.0,3.13571960449218749993e+02,62.0591926574707,6.27637176513671875017e+01,0.0);
+INSERT INTO "EnergyUse" VALUES(118,2.87430553436279296875e+01,75.0,3.94078979492187499991e+02,3.09379669189453125003e+02,310.7861328125,0.0);
+CREATE TABLE Info (Section TEXT, Name TEXT, Value);
+INSERT INTO "Info" VALUES('Prolog','ChemicalConcentrationUnits','% from');
+INSERT INTO "Info" VALUES('Prolog','ChemicalName','% from');
+INSERT INTO "Info" VALUES('Prolog','FlowUnitsOptNum',1);
+INSERT INTO "Info" VALUES('Prolog','FlowUnitsOption','gallons/minute');
+INSERT INTO "Info" VALUES('Prolog','InputFile','C:\Users\Mark Morgan\Documents\WaterSums\Examples\Net3.inp');
+INSERT INTO "Info" VALUES('Prolog','PressureUnitsOptNum',0);
+INSERT INTO "Info" VALUES('Prolog','PressureUnitsOption','pounds/square inch');
+INSERT INTO "Info" VALUES('Prolog','ReportFile','');
+INSERT INTO "Info" VALUES('Prolog','ReportTimeStep',3600);
+INSERT INTO "Info" VALUES('Prolog','SimulationDuration',86400);
+INSERT INTO "Info" VALUES('Prolog','StartTime',0);
+INSERT INTO "Info" VALUES('Prolog','TimeStatsOptNum',0);
+INSERT INTO "Info" VALUES('Prolog','TimeStatsOption','none (report time series)');
+INSERT INTO "Info" VALUES('Prolog','Title1','EPANET Example Network 3 ');
+INSERT INTO "Info" VALUES('Prolog','Title2','Example showing how the percent of Lake water in a dual-source  ');
+INSERT INTO "Info" VALUES('Prolog','Title3','system changes over time. ');
+INSERT INTO "Info" VALUES('Prolog','WaterQualityOptNum',3);
+INSERT INTO "Info" VALUES('Prolog','WaterQualityOption','source trace');
+INSERT INTO "Info" VALUES('Prolog','magic',516114521);
+INSERT INTO "Info" VALUES('Prolog','nJunctions',92);
+INSERT INTO "Info" VALUES('Prolog','nLinks',119);
+INSERT INTO "Info" VALUES('Prolog','nNodes',97);
+INSERT INTO "Info" VALUES('Prolog','nPipes',117);
+INSERT INTO "Info" VALUES('Prolog','nPumps',2);
+INSERT INTO "Info" VALUES('Prolog','nResTanks',5);
+INSERT INTO "Info" VALUES('Prolog','nReservoirs',2);
+INSERT INTO "Info" VALUES('Prolog','nTanks',3);
+INSERT INTO "Info" VALUES('Prolog','nValves',0);
+INSERT INTO "Info" VALUES('Prolog','source_node_index',93);
+INSERT INTO "Info" VALUES('Prolog','version',20012);
+INSERT INTO "Info" VALUES('Epilog','AveBulkReactionRate',0.0);
+INSERT INTO "Info" VALUES('Epilog','AveSourceInflowRate',0.0);
+INSERT INTO "Info" VALUES('Epilog','AveTankReactionRate',0.0);
+INSERT INTO "Info" VALUES('Epilog','AveWallReactionRate',0.0);
+INSERT INTO "Info" VALUES('Epilog','WarningFlag',0);
+INSERT INTO "Info" VALUES('Epilog','magic',516114521);
+INSERT INTO "Info" VALUES('Epilog','nPeriods',25);
+CREATE TABLE LinkResults (LinkIndex INTEGER, TimeStep INTEGER, LinkFlow REAL, LinkVelocity REAL, LinkHeadloss REAL, LinkAveWaterQuality REAL, LinkStatus REAL, LinkSetting REAL, LinkReactionRate REAL, LinkFrictionFactor REAL);
+INSERT INTO "LinkResults" VALUES(0,20,1.58643347167968749994e+03,6.61212801933288574218e-02,0.0,0.0,3.0,199.0,0.0,0.0);
+INSERT INTO "LinkResults" VALUES(4,20,7.69208345445804297924e-05,9.69814664131263270974e-08,0.0,100.0,3.0,110.0,0.0,0.0);
+INSERT INTO "LinkResults" VALUES(0,22,-1.70831860351562500001e+03,7.12013542652130126953e-02,1.54129185830242931842e-04,0.0,3.0,199.0,0.0,1.61527488380670547485e-02);
+INSERT INTO "LinkResults" VALUES(4,22,8.44300593598745763301e-05,1.0644906467405235162e-07,0.0,100.0,3.0,110.0,0.0,0.0);
+INSERT INTO "LinkResults" VALUES(0,24,-2184.298828125,9.10398364067077636718e-02,1.54129185830242931842e-04,0.0,3.0,199.0,0.0,9.88007057458162307739e-03);
+INSERT INTO "LinkResults" VALUES(4,24,8.44000896904617547988e-05,1.06411278011364629492e-07,0.0,100.0,3.0,110.0,0.0,0.0);
+CREATE TABLE Links (LinkIndex INTEGER PRIMARY KEY, ID TEXT, StartNodeIndex INTEGER, EndNodeIndex INTEGER, Type TEXT, Length REAL, Diameter REAL);
+INSERT INTO "Links" VALUES(0,'20',96,2,'Pipe',99.0,99.0);
+INSERT INTO "Links" VALUES(1,'40',94,4,'Pipe',99.0,99.0);
+INSERT INTO "Links" VALUES(2,'50',95,5,'Pipe',99.0,99.0);
+INSERT INTO "Links" VALUES(3,'60',92,6,'Pipe',1231.0,24.0);
+INSERT INTO "Links" VALUES(4,'101',0,9,'Pipe',14200.0,18.0);
+INSERT INTO "Links" VALUES(5,'103',9,10,'Pipe',1350.0,16.0);
+INSERT INTO "Links" VALUES(6,'105',9,11,'Pipe',2540.0,12.0);
+INSERT INTO "Links" VALUES(7,'107',11,12,'Pipe',1470.0,12.0);
+INSERT INTO "Links" VALUES(8,'109',10,13,'Pipe',3940.0,16.0);
+INSERT INTO "Links" VALUES(9,'111',13,14,'Pipe',2000.0,12.0);
+INSERT INTO "Links" VALUES(10,'112',16,14,'Pipe',1160.0,12.0);
+INSERT INTO "Links" VALUES(11,'113',14,15,'Pipe',1680.0,12.0);
+INSERT INTO "Links" VALUES(12,'114',16,15,'Pipe',2000.0,8.0);
+INSERT INTO "Links" VALUES(13,'115',12,16,'Pipe',1950.0,8.0);
+INSERT INTO "Links" VALUES(14,'116',15,53,'Pipe',1660.0,12.0);
+INSERT INTO "Links" VALUES(15,'117',85,11,'Pipe',2725.0,12.0);
+INSERT INTO "Links" VALUES(16,'119',16,17,'Pipe',2180.0,12.0);
+INSERT INTO "Links" VALUES(17,'120',18,19,'Pipe',730.0,12.0);
+INSERT INTO "Links" VALUES(18,'121',19,17,'Pipe',1870.0,12.0);
+INSERT INTO "Links" VALUES(19,'122',20,19,'Pipe',2050.0,8.0);
+INSERT INTO "Links" VALUES(20,'123',20,18,'Pipe',2000.0,30.0);
+INSERT INTO "Links" VALUES(21,'125',21,20,'Pipe',1500.0,30.0);
+INSERT INTO "Links" VALUES(22,'129',20,22,'Pipe',930.0,24.0);
+INSERT INTO "Links" VALUES(23,'131',22,23,'Pipe',3240.0,24.0);
+INSERT INTO "Links" VALUES(24,'133',2,23,'Pipe',785.0,20.0);
+INSERT INTO "Links" VALUES(25,'135',23,24,'Pipe',900.0,24.0);
+INSERT INTO "Links" VALUES(26,'137',24,25,'Pipe',6480.0,16.0);
+INSERT INTO "Links" VALUES(27,'145',24,26,'Pipe',2750.0,8.0);
+INSERT INTO "Links" VALUES(28,'147',26,27,'Pipe',2050.0,8.0);
+INSERT INTO "Links" VALUES(29,'149',28,27,'Pipe',1400.0,8.0);
+INSERT INTO "Links" VALUES(30,'151',1,28,'Pipe',1650.0,8.0);
+INSERT INTO "Links" VALUES(31,'153',29,27,'Pipe',3510.0,12.0);
+INSERT INTO "Links" VALUES(32,'155',30,29,'Pipe',2200.0,12.0);
+INSERT INTO "Links" VALUES(33,'159',30,31,'Pipe',880.0,12.0);
+INSERT INTO "Links" VALUES(34,'161',31,32,'Pipe',1020.0,8.0);
+INSERT INTO "Links" VALUES(35,'163',32,33,'Pipe',1170.0,12.0);
+INSERT INTO "Links" VALUES(36,'169',22,33,'Pipe',4560.0,8.0);
+INSERT INTO "Links" VALUES(37,'171',18,32,'Pipe',3460.0,12.0);
+INSERT INTO "Links" VALUES(38,'173',18,34,'Pipe',2080.0,30.0);
+INSERT INTO "Links" VALUES(39,'175',34,35,'Pipe',2910.0,30.0);
+INSERT INTO "Links" VALUES(40,'177',35,36,'Pipe',2000.0,30.0);
+INSERT INTO "Links" VALUES(41,'179',36,37,'Pipe',430.0,30.0);
+INSERT INTO "Links" VALUES(42,'180',37,38,'Pipe',150.0,14.0);
+INSERT INTO "Links" VALUES(43,'181',38,39,'Pipe',490.0,14.0);
+INSERT INTO "Links" VALUES(44,'183',86,41,'Pipe',590.0,30.0);
+INSERT INTO "Links" VALUES(45,'185',40,41,'Pipe',60.0,8.0);
+INSERT INTO "Links" VALUES(46,'186',50,59,'Pipe',99.9000015258789,8.0);
+INSERT INTO "Links" VALUES(47,'187',41,42,'Pipe',1270.0,30.0);
+INSERT INTO "Links" VALUES(48,'189',42,43,'Pipe',50.0,30.0);
+INSERT INTO "Links" VALUES(49,'191',89,42,'Pipe',760.0,24.0);
+INSERT INTO "Links" VALUES(50,'193',3,46,'Pipe',30.0,24.0);
+INSERT INTO "Links" VALUES(51,'195',46,44,'Pipe',30.0,12.0);
+INSERT INTO "Links" VALUES(52,'197',44,45,'Pipe',30.0,12.0);
+INSERT INTO "Links" VALUES(53,'199',45,47,'Pipe',210.0,12.0);
+INSERT INTO "Links" VALUES(54,'201',4,45,'Pipe',1190.0,12.0);
+INSERT INTO "Links" VALUES(55,'202',49,48,'Pipe',99.9000015258789,8.0);
+INSERT INTO "Links" VALUES(56,'203',47,49,'Pipe',510.0,8.0);
+INSERT INTO "Links" VALUES(57,'204',48,60,'Pipe',4530.0,12.0);
+INSERT INTO "Links" VALUES(58,'205',59,49,'Pipe',1325.0,12.0);
+INSERT INTO "Links" VALUES(59,'207',51,47,'Pipe',1350.0,12.0);
+INSERT INTO "Links" VALUES(60,'209',51,50,'Pipe',500.0,8.0);
+INSERT INTO "Links" VALUES(61,'211',41,88,'Pipe',646.0,12.0);
+INSERT INTO "Links" VALUES(62,'213',52,50,'Pipe',2560.0,12.0);
+INSERT INTO "Links" VALUES(63,'215',87,51,'Pipe',1230.0,12.0);
+INSERT INTO "Links" VALUES(64,'217',52,53,'Pipe',520.0,12.0);
+INSERT INTO "Links" VALUES(65,'219',53,54,'Pipe',360.0,12.0);
+INSERT INTO "Links" VALUES(66,'221',36,54,'Pipe',2300.0,8.0);
+INSERT INTO "Links" VALUES(67,'223',55,52,'Pipe',1150.0,12.0);
+INSERT INTO "Links" VALUES(68,'225',14,55,'Pipe',2790.0,12.0);
+INSERT INTO "Links" VALUES(69,'229',43,56,'Pipe',4000.0,24.0);
+INSERT INTO "Links" VALUES(70,'231',56,57,'Pipe',630.0,24.0);
+INSERT INTO "Links" VALUES(71,'233',57,58,'Pipe',120.0,24.0);
+INSERT INTO "Links" VALUES(72,'235',56,90,'Pipe',725.0,12.0);
+INSERT INTO "Links" VALUES(73,'237',60,62,'Pipe',1200.0,12.0);
+INSERT INTO "Links" VALUES(74,'238',62,61,'Pipe',450.0,12.0);
+INSERT INTO "Links" VALUES(75,'239',91,62,'Pipe',1430.0,12.0);
+INSERT INTO "Links" VALUES(76,'240',61,63,'Pipe',510.0,12.0);
+INSERT INTO "Links" VALUES(77,'241',63,64,'Pipe',885.0,12.0);
+INSERT INTO "Links" VALUES(78,'243',64,65,'Pipe',1210.0,16.0);
+INSERT INTO "Links" VALUES(79,'245',65,66,'Pipe',990.0,16.0);
+INSERT INTO "Links" VALUES(80,'247',66,67,'Pipe',4285.0,16.0);
+INSERT INTO "Links" VALUES(81,'249',67,68,'Pipe',1660.0,16.0);
+INSERT INTO "Links" VALUES(82,'251',68,69,'Pipe',2050.0,14.0);
+INSERT INTO "Links" VALUES(83,'257',68,70,'Pipe',1560.0,12.0);
+INSERT INTO "Links" VALUES(84,'261',66,71,'Pipe',2200.0,8.0);
+INSERT INTO "Links" VALUES(85,'263',71,72,'Pipe',1960.0,12.0);
+INSERT INTO "Links" VALUES(86,'269',65,73,'Pipe',2080.0,12.0);
+INSERT INTO "Links" VALUES(87,'271',73,71,'Pipe',790.0,8.0);
+INSERT INTO "Links" VALUES(88,'273',73,74,'Pipe',510.0,12.0);
+INSERT INTO "Links" VALUES(89,'275',74,75,'Pipe',35.0,12.0);
+INSERT INTO "Links" VALUES(90,'277',75,76,'Pipe',2200.0,12.0);
+INSERT INTO "Links" VALUES(91,'281',75,77,'Pipe',445.0,10.0);
+INSERT INTO "Links" VALUES(92,'283',74,78,'Pipe',430.0,12.0);
+INSERT INTO "Links" VALUES(93,'285',77,78,'Pipe',10.0,12.0);
+INSERT INTO "Links" VALUES(94,'287',77,81,'Pipe',1390.0,10.0);
+INSERT INTO "Links" VALUES(95,'289',5,81,'Pipe',925.0,10.0);
+INSERT INTO "Links" VALUES(96,'291',81,80,'Pipe',1100.0,10.0);
+INSERT INTO "Links" VALUES(97,'293',81,79,'Pipe',1100.0,8.0);
+INSERT INTO "Links" VALUES(98,'295',78,79,'Pipe',1450.0,12.0);
+INSERT INTO "Links" VALUES(99,'297',19,82,'Pipe',645.0,8.0);
+INSERT INTO "Links" VALUES(100,'299',82,83,'Pipe',350.0,8.0);
+INSERT INTO "Links" VALUES(101,'301',83,85,'Pipe',1400.0,8.0);
+INSERT INTO "Links" VALUES(102,'303',82,84,'Pipe',1400.0,8.0);
+INSERT INTO "Links" VALUES(103,'305',17,84,'Pipe',645.0,12.0);
+INSERT INTO "Links" VALUES(104,'307',84,85,'Pipe',350.0,12.0);
+INSERT INTO "Links" VALUES(105,'309',86,87,'Pipe',1580.0,8.0);
+INSERT INTO "Links" VALUES(106,'311',53,87,'Pipe',1170.0,12.0);
+INSERT INTO "Links" VALUES(107,'313',88,51,'Pipe',646.0,12.0);
+INSERT INTO "Links" VALUES(108,'315',46,89,'Pipe',260.0,24.0);
+INSERT INTO "Links" VALUES(109,'317',90,91,'Pipe',2230.0,8.0);
+INSERT INTO "Links" VALUES(110,'319',90,60,'Pipe',645.0,12.0);
+INSERT INTO "Links" VALUES(111,'321',37,86,'Pipe',1200.0,30.0);
+INSERT INTO "Links" VALUES(112,'323',57,91,'Pipe',300.0,12.0);
+INSERT INTO "Links" VALUES(113,'325',88,89,'Pipe',1290.0,8.0);
+INSERT INTO "Links" VALUES(114,'329',8,21,'Pipe',45500.0,30.0);
+INSERT INTO "Links" VALUES(115,'330',6,7,'Pipe',1.0,30.0);
+INSERT INTO "Links" VALUES(116,'333',7,8,'Pipe',1.0,30.0);
+INSERT INTO "Links" VALUES(117,'10',93,0,'Pump',0.0,0.0);
+INSERT INTO "Links" VALUES(118,'335',6,8,'Pump',0.0,0.0);
+CREATE TABLE NodeResults (NodeIndex INTEGER, TimeStep INTEGER, NodeDemand REAL, NodeHead REAL, NodePressure REAL, NodeWaterQuality REAL);
+INSERT INTO "NodeResults" VALUES(0,20,0.0,1.49543106079101562498e+02,1.10192787647247314453e+00,100.0);
+INSERT INTO "NodeResults" VALUES(1,20,0.0,1.56931030273437499998e+02,5.41326141357421875e+01,2.474308013916015625e+00);
+INSERT INTO "NodeResults" VALUES(21,20,1830.0,1.59599273681640624993e+02,64.3880615234375,0.0);
+INSERT INTO "NodeResults" VALUES(0,22,0.0,1.48313262939453124997e+02,5.69036841392517089843e-01,100.0);
+INSERT INTO "NodeResults" VALUES(1,22,360.0,1.46422332763671875005e+02,4.95791969299316406241e+01,2.474308013916015625e+00);
+INSERT INTO "NodeResults" VALUES(21,22,1.84000012207031249994e+03,1.644708251953125e+02,6.649890899658203125e+01,0.0);
+INSERT INTO "NodeResults" VALUES(0,24,0.0,1.47691787719726562496e+02,2.99751609563827514648e-01,100.0);
+INSERT INTO "NodeResults" VALUES(1,24,620.0,1.27987648010253906249e+02,4.15914497375488281241e+01,0.0);
+INSERT INTO "NodeResults" VALUES(21,24,0.0,1.67558242797851562498e+02,6.78366851806640625e+01,0.0);
+CREATE TABLE Nodes (NodeIndex INTEGER PRIMARY KEY, ID TEXT, Type TEXT, Elevation REAL, XSectArea REAL);
+INSERT INTO "Nodes" VALUES(0,'10','Junction',147.0,0.0);
+INSERT INTO "Nodes" VALUES(1,'15','Junction',32.0,0.0);
+INSERT INTO "Nodes" VALUES(2,'20','Junction',129.0,0.0);
+INSERT INTO "Nodes" VALUES(3,'35','Junction',12.5,0.0);
+INSERT INTO "Nodes" VALUES(4,'40','Junction',1.31899993896484374995e+02,0.0);
+INSERT INTO "Nodes" VALUES(5,'50','Junction',116.5,0.0);
+INSERT INTO "Nodes" VALUES(6,'60','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(7,'601','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(8,'61','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(9,'101','Junction',42.0,0.0);
+INSERT INTO "Nodes" VALUES(10,'103','Junction',43.0,0.0);
+INSERT INTO "Nodes" VALUES(11,'105','Junction',28.5,0.0);
+INSERT INTO "Nodes" VALUES(12,'107','Junction',22.0,0.0);
+INSERT INTO "Nodes" VALUES(13,'109','Junction',2.02999992370605468754e+01,0.0);
+INSERT INTO "Nodes" VALUES(14,'111','Junction',10.0,0.0);
+INSERT INTO "Nodes" VALUES(15,'113','Junction',2.0,0.0);
+INSERT INTO "Nodes" VALUES(16,'115','Junction',14.0,0.0);
+INSERT INTO "Nodes" VALUES(17,'117','Junction',1.36000003814697265622e+01,0.0);
+INSERT INTO "Nodes" VALUES(18,'119','Junction',2.0,0.0);
+INSERT INTO "Nodes" VALUES(19,'120','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(20,'121','Junction',-2.0,0.0);
+INSERT INTO "Nodes" VALUES(21,'123','Junction',11.0,0.0);
+INSERT INTO "Nodes" VALUES(22,'125','Junction',11.0,0.0);
+INSERT INTO "Nodes" VALUES(23,'127','Junction',56.0,0.0);
+INSERT INTO "Nodes" VALUES(24,'129','Junction',51.0,0.0);
+INSERT INTO "Nodes" VALUES(25,'131','Junction',6.0,0.0);
+INSERT INTO "Nodes" VALUES(26,'139','Junction',31.0,0.0);
+INSERT INTO "Nodes" VALUES(27,'141','Junction',4.0,0.0);
+INSERT INTO "Nodes" VALUES(28,'143','Junction',-4.5,0.0);
+INSERT INTO "Nodes" VALUES(29,'145','Junction',1.0,0.0);
+INSERT INTO "Nodes" VALUES(30,'147','Junction',18.5,0.0);
+INSERT INTO "Nodes" VALUES(31,'149','Junction',16.0,0.0);
+INSERT INTO "Nodes" VALUES(32,'151','Junction',33.5,0.0);
+INSERT INTO "Nodes" VALUES(33,'153','Junction',6.61999969482421875017e+01,0.0);
+INSERT INTO "Nodes" VALUES(34,'157','Junction',1.31000003814697265627e+01,0.0);
+INSERT INTO "Nodes" VALUES(35,'159','Junction',6.0,0.0);
+INSERT INTO "Nodes" VALUES(36,'161','Junction',4.0,0.0);
+INSERT INTO "Nodes" VALUES(37,'163','Junction',5.0,0.0);
+INSERT INTO "Nodes" VALUES(38,'164','Junction',5.0,0.0);
+INSERT INTO "Nodes" VALUES(39,'166','Junction',-2.0,0.0);
+INSERT INTO "Nodes" VALUES(40,'167','Junction',-5.0,0.0);
+INSERT INTO "Nodes" VALUES(41,'169','Junction',-5.0,0.0);
+INSERT INTO "Nodes" VALUES(42,'171','Junction',-4.0,0.0);
+INSERT INTO "Nodes" VALUES(43,'173','Junction',-4.0,0.0);
+INSERT INTO "Nodes" VALUES(44,'177','Junction',8.0,0.0);
+INSERT INTO "Nodes" VALUES(45,'179','Junction',8.0,0.0);
+INSERT INTO "Nodes" VALUES(46,'181','Junction',8.0,0.0);
+INSERT INTO "Nodes" VALUES(47,'183','Junction',11.0,0.0);
+INSERT INTO "Nodes" VALUES(48,'184','Junction',16.0,0.0);
+INSERT INTO "Nodes" VALUES(49,'185','Junction',16.0,0.0);
+INSERT INTO "Nodes" VALUES(50,'187','Junction',12.5,0.0);
+INSERT INTO "Nodes" VALUES(51,'189','Junction',4.0,0.0);
+INSERT INTO "Nodes" VALUES(52,'191','Junction',25.0,0.0);
+INSERT INTO "Nodes" VALUES(53,'193','Junction',18.0,0.0);
+INSERT INTO "Nodes" VALUES(54,'195','Junction',15.5,0.0);
+INSERT INTO "Nodes" VALUES(55,'197','Junction',23.0,0.0);
+INSERT INTO "Nodes" VALUES(56,'199','Junction',-2.0,0.0);
+INSERT INTO "Nodes" VALUES(57,'201','Junction',1.00000001490116119384e-01,0.0);
+INSERT INTO "Nodes" VALUES(58,'203','Junction',2.0,0.0);
+INSERT INTO "Nodes" VALUES(59,'204','Junction',21.0,0.0);
+INSERT INTO "Nodes" VALUES(60,'205','Junction',21.0,0.0);
+INSERT INTO "Nodes" VALUES(61,'206','Junction',1.0,0.0);
+INSERT INTO "Nodes" VALUES(62,'207','Junction',9.0,0.0);
+INSERT INTO "Nodes" VALUES(63,'208','Junction',16.0,0.0);
+INSERT INTO "Nodes" VALUES(64,'209','Junction',-2.0,0.0);
+INSERT INTO "Nodes" VALUES(65,'211','Junction',7.0,0.0);
+INSERT INTO "Nodes" VALUES(66,'213','Junction',7.0,0.0);
+INSERT INTO "Nodes" VALUES(67,'215','Junction',7.0,0.0);
+INSERT INTO "Nodes" VALUES(68,'217','Junction',6.0,0.0);
+INSERT INTO "Nodes" VALUES(69,'219','Junction',4.0,0.0);
+INSERT INTO "Nodes" VALUES(70,'225','Junction',8.0,0.0);
+INSERT INTO "Nodes" VALUES(71,'229','Junction',10.5,0.0);
+INSERT INTO "Nodes" VALUES(72,'231','Junction',5.0,0.0);
+INSERT INTO "Nodes" VALUES(73,'237','Junction',14.0,0.0);
+INSERT INTO "Nodes" VALUES(74,'239','Junction',13.0,0.0);
+INSERT INTO "Nodes" VALUES(75,'241','Junction',13.0,0.0);
+INSERT INTO "Nodes" VALUES(76,'243','Junction',14.0,0.0);
+INSERT INTO "Nodes" VALUES(77,'247','Junction',18.0,0.0);
+INSERT INTO "Nodes" VALUES(78,'249','Junction',18.0,0.0);
+INSERT INTO "Nodes" VALUES(79,'251','Junction',30.0,0.0);
+INSERT INTO "Nodes" VALUES(80,'253','Junction',36.0,0.0);
+INSERT INTO "Nodes" VALUES(81,'255','Junction',27.0,0.0);
+INSERT INTO "Nodes" VALUES(82,'257','Junction',17.0,0.0);
+INSERT INTO "Nodes" VALUES(83,'259','Junction',25.0,0.0);
+INSERT INTO "Nodes" VALUES(84,'261','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(85,'263','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(86,'265','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(87,'267','Junction',21.0,0.0);
+INSERT INTO "Nodes" VALUES(88,'269','Junction',0.0,0.0);
+INSERT INTO "Nodes" VALUES(89,'271','Junction',6.0,0.0);
+INSERT INTO "Nodes" VALUES(90,'273','Junction',8.0,0.0);
+INSERT INTO "Nodes" VALUES(91,'275','Junction',10.0,0.0);
+INSERT INTO "Nodes" VALUES(92,'River','Reservoir',220.0,0.0);
+INSERT INTO "Nodes" VALUES(93,'Lake','Reservoir',167.0,0.0);
+INSERT INTO "Nodes" VALUES(94,'1','Tank',1.31899993896484374995e+02,5674.501953125);
+INSERT INTO "Nodes" VALUES(95,'2','Tank',116.5,1.96349536132812499998e+03);
+INSERT INTO "Nodes" VALUES(96,'3','Tank',129.0,21124.068359375);
+CREATE TABLE TimeSteps (TimeStep INTEGER PRIMARY KEY, Time INTEGER);
+INSERT INTO "TimeSteps" VALUES(20,72000);
+INSERT INTO "TimeSteps" VALUES(22,79200);
+INSERT INTO "TimeSteps" VALUES(24,86400);
+CREATE INDEX NodeResultsByNode ON NodeResults (NodeIndex, TimeStep);
+CREATE INDEX LinkResultsByLink ON LinkResults (LinkIndex, TimeStep);
+COMMIT;
@@ -24,4 +24,127 @@ fc output\Net3_plink.csv known_output\Net3_plink.csv
 fc output\Net3_e.csv known_output\Net3_e.csv
 fc output\Net3_dnode.csv known_output\Net3_dnode.csv
 fc output\Net3_dlink.csv known_output\Net3_dlink.csv
+@REM the standard library decoder must give the same dynamic results
+call :check_dynamic array --decoder=array
+@REM as must decoding memory mapped dynamic results on demand
+call :check_dynamic mmap --mmap
+@REM and keeping the results in compact arrays
+call :check_dynamic compact --compact --decoder=array
+@REM and reading with more than one process
+call :check_dynamic jobs --jobs=2
+@REM and writing the CSVs in pieces with more than one process
+call :check_dynamic export --export_jobs=2 --shard_timesteps=7
+@REM and writing them with more than one thread (as the GUI does)
+call :check_dynamic threads --export_jobs=2 --export_threads
+@REM and writing the CSVs as each timestep is read
+call :check_dynamic stream --stream --decoder=array
+@REM the first run writes the cache files and the second loads from them
+if exist output\cache rmdir /s /q output\cache
+call :check_dynamic cache --cache_dir=output\cache
+call :check_dynamic cache --cache_dir=output\cache
+@REM reading only some of the dynamic results variables writes just their columns
+if not exist output\variables mkdir output\variables
+del /q output\variables\*.csv
+python ..\ReadEPANETOutputFile.py -s --node_variables=NodePressure --link_variables=LinkFlow -N output\variables\Net3_dnode.csv -L output\variables\Net3_dlink.csv data\Net3.hyd > nul 2>&1
+fc output\variables\Net3_dnode.csv known_output\variables\Net3_dnode.csv
+fc output\variables\Net3_dlink.csv known_output\variables\Net3_dlink.csv
+@REM reading only some timesteps seeks to them and writes just their rows
+if not exist output\timesteps mkdir output\timesteps
+del /q output\timesteps\*.csv
+python ..\ReadEPANETOutputFile.py -s --timesteps=-5::2 -N output\timesteps\Net3_dnode.csv -L output\timesteps\Net3_dlink.csv data\Net3.hyd > nul 2>&1
+fc output\timesteps\Net3_dnode.csv known_output\timesteps\Net3_dnode.csv
+fc output\timesteps\Net3_dlink.csv known_output\timesteps\Net3_dlink.csv
+@REM reading only some nodes and links writes just their rows
+if not exist output\ids mkdir output\ids
+del /q output\ids\*.csv
+python ..\ReadEPANETOutputFile.py -s -i 10,123,15 -I 20,101 -N output\ids\Net3_dnode.csv -L output\ids\Net3_dlink.csv data\Net3.hyd > nul 2>&1
+fc output\ids\Net3_dnode.csv known_output\ids\Net3_dnode.csv
+fc output\ids\Net3_dlink.csv known_output\ids\Net3_dlink.csv
+@REM writing the dynamic results as .npy files with a manifest
+if not exist output\npy mkdir output\npy
+del /q output\npy\*.*
+python ..\ReadEPANETOutputFile.py -s --timesteps=-5::2 -i 10,123,15 -I 20,101 --npy_dir=output\npy data\Net3.hyd > nul 2>&1
+fc output\npy\manifest.json known_output\npy\manifest.json
+for %%v in (NodeDemand NodeHead NodePressure NodeWaterQuality LinkFlow LinkVelocity LinkHeadloss LinkAveWaterQuality LinkStatus LinkSetting LinkReactionRate LinkFrictionFactor) do fc /b output\npy\%%v.npy known_output\npy\%%v.npy
+@REM writing the sections to an SQLite database
+if not exist output\sqlite mkdir output\sqlite
+del /q output\sqlite\*.*
+python ..\ReadEPANETOutputFile.py -s --timesteps=-5::2 -i 10,123,15 -I 20,101 --sqlite=output\sqlite\Net3.db data\Net3.hyd > nul 2>&1
+python -c "import sqlite3;print('\n'.join(sqlite3.connect('output/sqlite/Net3.db').iterdump()))" > output\sqlite\Net3.sql
+fc output\sqlite\Net3.sql known_output\sqlite\Net3.sql
+@REM writing the CSVs with fewer decimal places
+if not exist output\precision mkdir output\precision
+del /q output\precision\*.csv
+python ..\ReadEPANETOutputFile.py -s --csv_precision=2 -i 10,123,15 -I 20,101 -n output\precision\Net3_pnode.csv -l output\precision\Net3_plink.csv -E output\precision\Net3_e.csv -N output\precision\Net3_dnode.csv -L output\precision\Net3_dlink.csv data\Net3.hyd > nul 2>&1
+for %%f in (pnode plink e dnode dlink) do fc output\precision\Net3_%%f.csv known_output\precision\Net3_%%f.csv
+@REM writing compressed CSVs and output gives the same text once decompressed
+if not exist output\compress mkdir output\compress
+del /q output\compress\*.*
+python ..\ReadEPANETOutputFile.py -pc --compress_thread -o output\compress\Net3.txt.gz -N output\compress\Net3_dnode.csv.gz -L output\compress\Net3_dlink.csv.bz2 data\Net3.hyd > nul 2>&1
+python -c "import gzip,shutil;shutil.copyfileobj(gzip.open('output/compress/Net3_dnode.csv.gz'),open('output/compress/Net3_dnode.csv','wb'))"
+python -c "import bz2,shutil;shutil.copyfileobj(bz2.BZ2File('output/compress/Net3_dlink.csv.bz2'),open('output/compress/Net3_dlink.csv','wb'))"
+python -c "import gzip,shutil;shutil.copyfileobj(gzip.open('output/compress/Net3.txt.gz'),open('output/compress/Net3.txt','wb'))"
+fc output\compress\Net3_dnode.csv known_output\Net3_dnode.csv
+fc output\compress\Net3_dlink.csv known_output\Net3_dlink.csv
+fc output\compress\Net3.txt known_output\compress\Net3.txt
+@REM writing a variable with a column for each node or link
+if not exist output\wide mkdir output\wide
+del /q output\wide\*.csv
+python ..\ReadEPANETOutputFile.py -s --wide_csv=NodePressure=output\wide\Net3_NodePressure.csv --wide_csv=LinkFlow=output\wide\Net3_LinkFlow.csv data\Net3.hyd > nul 2>&1
+fc output\wide\Net3_NodePressure.csv known_output\wide\Net3_NodePressure.csv
+fc output\wide\Net3_LinkFlow.csv known_output\wide\Net3_LinkFlow.csv
+@REM the steps and plugins profiled with their calls and bytes read
+if not exist output\profile mkdir output\profile
+del /q output\profile\*.*
+python ..\ReadEPANETOutputFile.py -s --demo_info --profile_json=output\profile\Net3.json -N output\profile\Net3_dnode.csv data\Net3.hyd > nul 2>&1
+python -c "import json;print('\n'.join(['%%(Plugin)s %%(Step)s %%(Calls)d %%(BytesRead)d' %% s for s in json.load(open('output/profile/Net3.json'))['Steps']]))" > output\profile\Net3.txt
+fc output\profile\Net3.txt known_output\profile\Net3.txt
+@REM reading a file with Open and exporting it gives the same CSV as the command line
+if not exist output\open mkdir output\open
+del /q output\open\*.*
+python ..\ReadEPANETOutputFile.py -s -i 10,20 --timesteps=-5: -N output\open\Net3_cli_dnode.csv data\Net3.hyd > nul 2>&1
+python -c "import sys;sys.path.insert(0,'..');from EPANETOutputFile import EPANETOutputFile as E;E.Open('data/Net3.hyd',node_ids=['10','20'],timesteps=slice(-5,None)).Export(dynamic_node_csv='output/open/Net3_dnode.csv')" > nul 2>&1
+fc output\open\Net3_dnode.csv output\open\Net3_cli_dnode.csv
+@REM exporting after reading with --stream reads the periods again
+python -c "import sys;sys.path.insert(0,'..');from EPANETOutputFile import EPANETOutputFile as E;E.Open('data/Net3.hyd',stream=True).Export(dynamic_link_csv='output/open/Net3_dlink.csv')" > nul 2>&1
+fc output\open\Net3_dlink.csv known_output\Net3_dlink.csv
+@REM the progress of reading the file (without the throughput and time left)
+if not exist output\progress mkdir output\progress
+del /q output\progress\*.*
+python ..\ReadEPANETOutputFile.py -s --progress --progress_rate=0 -N output\progress\Net3_dnode.csv data\Net3.hyd 2> output\progress\Net3_progress.txt > nul
+python -c "import sys;print('\n'.join([l.split(' [')[0].rstrip() for l in open(sys.argv[1]).read().split('\r') if l.strip()]))" output\progress\Net3_progress.txt > output\progress\Net3.txt
+fc output\progress\Net3.txt known_output\progress\Net3.txt
+@REM reading all the files with --batch in a pool gives the same CSVs, and a summary (without the times)
+if not exist output\batch mkdir output\batch
+del /q output\batch\*.*
+python ..\ReadEPANETOutputFile.py -s --batch --batch_jobs=2 -N "output\batch\{name}_dnode.csv" --batch_summary=output\batch\summary.csv "data\*.hyd" > nul 2>&1
+fc output\batch\Net1_dnode.csv known_output\Net1_dnode.csv
+fc output\batch\Net2_dnode.csv known_output\Net2_dnode.csv
+fc output\batch\Net3_dnode.csv known_output\Net3_dnode.csv
+python -c "import sys;sys.stdout.write(''.join([(lambda s: ', '.join(s[:5]+s[6:]))(l.replace(chr(92), '/').split(', ')) for l in open(sys.argv[1])]))" output\batch\summary.csv > output\batch\summary.txt
+fc output\batch\summary.txt known_output\batch\summary.txt
+@REM a plugin reading the dynamic results still sees them when they are written to a CSV
+if not exist output\plugincsv mkdir output\plugincsv
+del /q output\plugincsv\*.*
+python ..\ReadEPANETOutputFile.py --demo_dynamic_results_info -N output\plugincsv\Net3_dnode.csv data\Net3.hyd 2>&1 | findstr /b DEMO > output\plugincsv\Net3.txt
+fc output\plugincsv\Net3.txt known_output\plugincsv\Net3.txt
+fc output\plugincsv\Net3_dnode.csv known_output\Net3_dnode.csv
+@REM importing the library has no side effects (and is quick)
+python benchimport.py --check
+@REM sending messages to the plugins works (only errors are shown)
+python benchdispatch.py 10 1 1000 > nul
 @endlocal
+@goto :eof
+
+@REM check_dynamic SUBDIR OPTIONS...
+@REM write dynamic results CSVs with extra OPTIONS to output\SUBDIR and compare
+@REM them with the known output
+:check_dynamic
+if not exist output\%1 mkdir output\%1
+del /q output\%1\*.csv
+for %%n in (Net1 Net2 Net3) do (
+python ..\ReadEPANETOutputFile.py -s %2 %3 %4 %5 %6 %7 %8 %9 -N output\%1\%%n_dnode.csv -L output\%1\%%n_dlink.csv data\%%n.hyd > nul 2>&1
+fc output\%1\%%n_dnode.csv known_output\%%n_dnode.csv
+fc output\%1\%%n_dlink.csv known_output\%%n_dlink.csv
+)
+@goto :eof
@@ -23,3 +23,124 @@ diff output/Net3_plink.csv known_output/
 diff output/Net3_e.csv known_output/
 diff output/Net3_dnode.csv known_output/
 diff output/Net3_dlink.csv known_output/
+
+# check_dynamic SUBDIR OPTIONS...
+# write dynamic results CSVs with extra OPTIONS to output/SUBDIR and compare
+# them with the known output
+check_dynamic() {
+    dir=output/$1
+    shift
+    mkdir -p $dir
+    rm -f $dir/*.csv
+    for n in Net1 Net2 Net3; do
+        LANG=en_AU python ../ReadEPANETOutputFile.py -s "$@" -N $dir/${n}_dnode.csv -L $dir/${n}_dlink.csv data/${n}.hyd > /dev/null 2>&1
+        diff $dir/${n}_dnode.csv known_output/
+        diff $dir/${n}_dlink.csv known_output/
+    done
+}
+# the standard library decoder must give the same dynamic results
+check_dynamic array --decoder=array
+# as must decoding memory mapped dynamic results on demand
+check_dynamic mmap --mmap
+# and keeping the results in compact arrays
+check_dynamic compact --compact --decoder=array
+# and reading with more than one process
+check_dynamic jobs --jobs=2
+# and writing the CSVs in pieces with more than one process
+check_dynamic export --export_jobs=2 --shard_timesteps=7
+# and writing them with more than one thread (as the GUI does)
+check_dynamic threads --export_jobs=2 --export_threads
+# and writing the CSVs as each timestep is read
+check_dynamic stream --stream --decoder=array
+# the first run writes the cache files and the second loads from them
+rm -rf output/cache
+check_dynamic cache --cache_dir=output/cache
+check_dynamic cache --cache_dir=output/cache
+# reading only some of the dynamic results variables writes just their columns
+mkdir -p output/variables
+rm -f output/variables/*.csv
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --node_variables=NodePressure --link_variables=LinkFlow -N output/variables/Net3_dnode.csv -L output/variables/Net3_dlink.csv data/Net3.hyd > /dev/null 2>&1
+diff output/variables/Net3_dnode.csv known_output/variables/
+diff output/variables/Net3_dlink.csv known_output/variables/
+# reading only some timesteps seeks to them and writes just their rows
+mkdir -p output/timesteps
+rm -f output/timesteps/*.csv
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --timesteps=-5::2 -N output/timesteps/Net3_dnode.csv -L output/timesteps/Net3_dlink.csv data/Net3.hyd > /dev/null 2>&1
+diff output/timesteps/Net3_dnode.csv known_output/timesteps/
+diff output/timesteps/Net3_dlink.csv known_output/timesteps/
+# reading only some nodes and links writes just their rows
+mkdir -p output/ids
+rm -f output/ids/*.csv
+LANG=en_AU python ../ReadEPANETOutputFile.py -s -i 10,123,15 -I 20,101 -N output/ids/Net3_dnode.csv -L output/ids/Net3_dlink.csv data/Net3.hyd > /dev/null 2>&1
+diff output/ids/Net3_dnode.csv known_output/ids/
+diff output/ids/Net3_dlink.csv known_output/ids/
+# writing the dynamic results as .npy files with a manifest
+rm -rf output/npy
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --timesteps=-5::2 -i 10,123,15 -I 20,101 --npy_dir=output/npy data/Net3.hyd > /dev/null 2>&1
+diff -r output/npy known_output/npy
+# writing the sections to an SQLite database
+mkdir -p output/sqlite
+rm -f output/sqlite/*
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --timesteps=-5::2 -i 10,123,15 -I 20,101 --sqlite=output/sqlite/Net3.db data/Net3.hyd > /dev/null 2>&1
+python -c "import sqlite3;print('\\n'.join(sqlite3.connect('output/sqlite/Net3.db').iterdump()))" > output/sqlite/Net3.sql
+diff output/sqlite/Net3.sql known_output/sqlite/
+# writing the CSVs with fewer decimal places
+mkdir -p output/precision
+rm -f output/precision/*.csv
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --csv_precision=2 -i 10,123,15 -I 20,101 -n output/precision/Net3_pnode.csv -l output/precision/Net3_plink.csv -E output/precision/Net3_e.csv -N output/precision/Net3_dnode.csv -L output/precision/Net3_dlink.csv data/Net3.hyd > /dev/null 2>&1
+for f in pnode plink e dnode dlink; do
+diff output/precision/Net3_$f.csv known_output/precision/
+done
+# writing compressed CSVs and output gives the same text once decompressed
+mkdir -p output/compress
+rm -f output/compress/*
+LANG=en_AU python ../ReadEPANETOutputFile.py -pc --compress_thread -o output/compress/Net3.txt.gz -N output/compress/Net3_dnode.csv.gz -L output/compress/Net3_dlink.csv.bz2 data/Net3.hyd > /dev/null 2>&1
+gzip -dc output/compress/Net3_dnode.csv.gz | diff - known_output/Net3_dnode.csv
+bzip2 -dc output/compress/Net3_dlink.csv.bz2 | diff - known_output/Net3_dlink.csv
+gzip -dc output/compress/Net3.txt.gz | diff - known_output/compress/Net3.txt
+# writing a variable with a column for each node or link
+mkdir -p output/wide
+rm -f output/wide/*.csv
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --wide_csv=NodePressure=output/wide/Net3_NodePressure.csv --wide_csv=LinkFlow=output/wide/Net3_LinkFlow.csv data/Net3.hyd > /dev/null 2>&1
+diff output/wide/Net3_NodePressure.csv known_output/wide/
+diff output/wide/Net3_LinkFlow.csv known_output/wide/
+# the steps and plugins profiled with their calls and bytes read
+mkdir -p output/profile
+rm -f output/profile/*
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --demo_info --profile_json=output/profile/Net3.json -N output/profile/Net3_dnode.csv data/Net3.hyd > /dev/null 2>&1
+python -c "import json;print('\n'.join(['%(Plugin)s %(Step)s %(Calls)d %(BytesRead)d' % s for s in json.load(open('output/profile/Net3.json'))['Steps']]))" > output/profile/Net3.txt
+diff output/profile/Net3.txt known_output/profile/
+# reading a file with Open and exporting it gives the same CSV as the command line
+mkdir -p output/open
+rm -f output/open/*
+LANG=en_AU python ../ReadEPANETOutputFile.py -s -i 10,20 --timesteps=-5: -N output/open/Net3_cli_dnode.csv data/Net3.hyd > /dev/null 2>&1
+LANG=en_AU python -c "import sys;sys.path.insert(0,'..');from EPANETOutputFile import EPANETOutputFile as E;E.Open('data/Net3.hyd',node_ids=['10','20'],timesteps=slice(-5,None)).Export(dynamic_node_csv='output/open/Net3_dnode.csv')" > /dev/null 2>&1
+diff output/open/Net3_dnode.csv output/open/Net3_cli_dnode.csv
+# exporting after reading with --stream reads the periods again
+LANG=en_AU python -c "import sys;sys.path.insert(0,'..');from EPANETOutputFile import EPANETOutputFile as E;E.Open('data/Net3.hyd',stream=True).Export(dynamic_link_csv='output/open/Net3_dlink.csv')" > /dev/null 2>&1
+diff output/open/Net3_dlink.csv known_output/
+# the progress of reading the file (without the throughput and time left)
+mkdir -p output/progress
+rm -f output/progress/*
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --progress --progress_rate=0 -N output/progress/Net3_dnode.csv data/Net3.hyd 2> output/progress/Net3_progress.txt > /dev/null
+python -c "import sys;print('\n'.join([l.split(' [')[0].rstrip() for l in open(sys.argv[1]).read().split('\r') if l.strip()]))" output/progress/Net3_progress.txt > output/progress/Net3.txt
+diff output/progress/Net3.txt known_output/progress/
+# reading all the files with --batch in a pool gives the same CSVs, and a summary (without the times)
+mkdir -p output/batch
+rm -f output/batch/*
+LANG=en_AU python ../ReadEPANETOutputFile.py -s --batch --batch_jobs=2 -N "output/batch/{name}_dnode.csv" --batch_summary=output/batch/summary.csv "data/*.hyd" > /dev/null 2>&1
+diff output/batch/Net1_dnode.csv known_output/
+diff output/batch/Net2_dnode.csv known_output/
+diff output/batch/Net3_dnode.csv known_output/
+python -c "import sys;sys.stdout.write(''.join([(lambda s: ', '.join(s[:5]+s[6:]))(l.replace(chr(92), '/').split(', ')) for l in open(sys.argv[1])]))" output/batch/summary.csv > output/batch/summary.txt
+diff output/batch/summary.txt known_output/batch/
+# a plugin reading the dynamic results still sees them when they are written to a CSV
+mkdir -p output/plugincsv
+rm -f output/plugincsv/*
+LANG=en_AU python ../ReadEPANETOutputFile.py --demo_dynamic_results_info -N output/plugincsv/Net3_dnode.csv data/Net3.hyd 2>&1 | grep "^DEMO" > output/plugincsv/Net3.txt
+diff output/plugincsv/Net3.txt known_output/plugincsv/
+diff output/plugincsv/Net3_dnode.csv known_output/
+# importing the library has no side effects (and is quick)
+python benchimport.py --check
+# sending messages to the plugins works (only errors are shown)
+python benchdispatch.py 10 1 1000 > /dev/null